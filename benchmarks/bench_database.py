@@ -0,0 +1,113 @@
+"""
+Benchmark: concurrent reads of /swaps/ while the auditor stores swap outcomes.
+
+Usage:
+    poetry run python -m benchmarks.bench_database
+    AUDITOR_DB_JOURNAL_MODE=DELETE poetry run python -m benchmarks.bench_database
+
+Runs against a temporary database. Compare the numbers of both runs to see
+the effect of WAL mode and the separate read and write pools.
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+TMP_DIR = tempfile.mkdtemp()
+os.environ.setdefault("AUDITOR_DATABASE_PATH", os.path.join(TMP_DIR, "bench.db"))
+os.environ.setdefault("BASE_URL", "http://localhost:8000")
+
+from httpx import AsyncClient  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+
+from src.auditor import Auditor  # noqa: E402
+from src.database import SQLITE_JOURNAL_MODE, engine  # noqa: E402
+from src.main import app  # noqa: E402
+from src.models import Base, Mint, SwapEvent  # noqa: E402
+from src.schemas import MintState  # noqa: E402
+
+DURATION = float(os.environ.get("BENCH_DURATION", 5))  # seconds
+READERS = int(os.environ.get("BENCH_READERS", 16))
+INITIAL_SWAPS = int(os.environ.get("BENCH_INITIAL_SWAPS", 10_000))
+
+
+async def seed() -> tuple[Mint, Mint]:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        mints = [
+            Mint(
+                url=f"https://mint{i}.example.com",
+                name=f"Mint {i}",
+                balance=1000,
+                sum_donations=1000,
+                updated_at=datetime.utcnow(),
+                state=MintState.OK.value,
+                n_errors=0,
+                n_mints=0,
+                n_melts=0,
+            )
+            for i in range(2)
+        ]
+        session.add_all(mints)
+        await session.commit()
+        session.add_all(
+            [
+                SwapEvent(
+                    from_id=mints[0].id,
+                    to_id=mints[1].id,
+                    from_url=mints[0].url,
+                    to_url=mints[1].url,
+                    amount=10,
+                    fee=0,
+                    time_taken=100,
+                    state=MintState.OK.value,
+                )
+                for _ in range(INITIAL_SWAPS)
+            ]
+        )
+        await session.commit()
+    return mints[0], mints[1]
+
+
+async def writer(auditor: Auditor, from_mint: Mint, to_mint: Mint, stop: float) -> int:
+    # the unit of work of a finished swap: both mints and the swap event
+    wallet = SimpleNamespace(available_balance=SimpleNamespace(amount=1000))
+    writes = 0
+    while time.monotonic() < stop:
+        await auditor.store_swap_outcome(
+            from_mint, wallet, to_mint, wallet, 10, 0, 100, MintState.OK.value
+        )
+        writes += 1
+    return writes
+
+
+async def reader(client: AsyncClient, stop: float) -> int:
+    reads = 0
+    while time.monotonic() < stop:
+        response = await client.get("/swaps/?limit=100")
+        response.raise_for_status()
+        reads += 1
+    return reads
+
+
+async def main():
+    from_mint, to_mint = await seed()
+    auditor = Auditor()
+    stop = time.monotonic() + DURATION
+    async with AsyncClient(app=app, base_url="http://bench") as client:
+        results = await asyncio.gather(
+            writer(auditor, from_mint, to_mint, stop),
+            *[reader(client, stop) for _ in range(READERS)],
+        )
+    writes, reads = results[0], sum(results[1:])
+    print(f"journal_mode={SQLITE_JOURNAL_MODE} readers={READERS} duration={DURATION}s")
+    print(f"reads:  {reads / DURATION:8.1f} req/s on /swaps/")
+    print(f"writes: {writes / DURATION:8.1f} swap outcomes/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
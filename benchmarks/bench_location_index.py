@@ -0,0 +1,120 @@
+"""
+Benchmark: load time, memory and lookup rate of the IP location database.
+
+Usage:
+    poetry run python -m benchmarks.bench_location_index
+    BENCH_DB_FILE=data/dbip-city-ipv4-num.csv.gz poetry run python -m benchmarks.bench_location_index
+
+Compares the former list of (start, end, lat, lon) tuples parsed from the
+CSV on every start with the memory-mapped binary index of ip_index.py. Each
+variant runs in a fresh process so the reported RSS is its own. Without
+BENCH_DB_FILE a synthetic database of BENCH_RANGES ranges is generated.
+"""
+
+import csv
+import gzip
+import os
+import random
+import resource
+import tempfile
+import time
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from src.ip_index import IpLocationIndex, _read_csv, build_index
+
+DB_FILE = os.environ.get("BENCH_DB_FILE")
+RANGES = int(os.environ.get("BENCH_RANGES", 3_000_000))
+PLACES = int(os.environ.get("BENCH_PLACES", 150_000))
+LOOKUPS = int(os.environ.get("BENCH_LOOKUPS", 1_000_000))
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 1e6
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def make_database(path: Path):
+    rng = random.Random(0)
+    places = [
+        (f"{rng.uniform(-90, 90):.4f}", f"{rng.uniform(-180, 180):.4f}")
+        for _ in range(PLACES)
+    ]
+    step = 2**32 // RANGES
+    with gzip.open(path, "wt", encoding="utf-8", compresslevel=1) as f:
+        writer = csv.writer(f)
+        place = places[0]
+        for i in range(RANGES):
+            # neighbouring ranges often share a place, like in dbip
+            if rng.random() < 0.7:
+                place = rng.choice(places)
+            start = i * step
+            writer.writerow([start, start + step - 1, "XX", "", "", "City", "", *place, ""])
+
+
+def lookup_rate(lookup) -> float:
+    rng = random.Random(1)
+    ips = [rng.getrandbits(32) for _ in range(LOOKUPS)]
+    start = time.perf_counter()
+    for ip in ips:
+        lookup(ip)
+    return LOOKUPS / (time.perf_counter() - start)
+
+
+def bench_list(db_file: str) -> tuple[float, float, float]:
+    rss = rss_mb()
+    start = time.perf_counter()
+    ip_ranges = sorted(_read_csv(Path(db_file)), key=lambda row: row[0])
+    load = time.perf_counter() - start
+
+    def lookup(ip):
+        i = bisect_right(ip_ranges, (ip, 2**32)) - 1
+        if i >= 0 and ip <= ip_ranges[i][1]:
+            return ip_ranges[i][2:]
+
+    return load, rss_mb() - rss, lookup_rate(lookup)
+
+
+def bench_index(index_file: str) -> tuple[float, float, float]:
+    rss = rss_mb()
+    start = time.perf_counter()
+    index = IpLocationIndex(index_file)
+    load = time.perf_counter() - start
+    rate = lookup_rate(index.lookup)
+    # pages touched by the lookups are part of the RSS
+    return load, rss_mb() - rss, rate
+
+
+def run(fn, path: str) -> tuple[float, float, float]:
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(fn, path).result()
+
+
+def main():
+    tmp_dir = Path(tempfile.mkdtemp())
+    db_file = Path(DB_FILE) if DB_FILE else tmp_dir / "bench.csv.gz"
+    if not DB_FILE:
+        make_database(db_file)
+    index_file = tmp_dir / "bench.idx"
+    start = time.perf_counter()
+    ranges = build_index(db_file, index_file)
+    build = time.perf_counter() - start
+    print(f"database={db_file} lookups={LOOKUPS}")
+    print(
+        f"index build {build:.1f} s, {ranges} ranges, "
+        f"{index_file.stat().st_size / 1e6:.1f} MB on disk"
+    )
+    for name, fn, path in (
+        ("tuples", bench_list, db_file),
+        ("index", bench_index, index_file),
+    ):
+        load, rss, rate = run(fn, str(path))
+        print(f"  {name:8s} load {load * 1000:9.1f} ms  rss {rss:7.1f} MB  {rate:10,.0f} lookups/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: serialization time and payload size of /mints/ and /graph/.
+
+Usage:
+    poetry run python -m benchmarks.bench_responses
+    BENCH_MINTS=2000 BENCH_EDGES=200000 poetry run python -m benchmarks.bench_responses
+
+Compares FastAPI's default JSON rendering, the orjson response class and the
+pydantic-core encoding used by the response cache, followed by the size and
+time of the gzip and brotli variants the cache serves.
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from src.responses import ENCODINGS, compress
+from src.schemas import MintGraph, MintRead, MintState
+
+MINTS = int(os.environ.get("BENCH_MINTS", 1000))
+EDGES = int(os.environ.get("BENCH_EDGES", 100_000))
+INFO_SIZE = int(os.environ.get("BENCH_INFO_SIZE", 10_000))  # chars
+ROUNDS = int(os.environ.get("BENCH_ROUNDS", 3))
+
+
+def make_mints() -> list[MintRead]:
+    now = datetime.utcnow()
+    return [
+        MintRead(
+            id=i,
+            url=f"https://mint{i}.example.com",
+            info=json.dumps({"name": f"Mint {i}", "description": "x" * INFO_SIZE}),
+            name=f"Mint {i}",
+            balance=1000 + i,
+            sum_donations=1000,
+            updated_at=now,
+            next_update=now,
+            state=MintState.OK,
+            n_errors=i % 7,
+            n_mints=i,
+            n_melts=i,
+        )
+        for i in range(MINTS)
+    ]
+
+
+def make_graph(mints: list[MintRead]) -> MintGraph:
+    now = datetime.utcnow()
+    nodes = [mint.model_copy(update={"info": ""}) for mint in mints]
+    edges = [
+        {
+            "from_id": i % MINTS,
+            "to_id": (i * 7 + 1) % MINTS,
+            "count": i % 100 + 1,
+            "total_amount": i,
+            "total_fee": i % 3,
+            "last_swap": now,
+            "state": MintState.OK,
+        }
+        for i in range(EDGES)
+    ]
+    return MintGraph(nodes=nodes, edges=edges)
+
+
+def timed(fn: Callable[[], bytes]) -> tuple[float, bytes]:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        body = fn()
+    return (time.perf_counter() - start) / ROUNDS * 1000, body
+
+
+def bench(name: str, value: Any, response_type: Any):
+    adapter = TypeAdapter(response_type)
+    renderers = {
+        # JSONResponse: jsonable_encoder and the standard library encoder
+        "json": lambda: json.dumps(jsonable_encoder(value)).encode(),
+        # ORJSONResponse: python objects in JSON mode, encoded by orjson
+        "orjson": lambda: orjson.dumps(adapter.dump_python(value, mode="json")),
+        # ResponseCache: pydantic-core encodes straight to JSON bytes
+        "pydantic": lambda: adapter.dump_json(value),
+    }
+    print(f"{name}:")
+    body = b""
+    for renderer, fn in renderers.items():
+        ms, body = timed(fn)
+        print(f"  {renderer:10s} {ms:9.1f} ms  {len(body) / 1e6:8.2f} MB")
+    for encoding in ENCODINGS:
+        ms, compressed = timed(lambda: compress(body, encoding))
+        print(f"  {encoding:10s} {ms:9.1f} ms  {len(compressed) / 1e6:8.2f} MB")
+
+
+def main():
+    mints = make_mints()
+    print(f"mints={MINTS} edges={EDGES} info={INFO_SIZE} chars rounds={ROUNDS}")
+    bench("/mints/", mints, List[MintRead])
+    bench("/graph/", make_graph(mints), MintGraph)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,44 @@
 import { ref, readonly } from 'vue';
 import { MintRead } from 'src/models/mint';
-import { getMints } from 'src/services/mintService';
+import { getMints, MINT_LIST_FIELDS } from 'src/services/mintService';
 
 // Create a shared state that can be used across components
 const mints = ref<MintRead[]>([]);
 const loading = ref(false);
 const error = ref('');
 
+// Versions parsed from the mint info, by mint id. The info is large, so it
+// is only requested again when a mint without a known version shows up.
+const versions = new Map<number, string | undefined>();
+
+const parseVersion = (info?: string): string | undefined => {
+  if (!info) {
+    return undefined;
+  }
+  try {
+    return JSON.parse(info).version || info;
+  } catch (err) {
+    // Keep original info if parsing fails
+    return info;
+  }
+};
+
 // Function to fetch mints data
 const fetchMints = async () => {
   loading.value = true;
   error.value = '';
   try {
-    const fetchedMints = await getMints(0, 100);
-    // Process mints if needed (like version extraction)
+    const fields = versions.size ? MINT_LIST_FIELDS : `${MINT_LIST_FIELDS},info`;
+    let fetchedMints = await getMints(0, 100, fields);
+    if (fields === MINT_LIST_FIELDS && fetchedMints.some(mint => !versions.has(mint.id))) {
+      fetchedMints = await getMints(0, 100, `${MINT_LIST_FIELDS},info`);
+    }
     fetchedMints.forEach(mint => {
-      if (mint.info) {
-        try {
-          const parsedInfo = JSON.parse(mint.info);
-          mint.info = parsedInfo.version || mint.info;
-        } catch (err) {
-          // Keep original info if parsing fails
-        }
+      if ('info' in mint) {
+        versions.set(mint.id, parseVersion(mint.info));
       }
+      // the version column shows the info field
+      mint.info = versions.get(mint.id);
     });
     mints.value = fetchedMints;
   } catch (err) {
@@ -37,6 +37,20 @@ export interface ChargeRequest {
   token: string;
 }
 
+export type DonationStatus = 'QUEUED' | 'PROCESSING' | 'RECEIVED' | 'FAILED';
+
+export interface DonationRead {
+  id: number;
+  mint_url: string;
+  amount: number;
+  status: DonationStatus;
+  received: number | null;
+  mint_id: number | null;
+  error: string | null;
+  created_at: string;
+  updated_at: string;
+}
+
 export interface MintGraphEdge {
   from_id: number;
   to_id: number;
@@ -1,22 +1,43 @@
 // src/services/mintService.ts
 
 import api from './api';
-import { MintRead, SwapEventRead, ChargeRequest, MintGraph, MintStats, PaymentRequestResponse } from 'src/models/mint';
+import { MintRead, SwapEventRead, ChargeRequest, DonationRead, MintGraph, MintStats, PaymentRequestResponse } from 'src/models/mint';
 
-export const getMints = async (skip = 0, limit = 100): Promise<MintRead[]> => {
+// /mints/ leaves out the large `info` field unless it is requested
+export const MINT_LIST_FIELDS = [
+  'id', 'url', 'name', 'balance', 'sum_donations', 'updated_at', 'next_update',
+  'state', 'n_errors', 'n_mints', 'n_melts', 'latitude', 'longitude',
+].join(',');
+
+export const getMints = async (skip = 0, limit = 100, fields?: string): Promise<MintRead[]> => {
   const response = await api.get<MintRead[]>('/mints/', {
-    params: { skip, limit },
+    params: fields ? { skip, limit, fields } : { skip, limit },
   });
   console.log('API Response:', response.data);
   return response.data;
 };
 
-export const createMint = async (chargeRequest: ChargeRequest): Promise<MintRead> => {
-  const response = await api.post<MintRead>('/mints/', chargeRequest);
-  console.log('API Response:', response.data);
+export const getDonation = async (donationId: number): Promise<DonationRead> => {
+  const response = await api.get<DonationRead>(`/donations/${donationId}`);
   return response.data;
 };
 
+// tokens are received in the background, poll until the donation is done
+export const createMint = async (chargeRequest: ChargeRequest, timeoutMs = 60000): Promise<DonationRead> => {
+  const response = await api.post<DonationRead>('/mints/', chargeRequest);
+  console.log('API Response:', response.data);
+  let donation = response.data;
+  const deadline = Date.now() + timeoutMs;
+  while ((donation.status === 'QUEUED' || donation.status === 'PROCESSING') && Date.now() < deadline) {
+    await new Promise((resolve) => setTimeout(resolve, 1000));
+    donation = await getDonation(donation.id);
+  }
+  if (donation.status === 'FAILED') {
+    throw new Error(donation.error ?? 'Donation failed');
+  }
+  return donation;
+};
+
 export const getSwaps = async (skip = 0, limit = 10): Promise<SwapEventRead[]> => {
   const response = await api.get<SwapEventRead[]>('/swaps/', {
     params: { skip, limit },
@@ -1,32 +1,62 @@
 import asyncio
 import json
 import os
-import time
-from typing import Optional
+from typing import Any, NamedTuple, Optional
 import random
 from cashu.wallet.wallet import Wallet
-from cashu.wallet.crud import get_bolt11_mint_quotes, bump_secret_derivation
+from cashu.wallet.crud import get_bolt11_mint_quotes, bump_secret_derivation, get_proofs
 from cashu.wallet.helpers import receive, deserialize_token_from_string
-from cashu.core.models import ProofState
-from cashu.core.base import Amount
+from cashu.core.base import Amount, Token
+from cashu.core.mint_info import MintInfo
 from loguru import logger
-from sqlalchemy import select
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from cashu.core.base import MintQuoteState
+from cashu.core.base import MeltQuoteState, MintQuoteState
 from cashu.core.helpers import sum_proofs
-from src.models import Mint, SwapEvent
+from src.models import Mint, SwapEvent, SwapJournal, SwapTimings
 from .database import engine
-from .schemas import MintState
+from .schemas import (
+    CircuitState,
+    MintState,
+    MintSummary,
+    SwapEventRead,
+    SwapJournalState,
+)
 from .helpers import sanitize_err
-
-MIN_SWAP_DELAY = 5 * 60  # seconds
-MAX_SWAP_DELAY = 15 * 60  # seconds
+from .event_bus import (
+    BalanceUpdated,
+    EventBus,
+    MintStateChanged,
+    SwapCompleted,
+    SwapFailed,
+)
+from .event_stream import EventStream
+from . import metrics
+from .circuit_breaker import (
+    BREAKER_PROBE_INTERVAL,
+    BREAKER_PROBE_TIMEOUT,
+    CircuitBreaker,
+    circuit_state,
+)
+from .mint_registry import MintRegistry
+from .quote_waiter import wait_for_mint_quote
+from .swap_timings import PhaseTimer
+from .wallet_pool import WalletPool
+
+SWAP_LANES = int(os.environ.get("AUDITOR_SWAP_LANES", 1))  # concurrent swaps
+MIN_SWAP_DELAY = int(os.environ.get("AUDITOR_MIN_SWAP_DELAY", 5 * 60))  # seconds
+MAX_SWAP_DELAY = int(os.environ.get("AUDITOR_MAX_SWAP_DELAY", 15 * 60))  # seconds
 BALANCE_UPDATE_DELAY = 60  # seconds
+REFRESH_CONCURRENCY = int(os.environ.get("AUDITOR_REFRESH_CONCURRENCY", 16))
+REFRESH_TIMEOUT = int(os.environ.get("AUDITOR_REFRESH_TIMEOUT", 30))  # seconds
+RESUME_INTERVAL = float(os.environ.get("AUDITOR_RESUME_INTERVAL", 60))  # seconds
 MINIMUM_AMOUNT = 5  # satoshis
 MAXIMUM_AMOUNT = 100  # satoshis
 MAX_FEE_RESERVE_PERCENT = 2  # percent
 MAX_FEE_RESERVE_TOLERANCE = 10  # satoshis
+# a failed melt is rarely paid after all, don't hold the swap up for long
+FAILED_MELT_QUOTE_DEADLINE = 15  # seconds
 
 FORBIDDEN_MINT_URLS = [
     "https://testnut.cashu.space",
@@ -34,79 +64,101 @@ FORBIDDEN_MINT_URLS = [
 ]
 
 
+class ReceivedToken(NamedTuple):
+    amount: Amount
+    # balance and info of the receiving wallet right after the receive
+    balance: Amount
+    mint_info: MintInfo
+
+
 class Auditor:
     wallet: Wallet
 
     def __init__(self):
-        pass
+        # ids of mints that are part of a running swap, guarded by selection_lock
+        self.busy_mints: set[int] = set()
+        self.selection_lock = asyncio.Lock()
+        self.wallets = WalletPool()
+        # shared with the API, every write to a mint must refresh it
+        self.mints = MintRegistry()
+        # outcomes of the auditor and the API, see event_bus.py
+        self.events = EventBus()
+        self.mints.listeners.append(self.publish_mint_change)
+        # live swap and mint changes for the /events endpoint
+        self.stream = EventStream()
+        self.events.subscribe(self.stream.handle)
+        # id of the newest stored swap, part of the ETags of the API
+        self.last_swap_id = 0
+        # keeps failing mints out of swap selection, see circuit_breaker.py
+        self.breaker = CircuitBreaker()
 
     async def init_wallet(self):
-        # we need to run the migrations once
-        self.wallet = await Wallet.with_db("https://testnut.cashu.space", ".")
-        await self.wallet.load_proofs(reload=True)
+        # we need to run the migrations once, the wallet pool takes care of it
+        self.wallet = await self.wallets.get("https://testnut.cashu.space")
         logger.info(f"Wallet initialized. Balance: {self.wallet.available_balance}")
 
         await self.update_all_balances()
         if os.environ.get("AUDITOR_DRY_RUN"):
             logger.info("Dry run enabled. Not starting swap task.")
             return
-        asyncio.create_task(self.monitor_swap_task())
+        await self.resume_swaps()
+        logger.info(f"Starting {SWAP_LANES} swap lane(s).")
+        for lane in range(SWAP_LANES):
+            asyncio.create_task(self.monitor_swap_task(lane))
+        asyncio.create_task(self.probe_task())
+        asyncio.create_task(self.resume_task())
 
         # asyncio.create_task(self.update_balances_task())
         # asyncio.create_task(self.mint_outstanding())
         # asyncio.create_task(self.update_all_mint_infos())
 
-    async def monitor_swap_task(self):
+    async def monitor_swap_task(self, lane: int = 0):
         while True:
             try:
-                await self.swap_task()
+                await self.swap_task(lane)
             except Exception as e:
-                logger.error(f"swap_task failed: {e}")
+                logger.error(f"swap_task failed on lane {lane}: {e}")
                 await asyncio.sleep(5)
 
     async def mint_outstanding(self):
         # get all mints
-        async with AsyncSession(engine) as session:
-            result = await session.execute(select(Mint))
-            mints = result.scalars().all()
-            session.expunge_all()  # Detach mints before session closes
+        mints = await self.mints.all()
 
         # load all wallets and get mint quotes that are outstanding
         for mint in mints:
-            wallet = await Wallet.with_db(mint.url, ".")
-            mint_quotes = await get_bolt11_mint_quotes(
-                db=wallet.db,
-                state=MintQuoteState.unpaid,
-                mint=mint.url,
-            )
-            if not mint_quotes:
-                continue
-            await wallet.load_proofs(reload=True)
-            try:
-                logger.info(f"Loading mint: {mint.url}")
-                await wallet.load_mint()
-            except Exception as e:
-                logger.error(f"Error loading mint: {e}")
-                await self.bump_mint_errors(mint)
-                continue
-            logger.info(f"Found {len(mint_quotes)} unpaid mint quotes.")
-            # TODO: Filter invoices per mint!!!
-            for i, mint_quote in enumerate(mint_quotes):
-                logger.info(
-                    f"Checking mint quote: {mint_quote} ({i+1}/{len(mint_quotes)})"
+            async with self.wallets.acquire(mint.url) as wallet:
+                mint_quotes = await get_bolt11_mint_quotes(
+                    db=wallet.db,
+                    state=MintQuoteState.unpaid,
+                    mint=mint.url,
                 )
-                if mint_quote.amount < 0 or mint_quote.paid:
+                if not mint_quotes:
                     continue
-                logger.info(f"Checking unpaid mint quote: {mint_quote}")
-                await asyncio.sleep(1)
                 try:
-                    proofs = await wallet.mint(mint_quote.amount, mint_quote.quote)
-                    logger.info(f"Minted {sum_proofs(proofs)} sats on {mint.url}")
-                    await self.bump_mint_n_mints(mint)
+                    logger.info(f"Loading mint: {mint.url}")
+                    await self.wallets.load_mint(wallet)
                 except Exception as e:
-                    logger.error(f"Error minting: {e}")
-                    await self.recover_errors(wallet, e)
-                    await self.bump_mint_errors(mint)
+                    logger.error(f"Error loading mint: {e}")
+                    await self.bump_mint_errors(mint.id)
+                    continue
+                logger.info(f"Found {len(mint_quotes)} unpaid mint quotes.")
+                # TODO: Filter invoices per mint!!!
+                for i, mint_quote in enumerate(mint_quotes):
+                    logger.info(
+                        f"Checking mint quote: {mint_quote} ({i+1}/{len(mint_quotes)})"
+                    )
+                    if mint_quote.amount < 0 or mint_quote.paid:
+                        continue
+                    logger.info(f"Checking unpaid mint quote: {mint_quote}")
+                    await asyncio.sleep(1)
+                    try:
+                        proofs = await wallet.mint(mint_quote.amount, mint_quote.quote)
+                        logger.info(f"Minted {sum_proofs(proofs)} sats on {mint.url}")
+                        await self.bump_mint_n_mints(mint)
+                    except Exception as e:
+                        logger.error(f"Error minting: {e}")
+                        await self.recover_errors(wallet, e)
+                        await self.bump_mint_errors(mint.id)
 
     async def check_proofs(self, wallet: Wallet):
         reserved_proofs = [p for p in wallet.proofs if p.reserved]
@@ -141,6 +193,7 @@ class Auditor:
                 "Outputs have already been signed before error. Bumping keyset counter."
             )
             await bump_secret_derivation(wallet.db, wallet.keyset_id, by=10)
+            metrics.RECOVERED_ERRORS.labels("outputs_signed").inc()
             return True
         if "already spent" in str(e) or "Proof already used" in str(e):
             logger.error("Token already spent error. Invalidating wallet proofs.")
@@ -149,74 +202,135 @@ class Auditor:
                 wallet.proofs, check_spendable=True
             )
             logger.info(f"Invalidated {len_checked-len(spendable_proofs)} proofs.")
+            metrics.RECOVERED_ERRORS.labels("proofs_spent").inc()
             return True
+        metrics.RECOVERED_ERRORS.labels("unhandled").inc()
         return False
 
+    async def refresh_mints(
+        self, mints: list[Mint], job, timeout: Optional[float] = None
+    ) -> list[tuple[Mint, Any]]:
+        """
+        Run `job(mint)` for all mints concurrently, at most REFRESH_CONCURRENCY
+        at a time and each limited to `timeout` seconds (REFRESH_TIMEOUT by
+        default). Returns the (mint, result) pairs of all jobs that succeeded.
+        """
+        timeout = REFRESH_TIMEOUT if timeout is None else timeout
+        semaphore = asyncio.Semaphore(REFRESH_CONCURRENCY)
+
+        async def run(mint: Mint):
+            async with semaphore:
+                try:
+                    return mint, await asyncio.wait_for(job(mint), timeout)
+                except asyncio.TimeoutError:
+                    logger.error(f"Refreshing {mint.url} timed out.")
+                except Exception as e:
+                    logger.error(f"Error refreshing {mint.url}: {e}")
+                return mint, None
+
+        results = await asyncio.gather(*[run(mint) for mint in mints])
+        return [(mint, result) for mint, result in results if result is not None]
+
     async def update_all_balances(self):
-        async with AsyncSession(engine) as session:
-            result = await session.execute(select(Mint))
-            mints = result.scalars().all()
-            session.expunge_all()  # Detach mints before session closes
-        for mint in mints:
-            wallet = await Wallet.with_db(mint.url, ".")
-            await wallet.load_proofs(reload=True)
-            mint.balance = wallet.available_balance.amount
-            logger.info(f"Updated balance for mint {mint.url} to {mint.balance} sat.")
+        mints = await self.mints.all()
+
+        async def get_balance(mint: Mint) -> int:
+            wallet = await self.wallets.get(mint.url)
+            return wallet.available_balance.amount
+
+        balances = await self.refresh_mints(mints, get_balance)
+        for mint, balance in balances:
+            logger.info(f"Updated balance for mint {mint.url} to {balance} sat.")
         # Now update the balances in the database
-        async with AsyncSession(engine) as session:
-            for mint in mints:
-                session.add(mint)
-            await session.commit()
+        if balances:
+            async with AsyncSession(engine) as session:
+                await session.execute(
+                    update(Mint),
+                    [{"id": mint.id, "balance": balance} for mint, balance in balances],
+                )
+                await session.commit()
+            await self.mints.refresh(mint.id for mint, _ in balances)
 
-    async def update_mint_balance(self, mint: Mint):
-        wallet = await Wallet.with_db(mint.url, ".")
-        await wallet.load_proofs(reload=True)
-        new_balance = wallet.available_balance.amount
-        async with AsyncSession(engine, expire_on_commit=False) as session:
-            result = await session.execute(select(Mint).where(Mint.id == mint.id))
-            mint_in_session = result.scalars().first()
-            if not mint_in_session:
-                raise ValueError(f"Mint with ID {mint.id} not found.")
-            mint_in_session.balance = new_balance
-            # Update the original mint object
-            logger.info(
-                f"Updated balance for mint {mint_in_session.url} to {mint_in_session.balance} sat."
-            )
-            await session.commit()
-            session.expunge(mint_in_session)
+    async def probe_task(self):
+        while True:
+            await asyncio.sleep(BREAKER_PROBE_INTERVAL)
+            try:
+                await self.probe_mints()
+            except Exception as e:
+                logger.error(f"Error probing mints: {e}")
 
-    async def update_all_mint_infos(self):
-        async with AsyncSession(engine) as session:
-            result = await session.execute(select(Mint))
-            mints = result.scalars().all()
-            session.expunge_all()  # Detach mints
-        for mint in mints:
-            logger.info(f"Updating mint info for {mint.url}")
+    async def resume_task(self):
+        # swaps that failed after their melt was sent are finished or rolled back here
+        while True:
+            await asyncio.sleep(RESUME_INTERVAL)
             try:
-                wallet = await Wallet.with_db(mint.url, ".")
-                await wallet.load_mint()
-                mint.info = json.dumps(wallet.mint_info.dict())
-                mint.name = wallet.mint_info.name
-                # update mint info in database
-                async with AsyncSession(engine) as session:
-                    session.add(mint)
-                    await session.commit()
+                await self.resume_swaps()
             except Exception as e:
-                logger.error(f"Error loading mint: {e}")
-                continue
+                logger.error(f"Error resuming swaps: {e}")
+
+    async def probe_mints(self):
+        """
+        Probe the mints whose open circuit has timed out with a request for
+        their info. Closes the circuits of the mints that answer and opens
+        the others again with a longer backoff.
+        """
+        mints = [
+            mint
+            for mint in await self.mints.all()
+            if circuit_state(mint) == CircuitState.HALF_OPEN
+        ]
+        if not mints:
+            return
 
-    async def update_wallet_mint_info(self, wallet: Wallet):
-        logger.info(f"Updating mint info for {wallet.url}")
+        async def probe(mint: Mint) -> bool:
+            wallet = await self.wallets.get(mint.url)
+            await wallet._get_info()
+            return True
+
+        results = await self.refresh_mints(mints, probe, timeout=BREAKER_PROBE_TIMEOUT)
+        healthy = {mint.id for mint, _ in results}
+        values = []
+        for mint in mints:
+            if mint.id in healthy:
+                self.breaker.reset(mint.id)
+                values.append({"id": mint.id, "next_update": None})
+                logger.info(f"Probe of {mint.url} succeeded, closing its circuit.")
+            else:
+                next_update = self.breaker.trip(mint.id)
+                values.append({"id": mint.id, "next_update": next_update})
+                logger.info(f"Probe of {mint.url} failed, open until {next_update}.")
         async with AsyncSession(engine) as session:
-            result = await session.execute(select(Mint).where(Mint.url == wallet.url))
-            mint = result.scalars().first()
-            if mint:
-                mint.info = json.dumps(wallet.mint_info.dict())
-                mint.name = wallet.mint_info.name
-                logger.debug(f"Updated mint info for {wallet.url}: {mint.info}")
+            await session.execute(update(Mint), values)
+            await session.commit()
+        await self.mints.refresh(mint.id for mint in mints)
+
+    async def update_all_mint_infos(self):
+        mints = await self.mints.all()
+
+        async def get_mint_info(mint: Mint):
+            logger.info(f"Updating mint info for {mint.url}")
+            async with self.wallets.acquire(mint.url) as wallet:
+                await self.wallets.load_mint(wallet, force=True)
+                return wallet.mint_info
+
+        mint_infos = await self.refresh_mints(mints, get_mint_info)
+        # update mint infos in database
+        if mint_infos:
+            async with AsyncSession(engine) as session:
+                await session.execute(
+                    update(Mint),
+                    [
+                        {
+                            "id": mint.id,
+                            "info": json.dumps(mint_info.dict()),
+                            "name": mint_info.name,
+                        }
+                        for mint, mint_info in mint_infos
+                    ],
+                )
                 await session.commit()
-            else:
-                logger.error(f"Mint with URL {wallet.url} not found.")
+            await self.mints.refresh(mint.id for mint, _ in mint_infos)
+        logger.info(f"Updated mint info for {len(mint_infos)} of {len(mints)} mints.")
 
     async def bump_mint_errors(self, mint_id: int):
         async with AsyncSession(engine) as session:
@@ -226,6 +340,7 @@ class Auditor:
                 previous_n_errors = mint_in_session.n_errors
                 mint_in_session.n_errors += 1
                 mint_in_session.state = MintState.ERROR.value
+                mint_in_session.next_update = self.breaker.trip(mint_id)
 
                 # Update the original mint object
                 logger.debug(
@@ -235,7 +350,8 @@ class Auditor:
                 await session.commit()
                 session.expunge(mint_in_session)
             else:
-                logger.error(f"Mint with ID {mint_in_session.id} not found.")
+                logger.error(f"Mint with ID {mint_id} not found.")
+        await self.mints.refresh([mint_id])
 
     async def bump_mint_n_mints(self, mint: Mint):
         async with AsyncSession(engine, expire_on_commit=False) as session:
@@ -253,78 +369,84 @@ class Auditor:
                 )
             else:
                 logger.error(f"Mint with ID {mint.id} not found.")
-
-    async def bump_mint_n_melts(self, mint: Mint):
-        async with AsyncSession(engine, expire_on_commit=False) as session:
-            result = await session.execute(select(Mint).where(Mint.id == mint.id))
-            mint_in_session = result.scalars().first()
-            if mint_in_session:
-                previous_n_melts = mint_in_session.n_melts
-                mint_in_session.n_melts += 1
-                mint_in_session.state = MintState.OK.value
-                await session.commit()
-                session.expunge(mint_in_session)
-                # Update the original mint object
-                mint.n_melts = mint_in_session.n_melts
-                mint.state = mint_in_session.state
-                logger.debug(
-                    f"Bumping n_melts for {mint.url} from {previous_n_melts} to {mint.n_melts}"
-                )
-            else:
-                logger.error(f"Mint with ID {mint.id} not found.")
+        await self.mints.refresh([mint.id])
 
     async def update_balances_task(self):
         while True:
             await asyncio.sleep(BALANCE_UPDATE_DELAY)
             await self.update_all_balances()
 
-    async def receive_token(self, token: str) -> Amount:
-        token_obj = deserialize_token_from_string(token)
+    def parse_token(self, token: str) -> Token:
+        """Deserialize and check a donated token. Raises ValueError."""
+        try:
+            token_obj = deserialize_token_from_string(token)
+        except Exception as e:
+            raise ValueError(f"Invalid token: {e}") from e
         if token_obj.unit != "sat":
             raise ValueError("Only satoshi units are supported.")
         if token_obj.mint in FORBIDDEN_MINT_URLS:
             raise ValueError("This mint is not allowed to receive tokens.")
-        self.wallet = await Wallet.with_db(token_obj.mint, ".")
-        await self.wallet.load_mint()
-        await self.wallet.load_proofs(reload=True)
-        balance_before = self.wallet.available_balance
-        wallet_after = await receive(self.wallet, token_obj)
-        balance_received = wallet_after.available_balance - balance_before
-        return balance_received
+        return token_obj
+
+    async def receive_token(self, token: str) -> ReceivedToken:
+        token_obj = self.parse_token(token)
+        async with self.wallets.acquire(token_obj.mint, load_mint=True) as wallet:
+            balance_before = wallet.available_balance
+            wallet_after = await receive(wallet, token_obj)
+            # read while the wallet is held, other donations change it after
+            return ReceivedToken(
+                amount=wallet_after.available_balance - balance_before,
+                balance=wallet_after.available_balance,
+                mint_info=wallet_after.mint_info,
+            )
+
+    async def recover_received_token(self, token: str) -> Optional[ReceivedToken]:
+        """
+        The ReceivedToken of a token that a previous run received before it
+        could record it, None if the proofs of the token are not spent or
+        were not spent by us.
+        """
+        token_obj = self.parse_token(token)
+        async with self.wallets.acquire(token_obj.mint, load_mint=True) as wallet:
+            proof_states = await wallet.check_proof_state(token_obj.proofs)
+            if not all(state.spent for state in proof_states.states):
+                return None
+            # the wallet moves the proofs it swapped to proofs_used
+            used = set()
+            for keyset_id in {proof.id for proof in token_obj.proofs}:
+                proofs = await get_proofs(
+                    db=wallet.db, id=keyset_id, table="proofs_used"
+                )
+                used.update(proof.secret for proof in proofs)
+            if not all(proof.secret in used for proof in token_obj.proofs):
+                return None
+            # the wallet holds the received proofs, less the input fees
+            fees = wallet.get_fees_for_proofs(token_obj.proofs)
+            return ReceivedToken(
+                amount=Amount(wallet.unit, token_obj.amount - fees),
+                balance=wallet.available_balance,
+                mint_info=wallet.mint_info,
+            )
 
     async def get_mint(self, mint_url: str) -> Mint:
-        async with AsyncSession(engine) as session:
-            result = await session.execute(select(Mint).where(Mint.url == mint_url))
-            mint = result.scalars().first()
-            if mint:
-                session.expunge(mint)  # Detach the mint
-            else:
-                logger.error(f"Mint with URL {mint_url} not found.")
+        mint = await self.mints.get_by_url(mint_url)
+        if not mint:
+            logger.error(f"Mint with URL {mint_url} not found.")
         return mint
 
-    async def update_mint_db(self, wallet: Wallet):
-        async with AsyncSession(engine) as session:
-            result = await session.execute(select(Mint).where(Mint.url == wallet.url))
-            mint = result.scalars().first()
-            if mint:
-                mint.balance = wallet.available_balance.amount
-                await session.commit()
-            else:
-                logger.error(f"Mint with URL {wallet.url} not found.")
-
-    async def choose_to_mint(self) -> Mint:
+    async def choose_to_mint(self, exclude: Optional[set[int]] = None) -> Mint:
         # choose mint with highest balance to donation ratio
-        async with AsyncSession(engine) as session:
-            result = await session.execute(select(Mint))
-            mints = result.scalars().all()
-            session.expunge_all()  # Detach mints before session closes
+        mints = await self.mints.all()
 
+        exclude = exclude or set()
         min_balance_threshold = 100
         mints = [
             mint
             for mint in mints
             if mint.state == MintState.OK.value or mint.balance < min_balance_threshold
         ]
+        mints = [mint for mint in mints if mint.id not in exclude]
+        mints = [mint for mint in mints if self.breaker.allows(mint)]
         mints = [mint for mint in mints if mint.balance < mint.sum_donations]
         if not mints:
             raise ValueError("No suitable mints found.")
@@ -339,12 +461,14 @@ class Auditor:
         to_mint = random.choice(mints)
         return to_mint
 
-    async def choose_from_mint_and_amount(self, to_mint: Mint) -> tuple[Mint, int]:
+    async def choose_from_mint_and_amount(
+        self, to_mint: Mint, exclude: Optional[set[int]] = None
+    ) -> tuple[Mint, int]:
         # choose mint with enough balance to send to to_mint
-        async with AsyncSession(engine) as session:
-            result = await session.execute(select(Mint).where(Mint.url != to_mint.url))
-            mints = result.scalars().all()
-            session.expunge_all()  # Detach mints
+        mints = [mint for mint in await self.mints.all() if mint.url != to_mint.url]
+        exclude = exclude or set()
+        mints = [mint for mint in mints if mint.id not in exclude]
+        mints = [mint for mint in mints if self.breaker.allows(mint)]
         if not mints:
             raise ValueError("No mints available for selection.")
 
@@ -360,211 +484,517 @@ class Auditor:
         from_mint = random.choice(mints)
         return from_mint, amount
 
-    async def store_swap_event(
+    async def load_last_swap_id(self):
+        async with AsyncSession(engine) as session:
+            result = await session.execute(select(func.max(SwapEvent.id)))
+            self.last_swap_id = result.scalar() or 0
+
+    def publish_swap(self, swap_event: SwapEvent):
+        self.last_swap_id = max(self.last_swap_id, swap_event.id)
+        swap = SwapEventRead.model_validate(swap_event)
+        if swap.state == MintState.OK:
+            self.events.publish(SwapCompleted(swap=swap))
+        else:
+            self.events.publish(SwapFailed(swap=swap))
+
+    def publish_mint_change(self, previous: Optional[Mint], mint: Mint):
+        state_changed = previous is not None and previous.state != mint.state
+        balance_changed = previous is None or previous.balance != mint.balance
+        if not state_changed and not balance_changed:
+            return
+        summary = MintSummary.model_validate(mint)
+        if state_changed:
+            self.events.publish(
+                MintStateChanged(
+                    mint=summary, previous_state=MintState(previous.state)
+                )
+            )
+        if balance_changed:
+            self.events.publish(
+                BalanceUpdated(
+                    mint=summary,
+                    previous_balance=previous.balance if previous else None,
+                )
+            )
+
+    def wallet_mint_values(self, wallet: Wallet) -> dict:
+        # columns of a mint that are derived from its wallet
+        values = {"balance": wallet.available_balance.amount}
+        mint_info = getattr(wallet, "mint_info", None)
+        if mint_info:
+            values["info"] = json.dumps(mint_info.dict())
+            values["name"] = mint_info.name
+        return values
+
+    async def store_swap_outcome(
         self,
         from_mint: Mint,
+        from_wallet: Wallet,
         to_mint: Mint,
+        to_wallet: Wallet,
         amount: int,
         fee: int,
         time_taken: int,
         state: str,
         error: Optional[str] = None,
+        timings: Optional[dict[str, float]] = None,
+        count_error: bool = True,
     ):
-        async with AsyncSession(engine) as session:
-            swap_event = SwapEvent(
+        """
+        Store the outcome of a swap in a single transaction: balances and mint
+        infos of both mints, the melt/mint/error counters, the SwapEvent and
+        the durations of its phases. A failed swap is attributed to the
+        sending mint, unless `count_error` is False because the swap already
+        counted it with `bump_mint_errors`.
+        """
+        from_values = self.wallet_mint_values(from_wallet)
+        to_values = self.wallet_mint_values(to_wallet)
+        if state == MintState.OK.value:
+            from_values.update(
+                n_melts=Mint.n_melts + 1, state=MintState.OK.value, next_update=None
+            )
+            to_values.update(n_mints=Mint.n_mints + 1, next_update=None)
+            self.breaker.reset(from_mint.id)
+            self.breaker.reset(to_mint.id)
+        elif count_error:
+            from_values.update(
+                n_errors=Mint.n_errors + 1,
+                state=MintState.ERROR.value,
+                next_update=self.breaker.trip(from_mint.id),
+            )
+        swap_event = SwapEvent(
+            from_id=from_mint.id,
+            to_id=to_mint.id,
+            from_url=from_mint.url,
+            to_url=to_mint.url,
+            amount=amount,
+            fee=fee,
+            time_taken=time_taken,
+            state=state,
+            error=error,
+        )
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            async with session.begin():
+                await session.execute(
+                    update(Mint).where(Mint.id == from_mint.id).values(**from_values)
+                )
+                await session.execute(
+                    update(Mint).where(Mint.id == to_mint.id).values(**to_values)
+                )
+                session.add(swap_event)
+                if timings:
+                    await session.flush()
+                    session.add(SwapTimings(swap_id=swap_event.id, **timings))
+        await self.mints.refresh([from_mint.id, to_mint.id])
+        metrics.observe_swap(from_mint.url, to_mint.url, state, timings or {})
+        self.publish_swap(swap_event)
+        logger.debug(
+            f"Stored {state} swap from {from_mint.url} to {to_mint.url} of {amount} sat."
+        )
+
+    async def open_journal(
+        self,
+        from_mint: Mint,
+        to_mint: Mint,
+        amount: int,
+        mint_quote: str,
+        melt_quote: str,
+    ) -> int:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            entry = SwapJournal(
                 from_id=from_mint.id,
                 to_id=to_mint.id,
-                from_url=from_mint.url,
-                to_url=to_mint.url,
                 amount=amount,
-                fee=fee,
-                time_taken=time_taken,
-                state=state,
-                error=error,
+                mint_quote=mint_quote,
+                melt_quote=melt_quote,
+                state=SwapJournalState.QUOTED.value,
+            )
+            session.add(entry)
+            await session.commit()
+        return entry.id
+
+    async def journal(self, journal_id: int, state: SwapJournalState, **values):
+        """Record the progress of a swap, committed before the next step runs."""
+        async with AsyncSession(engine) as session:
+            await session.execute(
+                update(SwapJournal)
+                .where(SwapJournal.id == journal_id)
+                .values(state=state.value, **values)
             )
-            session.add(swap_event)
             await session.commit()
 
-    async def swap_task(self):
+    async def resume_swaps(self):
+        """
+        Finish or roll back the swaps left in flight by a previous run or by
+        a failed swap, at most REFRESH_CONCURRENCY at a time.
+        """
+        in_flight = (
+            SwapJournalState.QUOTED.value,
+            SwapJournalState.MELTING.value,
+            SwapJournalState.MELTED.value,
+        )
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            result = await session.execute(
+                select(SwapJournal).where(SwapJournal.state.in_(in_flight))
+            )
+            entries = result.scalars().all()
+        async with self.selection_lock:
+            # running swaps hold their mints, their entries are not resumed
+            entries = [
+                entry
+                for entry in entries
+                if entry.from_id not in self.busy_mints
+                and entry.to_id not in self.busy_mints
+            ]
+            reserved = {mint_id for e in entries for mint_id in (e.from_id, e.to_id)}
+            self.busy_mints.update(reserved)
+        if not entries:
+            return
+        logger.info(f"Resuming {len(entries)} interrupted swaps.")
+        semaphore = asyncio.Semaphore(REFRESH_CONCURRENCY)
+
+        async def run(entry: SwapJournal):
+            async with semaphore:
+                try:
+                    await self.resume_swap(entry)
+                except Exception as e:
+                    logger.error(f"Error resuming swap {entry.id}: {e}")
+
+        try:
+            await asyncio.gather(*[run(entry) for entry in entries])
+        finally:
+            self.busy_mints.difference_update(reserved)
+
+    async def resume_swap(self, entry: SwapJournal):
+        from_mint = await self.mints.get(entry.from_id)
+        to_mint = await self.mints.get(entry.to_id)
+        if from_mint is None or to_mint is None:
+            await self.journal(
+                entry.id, SwapJournalState.FAILED, error="Mint not found."
+            )
+            return
+        # wallets are acquired in a fixed order, swaps resume in parallel
+        first, second = sorted((from_mint.url, to_mint.url))
+        async with self.wallets.acquire(first, load_mint=True) as first_wallet:
+            async with self.wallets.acquire(second, load_mint=True) as second_wallet:
+                wallets = {first: first_wallet, second: second_wallet}
+                from_wallet, to_wallet = wallets[from_mint.url], wallets[to_mint.url]
+                await self._resume_swap(entry, from_mint, from_wallet, to_mint, to_wallet)
+
+    async def _resume_swap(
+        self,
+        entry: SwapJournal,
+        from_mint: Mint,
+        from_wallet: Wallet,
+        to_mint: Mint,
+        to_wallet: Wallet,
+    ):
+        state = SwapJournalState(entry.state)
+        if state != SwapJournalState.MELTED:
+            # the melt was not confirmed, the sending mint knows if it was paid
+            melt_quote = await from_wallet.get_melt_quote(entry.melt_quote)
+            if melt_quote is None or melt_quote.state == MeltQuoteState.unpaid:
+                await self.check_proofs(from_wallet)
+                if entry.error:
+                    # the melt failed, swap() counted the error and left its
+                    # outcome to the resumer
+                    await self.store_swap_outcome(
+                        from_mint,
+                        from_wallet,
+                        to_mint,
+                        to_wallet,
+                        entry.amount,
+                        0,
+                        0,
+                        MintState.ERROR.value,
+                        entry.error,
+                        count_error=False,
+                    )
+                await self.journal(
+                    entry.id,
+                    SwapJournalState.FAILED,
+                    error=entry.error or "Interrupted before the invoice was paid.",
+                )
+                logger.info(f"Rolled back interrupted swap {entry.id}.")
+                return
+            if melt_quote.state == MeltQuoteState.pending:
+                logger.warning(f"Melt of swap {entry.id} is still pending.")
+                return
+            await from_wallet.load_proofs(reload=True)
+            await self.journal(entry.id, SwapJournalState.MELTED)
+
+        mint_quote = await to_wallet.get_mint_quote(entry.mint_quote)
+        if mint_quote.state == MintQuoteState.paid:
+            proofs = await to_wallet.mint(entry.amount, entry.mint_quote)
+            logger.info(f"Minted {sum_proofs(proofs)} sat of swap {entry.id}.")
+        elif mint_quote.state != MintQuoteState.issued:
+            logger.warning(f"Invoice of swap {entry.id} is {mint_quote.state.value}.")
+            return
+        await self.store_swap_outcome(
+            from_mint,
+            from_wallet,
+            to_mint,
+            to_wallet,
+            entry.amount,
+            entry.fee or 0,
+            entry.time_taken or 0,
+            MintState.OK.value,
+        )
+        await self.journal(entry.id, SwapJournalState.MINTED)
+        logger.success(f"Finished interrupted swap {entry.id}.")
+
+    async def reserve_swap_pair(self) -> tuple[Mint, Mint, int]:
+        # select a disjoint pair of mints that is not part of any running swap
+        async with self.selection_lock:
+            to_mint = await self.choose_to_mint(exclude=self.busy_mints)
+            from_mint, amount = await self.choose_from_mint_and_amount(
+                to_mint, exclude=self.busy_mints
+            )
+            self.busy_mints.update((to_mint.id, from_mint.id))
+        return to_mint, from_mint, amount
+
+    def release_swap_pair(self, to_mint: Mint, from_mint: Mint):
+        self.busy_mints.discard(to_mint.id)
+        self.busy_mints.discard(from_mint.id)
+
+    async def swap_task(self, lane: int = 0):
         while True:
             swap_delay = random.randint(MIN_SWAP_DELAY, MAX_SWAP_DELAY)
             await asyncio.sleep(swap_delay)
 
-            to_mint = await self.choose_to_mint()
-            to_wallet = await Wallet.with_db(to_mint.url, ".")
-            try:
-                await to_wallet.load_mint()
-                await to_wallet.load_proofs(reload=True)
-                await self.update_wallet_mint_info(to_wallet)
-            except Exception as e:
-                logger.error(f"Error loading mint: {e}")
-                await self.bump_mint_errors(to_mint.id)
-                raise e
-
-            from_mint, amount = await self.choose_from_mint_and_amount(to_mint)
-            from_wallet = await Wallet.with_db(from_mint.url, ".")
+            to_mint, from_mint, amount = await self.reserve_swap_pair()
+            logger.debug(
+                f"Lane {lane}: reserved {from_mint.url} -> {to_mint.url} ({amount} sat)"
+            )
             try:
-                await from_wallet.load_mint()
-                await from_wallet.load_proofs(reload=True)
-                await self.update_wallet_mint_info(from_wallet)
-            except Exception as e:
-                logger.error(f"Error loading mint: {e}")
-                await self.bump_mint_errors(from_mint.id)
-                raise e
+                async with self.wallets.acquire(
+                    to_mint.url
+                ) as to_wallet, self.wallets.acquire(from_mint.url) as from_wallet:
+                    with metrics.SWAPS_IN_FLIGHT.track_inprogress():
+                        await self.swap(
+                            to_mint, to_wallet, from_mint, from_wallet, amount
+                        )
+            finally:
+                self.release_swap_pair(to_mint, from_mint)
+
+    async def swap(
+        self,
+        to_mint: Mint,
+        to_wallet: Wallet,
+        from_mint: Mint,
+        from_wallet: Wallet,
+        amount: int,
+    ):
+        timer = PhaseTimer()
+        try:
+            with timer.phase("load_to_mint"):
+                await self.wallets.load_mint(to_wallet)
+        except Exception as e:
+            logger.error(f"Error loading mint: {e}")
+            await self.bump_mint_errors(to_mint.id)
+            raise e
 
-            logger.info(
-                f"Swapping from {from_mint.url} to {to_mint.url} amount: {amount} sat"
-            )
+        try:
+            with timer.phase("load_from_mint"):
+                await self.wallets.load_mint(from_wallet)
+        except Exception as e:
+            logger.error(f"Error loading mint: {e}")
+            await self.bump_mint_errors(from_mint.id)
+            raise e
 
-            await self.update_mint_balance(from_mint)
-            await self.update_mint_balance(to_mint)
+        logger.info(
+            f"Swapping from {from_mint.url} to {to_mint.url} amount: {amount} sat"
+        )
 
-            try:
+        try:
+            with timer.phase("request_mint"):
                 mint_quote = await to_wallet.request_mint(amount)
-            except Exception as e:
-                logger.error(f"Error getting invoice: {e}")
-                await self.bump_mint_errors(to_mint.id)
-                raise e
+        except Exception as e:
+            logger.error(f"Error getting invoice: {e}")
+            await self.bump_mint_errors(to_mint.id)
+            raise e
 
-            try:
+        try:
+            with timer.phase("melt_quote"):
                 melt_quote = await from_wallet.melt_quote(mint_quote.request)
-            except Exception as e:
-                logger.error(f"Error getting melt quote: {e}")
-                await self.bump_mint_errors(from_mint.id)
-                await self.store_swap_event(
-                    from_mint,
-                    to_mint,
-                    amount,
-                    0,
-                    0,
-                    MintState.ERROR.value,
-                    sanitize_err(e),
-                )
-                raise e
+        except Exception as e:
+            logger.error(f"Error getting melt quote: {e}")
+            await self.store_swap_outcome(
+                from_mint,
+                from_wallet,
+                to_mint,
+                to_wallet,
+                amount,
+                0,
+                0,
+                MintState.ERROR.value,
+                sanitize_err(e),
+                timings=timer.phases,
+            )
+            raise e
 
-            balance_before_melt = from_wallet.available_balance.amount
-            total_amount = melt_quote.amount + melt_quote.fee_reserve
-            amount_difference = total_amount - amount
+        journal_id = await self.open_journal(
+            from_mint, to_mint, amount, mint_quote.quote, melt_quote.quote
+        )
+        balance_before_melt = from_wallet.available_balance.amount
+        total_amount = melt_quote.amount + melt_quote.fee_reserve
+        amount_difference = total_amount - amount
 
-            try:
+        try:
+            with timer.phase("select_to_send"):
                 send_proofs, _ = await from_wallet.select_to_send(
                     from_wallet.proofs,
                     total_amount,
                     include_fees=True,
                     set_reserved=True,
                 )
-            except Exception as e:
-                this_error = await self.recover_errors(from_wallet, e)
-                logger.error(
-                    f"Could not select amount ({melt_quote.amount} sat) plus fee reserve ({melt_quote.fee_reserve} sat) total {total_amount} sat from sending wallet."
-                )
-                raise e
+        except Exception as e:
+            this_error = await self.recover_errors(from_wallet, e)
+            logger.error(
+                f"Could not select amount ({melt_quote.amount} sat) plus fee reserve ({melt_quote.fee_reserve} sat) total {total_amount} sat from sending wallet."
+            )
+            await self.journal(
+                journal_id, SwapJournalState.FAILED, error=sanitize_err(e)
+            )
+            raise e
 
-            mint_worked = False
-            try:
-                # if the fee reserve is more than 2% of the amount, we throw an error
-                if amount_difference > MAX_FEE_RESERVE_TOLERANCE and (
-                    melt_quote.fee_reserve > amount * MAX_FEE_RESERVE_PERCENT / 100
-                    or total_amount > amount * (1 + MAX_FEE_RESERVE_PERCENT / 100)
-                ):
-                    raise Exception(
-                        f"Fee reserve of {melt_quote.fee_reserve/amount*100:.1f}% is too high. Mint wants to charge {total_amount} sat for invoice of {amount} sat."
-                    )
-                time_start = time.time()
+        mint_worked = False
+        try:
+            # if the fee reserve is more than 2% of the amount, we throw an error
+            if amount_difference > MAX_FEE_RESERVE_TOLERANCE and (
+                melt_quote.fee_reserve > amount * MAX_FEE_RESERVE_PERCENT / 100
+                or total_amount > amount * (1 + MAX_FEE_RESERVE_PERCENT / 100)
+            ):
+                raise Exception(
+                    f"Fee reserve of {melt_quote.fee_reserve/amount*100:.1f}% is too high. Mint wants to charge {total_amount} sat for invoice of {amount} sat."
+                )
+            await self.journal(journal_id, SwapJournalState.MELTING)
+            with timer.phase("melt"):
                 await from_wallet.melt(
                     send_proofs,
                     mint_quote.request,
                     melt_quote.fee_reserve,
                     melt_quote.quote,
                 )
-                time_taken_ms = (time.time() - time_start) * 1000
-                await from_wallet.load_proofs(reload=True)
-                balance_after_melt = from_wallet.available_balance.amount
-                logger.info(
-                    f"Melt successful: time taken: {int(time_taken_ms)} ms. Amount: {melt_quote.amount} sat. Fee reserve: {melt_quote.fee_reserve} sat. Fee: {(balance_before_melt - balance_after_melt) - amount} sat."
-                )
-            except Exception as e:
-                logger.error(f"Error melting: {e}")
-                melt_error = sanitize_err(e)
-                time_taken_ms = (time.time() - time_start) * 1000
-                await from_wallet.load_proofs(reload=True)
-                balance_after_melt = from_wallet.available_balance.amount
-                this_error = await self.recover_errors(from_wallet, e)
-                # still try to mint in case of any non-recoverable error
-                if not this_error:
-                    try:
-                        logger.info("Trying to mint although melt failed.")
-                        await asyncio.sleep(5)
+            time_taken_ms = timer.phases["melt"]
+            await from_wallet.load_proofs(reload=True)
+            balance_after_melt = from_wallet.available_balance.amount
+            logger.info(
+                f"Melt successful: time taken: {int(time_taken_ms)} ms. Amount: {melt_quote.amount} sat. Fee reserve: {melt_quote.fee_reserve} sat. Fee: {(balance_before_melt - balance_after_melt) - amount} sat."
+            )
+            await self.journal(
+                journal_id,
+                SwapJournalState.MELTED,
+                fee=(balance_before_melt - balance_after_melt) - amount,
+                time_taken=time_taken_ms,
+            )
+        except Exception as e:
+            logger.error(f"Error melting: {e}")
+            melt_error = sanitize_err(e)
+            time_taken_ms = timer.phases.get("melt", 0)
+            await from_wallet.load_proofs(reload=True)
+            balance_after_melt = from_wallet.available_balance.amount
+            this_error = await self.recover_errors(from_wallet, e)
+            # still try to mint in case of any non-recoverable error
+            if not this_error:
+                try:
+                    logger.info("Trying to mint although melt failed.")
+                    with timer.phase("quote_wait"):
+                        await wait_for_mint_quote(
+                            to_wallet, mint_quote.quote, FAILED_MELT_QUOTE_DEADLINE
+                        )
+                    with timer.phase("mint"):
                         proofs = await to_wallet.mint(amount, mint_quote.quote)
-                        mint_worked = True
-                        logger.success("Mint worked.")
-                    except Exception as e2:
-                        logger.error(f"Error minting: {e2}")
-                        pass
-
-                if not mint_worked:
-                    logger.info("Mint did not work.Checking proof states.")
-                    spent_proofs = []
-                    unspent_proofs = []
-                    proof_states = await from_wallet.check_proof_state(send_proofs)
-                    for j, state in enumerate(proof_states.states):
-                        if state == ProofState.spent:
-                            spent_proofs.append(send_proofs[j])
-                        elif state == ProofState.unspent:
-                            unspent_proofs.append(send_proofs[j])
-
-                    logger.info(f"Unspent proofs: {len(unspent_proofs)}")
-                    logger.info(f"Spent proofs: {len(spent_proofs)}")
-                    await from_wallet.set_reserved_for_send(
-                        unspent_proofs, reserved=False
-                    )
-                    await from_wallet.invalidate(spent_proofs)
-
-                    if this_error:
-                        logger.info("Not storing this event as a failure.")
-                        raise Exception("Error melting and minting.")
-                    await self.bump_mint_errors(from_mint.id)
-                    await self.store_swap_event(
-                        from_mint,
-                        to_mint,
-                        amount,
-                        0,
-                        0,
-                        MintState.ERROR.value,
-                        melt_error,
-                    )
-
-                    raise e
-                else:
+                    mint_worked = True
+                    logger.success("Mint worked.")
+                except Exception as e2:
+                    logger.error(f"Error minting: {e2}")
                     pass
 
             if not mint_worked:
-                try:
-                    logger.info("Minting after melt succeed.")
-                    await asyncio.sleep(2)
-                    proofs = await to_wallet.mint(amount, mint_quote.quote)
-                    logger.info(f"Minted {sum_proofs(proofs)} sat to {to_mint.url}")
-                except Exception as e:
-                    logger.error(f"Error minting: {e}")
-                    await self.bump_mint_errors(to_mint.id)
+                logger.info("Mint did not work.Checking proof states.")
+                spent_proofs = []
+                unspent_proofs = []
+                pending_proofs = []
+                proof_states = await from_wallet.check_proof_state(send_proofs)
+                for j, state in enumerate(proof_states.states):
+                    if state.spent:
+                        spent_proofs.append(send_proofs[j])
+                    elif state.unspent:
+                        unspent_proofs.append(send_proofs[j])
+                    elif state.pending:
+                        pending_proofs.append(send_proofs[j])
+
+                logger.info(f"Unspent proofs: {len(unspent_proofs)}")
+                logger.info(f"Spent proofs: {len(spent_proofs)}")
+                logger.info(f"Pending proofs: {len(pending_proofs)}")
+                await from_wallet.set_reserved_for_send(
+                    unspent_proofs, reserved=False
+                )
+                await from_wallet.invalidate(spent_proofs)
+                # with spent or pending proofs the invoice may still get paid,
+                # the journal stays MELTING and the resumer checks the melt quote
+                settling = bool(spent_proofs or pending_proofs)
+                journal_state = (
+                    SwapJournalState.MELTING if settling else SwapJournalState.FAILED
+                )
+                await self.journal(journal_id, journal_state, error=melt_error)
+
+                if this_error:
+                    logger.info("Not storing this event as a failure.")
+                    raise Exception("Error melting and minting.")
+                if settling:
+                    # stored once, by resume_task, when the melt quote settles
+                    logger.info("Leaving the outcome of the swap to the resumer.")
+                    await self.bump_mint_errors(from_mint.id)
                     raise e
+                await self.store_swap_outcome(
+                    from_mint,
+                    from_wallet,
+                    to_mint,
+                    to_wallet,
+                    amount,
+                    0,
+                    0,
+                    MintState.ERROR.value,
+                    melt_error,
+                    timings=timer.phases,
+                )
 
-            await self.update_mint_db(from_wallet)
-            await self.update_mint_db(to_wallet)
-            await self.bump_mint_n_melts(from_mint)
-            await self.bump_mint_n_mints(to_mint)
-            await self.store_swap_event(
-                from_mint,
-                to_mint,
-                amount,
-                (balance_before_melt - balance_after_melt) - amount,
-                time_taken_ms,
-                MintState.OK.value,
-            )
+                raise e
+            else:
+                pass
+
+        if not mint_worked:
+            try:
+                logger.info("Minting after melt succeed.")
+                with timer.phase("quote_wait"):
+                    await wait_for_mint_quote(to_wallet, mint_quote.quote)
+                with timer.phase("mint"):
+                    proofs = await to_wallet.mint(amount, mint_quote.quote)
+                logger.info(f"Minted {sum_proofs(proofs)} sat to {to_mint.url}")
+            except Exception as e:
+                logger.error(f"Error minting: {e}")
+                # the invoice is paid, resume_task mints it
+                await self.journal(
+                    journal_id, SwapJournalState.MELTED, error=sanitize_err(e)
+                )
+                await self.bump_mint_errors(to_mint.id)
+                raise e
 
-            await self.update_mint_balance(from_mint)
-            await self.update_mint_balance(to_mint)
+        await self.store_swap_outcome(
+            from_mint,
+            from_wallet,
+            to_mint,
+            to_wallet,
+            amount,
+            (balance_before_melt - balance_after_melt) - amount,
+            time_taken_ms,
+            MintState.OK.value,
+            timings=timer.phases,
+        )
+        await self.journal(journal_id, SwapJournalState.MINTED)
 
-            logger.success(
-                f"Swap from {from_mint.url} to {to_mint.url} of {amount} sat successful."
-            )
+        logger.success(
+            f"Swap from {from_mint.url} to {to_mint.url} of {amount} sat successful."
+        )
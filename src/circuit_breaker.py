@@ -0,0 +1,66 @@
+"""
+CircuitBreaker: Keeps failing mints out of swaps, with exponential backoff.
+
+The circuit of a mint is derived from its row, so it survives restarts:
+
+* CLOSED: the mint is not in ERROR state, or its `next_update` is empty.
+* OPEN: the mint failed and `next_update` lies in the future. Swap
+  selection skips it.
+* HALF_OPEN: `next_update` has passed. The auditor probes the mint's
+  `/v1/info`; success closes the circuit, failure opens it again for twice
+  the previous backoff.
+
+A successful swap closes the circuits of both mints. The number of
+consecutive failures is kept in memory, after a restart the backoff of an
+open mint starts over from BREAKER_BASE_BACKOFF once it fails again.
+"""
+
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Optional
+
+from .models import Mint
+from .schemas import CircuitState, MintState
+
+BREAKER_BASE_BACKOFF = float(os.environ.get("AUDITOR_BREAKER_BASE_BACKOFF", 60))  # s
+BREAKER_MAX_BACKOFF = float(os.environ.get("AUDITOR_BREAKER_MAX_BACKOFF", 6 * 60 * 60))
+BREAKER_PROBE_INTERVAL = float(os.environ.get("AUDITOR_BREAKER_PROBE_INTERVAL", 30))
+BREAKER_PROBE_TIMEOUT = float(os.environ.get("AUDITOR_BREAKER_PROBE_TIMEOUT", 5))
+
+
+def circuit_state(mint: Mint, now: Optional[datetime] = None) -> CircuitState:
+    if mint.state != MintState.ERROR.value or mint.next_update is None:
+        return CircuitState.CLOSED
+    if mint.next_update > (now or datetime.utcnow()):
+        return CircuitState.OPEN
+    return CircuitState.HALF_OPEN
+
+
+class CircuitBreaker:
+    def __init__(
+        self, base: float = BREAKER_BASE_BACKOFF, maximum: float = BREAKER_MAX_BACKOFF
+    ):
+        self.base = base
+        self.maximum = maximum
+        # consecutive failures per mint id
+        self.failures: dict[int, int] = {}
+
+    def allows(self, mint: Mint) -> bool:
+        """Whether the mint may be selected for a swap."""
+        return circuit_state(mint) == CircuitState.CLOSED
+
+    def backoff(self, mint_id: int) -> float:
+        failures = self.failures.get(mint_id, 1)
+        backoff = min(self.base * 2 ** (failures - 1), self.maximum)
+        # jitter spreads the probes of mints that failed together
+        return random.uniform(backoff / 2, backoff)
+
+    def trip(self, mint_id: int) -> datetime:
+        """Record a failure, returns the `next_update` until which the circuit is open."""
+        self.failures[mint_id] = self.failures.get(mint_id, 0) + 1
+        return datetime.utcnow() + timedelta(seconds=self.backoff(mint_id))
+
+    def reset(self, mint_id: int):
+        """Record a success, the circuit is closed by clearing `next_update`."""
+        self.failures.pop(mint_id, None)
@@ -0,0 +1,53 @@
+"""
+Conditional GET support for the read endpoints.
+
+ETags are derived from data versions the process already knows, the id of
+the last stored swap and the mint registry version, so a request with a
+matching `If-None-Match` is answered with 304 before any query runs. The
+ETags are weak: the same tag covers the identity, gzip and br encodings of
+a response, which a strong validator must not.
+"""
+
+import hashlib
+import os
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+# Cache-Control of the read endpoints, lets a CDN serve and revalidate them
+CACHE_CONTROL = os.environ.get(
+    "AUDITOR_CACHE_CONTROL", "public, max-age=30, stale-while-revalidate=300"
+)
+
+
+def make_etag(request: Request, *version: Any) -> str:
+    """Weak ETag of the requested path and query at the given data version."""
+    raw = "|".join(
+        [request.url.path, request.url.query, *(str(part) for part in version)]
+    )
+    return f'W/"{hashlib.sha256(raw.encode()).hexdigest()[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+
+def set_headers(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """Return a 304 response if the client already has the current version."""
+    if not etag_matches(request, etag):
+        return None
+    response = Response(status_code=304)
+    set_headers(response, etag)
+    return response
@@ -1,15 +1,76 @@
+import os
+
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-DATABASE_URL = "sqlite+aiosqlite:///./mints.db"
+# The database can be configured with a full SQLAlchemy URL of a SQLite
+# database or a path to a SQLite file. Relative paths are resolved against the working directory.
+DATABASE_PATH = os.path.abspath(os.environ.get("AUDITOR_DATABASE_PATH", "mints.db"))
+DATABASE_URL = os.environ.get(
+    "AUDITOR_DATABASE_URL", f"sqlite+aiosqlite:///{DATABASE_PATH}"
+)
+# Synchronous URL for alembic migrations
+MIGRATIONS_URL = DATABASE_URL.replace("+aiosqlite", "+pysqlite")
+
+SQLITE_JOURNAL_MODE = os.environ.get("AUDITOR_DB_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.environ.get("AUDITOR_DB_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT = int(os.environ.get("AUDITOR_DB_BUSY_TIMEOUT", 5000))  # ms
+SQLITE_CACHE_SIZE = int(os.environ.get("AUDITOR_DB_CACHE_SIZE", -16000))  # KiB if < 0
+WRITE_POOL_SIZE = int(os.environ.get("AUDITOR_DB_WRITE_POOL_SIZE", 1))
+READ_POOL_SIZE = int(os.environ.get("AUDITOR_DB_READ_POOL_SIZE", 8))
+
+if not DATABASE_URL.startswith("sqlite"):
+    # the swap rollups behind /stats/ and /graph/ are kept up to date by SQLite
+    # triggers, on other backends they would silently stay empty
+    raise ValueError(
+        f"Unsupported database URL {DATABASE_URL!r}, only SQLite databases are supported"
+    )
+
+
+def _set_sqlite_pragmas(read_only: bool):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT}")
+        cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    return on_connect
 
-engine = create_async_engine(DATABASE_URL)
+
+def create_engine(pool_size: int, read_only: bool = False):
+    kwargs = {}
+    if ":memory:" not in DATABASE_URL:
+        # SQLite allows a single writer. Writers queue on the pool instead of
+        # failing with "database is locked", readers run in parallel (WAL).
+        kwargs = dict(pool_size=pool_size, max_overflow=0 if not read_only else 4)
+    new_engine = create_async_engine(DATABASE_URL, **kwargs)
+    event.listen(new_engine.sync_engine, "connect", _set_sqlite_pragmas(read_only))
+    return new_engine
+
+
+# Engine for writes and for reads that are part of a write
+engine = create_engine(WRITE_POOL_SIZE)
+# Engine for read-only queries of the API
+read_engine = create_engine(READ_POOL_SIZE, read_only=True)
 
 AsyncSessionLocal = sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False
 )
+AsyncReadSessionLocal = sessionmaker(
+    bind=read_engine, class_=AsyncSession, expire_on_commit=False
+)
 
 
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_read_db():
+    async with AsyncReadSessionLocal() as session:
+        yield session
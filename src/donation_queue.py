@@ -0,0 +1,217 @@
+"""
+DonationQueue: Outbox of donated tokens, redeemed in the background.
+
+The API only checks a token and stores it as a QUEUED donation before it
+answers. Workers then redeem the donations: one at a time per mint, because
+a mint's wallet is held exclusively while it receives, and at most
+DONATION_WORKERS at a time across mints. Donations still outstanding when
+the process stops are requeued by `recover` on the next start; a donation
+that was being redeemed is redeemed with `resumed` set, so a token that was
+already received is recorded instead of failing as spent.
+
+Only a token that the mint rejects fails the donation. A donation that fails
+on a timeout or connection error is queued again and retried after a backoff,
+with `resumed` set.
+"""
+
+import asyncio
+import os
+import random
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+import httpx
+from loguru import logger
+from sqlalchemy import Update, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import metrics
+from .database import engine
+from .helpers import sanitize_err
+from .models import Donation
+from .schemas import DonationStatus
+
+DONATION_WORKERS = int(os.environ.get("AUDITOR_DONATION_WORKERS", 4))
+DONATION_RETRY_BASE = float(os.environ.get("AUDITOR_DONATION_RETRY_BASE", 30))  # s
+DONATION_RETRY_MAX = float(os.environ.get("AUDITOR_DONATION_RETRY_MAX", 60 * 60))
+
+# redeems the token of a donation, returns the id of the mint and the received
+# amount; the flag is set when a previous attempt may have received the token.
+# It records the donation with `mark_received` in the transaction that credits
+# the mint, so that a crash in between cannot count the donation twice.
+Redeem = Callable[[Donation, bool], Awaitable[tuple[int, int]]]
+
+
+def mark_received(donation_id: int, mint_id: int, received: int) -> Update:
+    return (
+        update(Donation)
+        .where(Donation.id == donation_id)
+        .values(
+            status=DonationStatus.RECEIVED.value,
+            received=received,
+            mint_id=mint_id,
+            token=None,
+        )
+    )
+
+
+def is_transient(e: Exception) -> bool:
+    """Whether redeeming a token that failed with `e` may succeed later."""
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code >= 500
+    return isinstance(e, (httpx.TransportError, asyncio.TimeoutError, OSError))
+
+
+class DonationQueue:
+    def __init__(
+        self,
+        redeem: Redeem,
+        workers: int = DONATION_WORKERS,
+        retry_base: float = DONATION_RETRY_BASE,
+        retry_max: float = DONATION_RETRY_MAX,
+    ):
+        self.redeem = redeem
+        self.workers = workers
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.reset()
+
+    def reset(self):
+        # ids of queued donations and the task draining them, per mint
+        self.pending: dict[str, deque[int]] = {}
+        self.tasks: dict[str, asyncio.Task] = {}
+        self.semaphore = asyncio.Semaphore(self.workers)
+        # failed attempts and scheduled retries of donations, per donation id
+        self.attempts: dict[int, int] = {}
+        self.retries: dict[int, asyncio.TimerHandle] = {}
+
+    def _enqueue(self, mint_url: str, donation_id: int):
+        self.pending.setdefault(mint_url, deque()).append(donation_id)
+        if mint_url not in self.tasks:
+            self.tasks[mint_url] = asyncio.create_task(self._drain(mint_url))
+
+    async def submit(self, token: str, mint_url: str, amount: int) -> Donation:
+        """Store a checked token in the outbox and queue it for redemption."""
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            donation = Donation(
+                token=token,
+                mint_url=mint_url,
+                amount=amount,
+                status=DonationStatus.QUEUED.value,
+            )
+            session.add(donation)
+            await session.commit()
+        self._enqueue(mint_url, donation.id)
+        logger.info(f"Queued donation {donation.id} of {amount} sat from {mint_url}")
+        return donation
+
+    async def recover(self):
+        """Requeue the donations of the outbox that were not redeemed yet."""
+        outstanding = (DonationStatus.QUEUED.value, DonationStatus.PROCESSING.value)
+        async with AsyncSession(engine) as session:
+            result = await session.execute(
+                select(Donation.id, Donation.mint_url)
+                .where(Donation.status.in_(outstanding))
+                .order_by(Donation.id)
+            )
+            donations = result.all()
+        for donation in donations:
+            self._enqueue(donation.mint_url, donation.id)
+        if donations:
+            logger.info(f"Requeued {len(donations)} outstanding donations")
+
+    async def get(self, donation_id: int) -> Optional[Donation]:
+        async with AsyncSession(engine) as session:
+            return await session.get(Donation, donation_id)
+
+    async def _drain(self, mint_url: str):
+        # runs until the mint has no queued donations, `_enqueue` starts it again
+        try:
+            queue = self.pending[mint_url]
+            while queue:
+                donation_id = queue.popleft()
+                try:
+                    async with self.semaphore:
+                        await self._process(donation_id)
+                except Exception:
+                    # the donation stays outstanding, `recover` requeues it
+                    logger.exception(f"Error processing donation {donation_id}")
+        finally:
+            self.pending.pop(mint_url, None)
+            self.tasks.pop(mint_url, None)
+
+    async def _set(self, donation_id: int, **values):
+        # a received donation has no token anymore and is never changed again
+        async with AsyncSession(engine) as session:
+            await session.execute(
+                update(Donation)
+                .where(Donation.id == donation_id, Donation.token.is_not(None))
+                .values(**values)
+            )
+            await session.commit()
+
+    def backoff(self, attempts: int) -> float:
+        backoff = min(self.retry_base * 2 ** (attempts - 1), self.retry_max)
+        return random.uniform(backoff / 2, backoff)
+
+    async def _requeue(self, donation: Donation, e: Exception):
+        attempts = self.attempts.get(donation.id, 0) + 1
+        self.attempts[donation.id] = attempts
+        delay = self.backoff(attempts)
+        logger.warning(
+            f"Error redeeming donation {donation.id}, retrying in {delay:.0f}s: {e}"
+        )
+        await self._set(
+            donation.id, status=DonationStatus.QUEUED.value, error=sanitize_err(e)
+        )
+        self.retries[donation.id] = asyncio.get_running_loop().call_later(
+            delay, self._retry, donation.mint_url, donation.id
+        )
+
+    def _retry(self, mint_url: str, donation_id: int):
+        self.retries.pop(donation_id, None)
+        self._enqueue(mint_url, donation_id)
+
+    async def _process(self, donation_id: int):
+        donation = await self.get(donation_id)
+        if donation is None or donation.token is None:
+            return
+        # an interrupted or failed attempt may have received the token already
+        resumed = (
+            donation.status == DonationStatus.PROCESSING.value
+            or donation.error is not None
+        )
+        await self._set(donation_id, status=DonationStatus.PROCESSING.value)
+        try:
+            mint_id, received = await self.redeem(donation, resumed)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if is_transient(e):
+                await self._requeue(donation, e)
+                return
+            self.attempts.pop(donation_id, None)
+            logger.error(f"Error redeeming donation {donation_id}: {e}")
+            metrics.DONATIONS.labels(DonationStatus.FAILED.value).inc()
+            await self._set(
+                donation_id, status=DonationStatus.FAILED.value, error=sanitize_err(e)
+            )
+            return
+        self.attempts.pop(donation_id, None)
+        logger.success(f"Received donation {donation_id}: {received} sat")
+        metrics.DONATIONS.labels(DonationStatus.RECEIVED.value).inc()
+
+    async def join(self):
+        """Wait until all queued donations were processed, not for scheduled retries."""
+        while self.tasks:
+            await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+
+    async def close(self):
+        # outstanding donations stay in the outbox for `recover`
+        for handle in self.retries.values():
+            handle.cancel()
+        self.retries.clear()
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,141 @@
+"""
+EventBus: In-process publish/subscribe of auditor outcomes.
+
+The auditor and the API publish typed events after their writes are
+committed. Every subscriber owns a bounded queue that is drained by its own
+task, so `publish` never waits: if a subscriber falls behind, new events for
+it are dropped and counted instead of stalling the swap loop.
+"""
+
+import asyncio
+import inspect
+import os
+from typing import Awaitable, Callable, ClassVar, Optional, Union
+
+from loguru import logger
+from pydantic import BaseModel
+
+from .schemas import MintState, MintSummary, SwapEventRead
+
+BUS_QUEUE_SIZE = int(os.environ.get("AUDITOR_BUS_QUEUE_SIZE", 1000))
+
+
+class Event(BaseModel):
+    name: ClassVar[str]
+
+
+class SwapCompleted(Event):
+    name: ClassVar[str] = "swap_completed"
+    swap: SwapEventRead
+
+
+class SwapFailed(Event):
+    name: ClassVar[str] = "swap_failed"
+    swap: SwapEventRead
+
+
+class MintStateChanged(Event):
+    name: ClassVar[str] = "mint_state_changed"
+    mint: MintSummary
+    previous_state: Optional[MintState] = None
+
+
+class BalanceUpdated(Event):
+    name: ClassVar[str] = "balance_updated"
+    mint: MintSummary
+    previous_balance: Optional[int] = None
+
+
+class DonationReceived(Event):
+    name: ClassVar[str] = "donation_received"
+    mint_id: int
+    url: str
+    amount: int
+
+
+Handler = Callable[[Event], Union[None, Awaitable[None]]]
+
+
+class Subscription:
+    def __init__(self, handler: Handler, event_types: tuple, maxsize: int):
+        self.handler = handler
+        self.event_types = event_types
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def reset(self):
+        self.queue = asyncio.Queue(maxsize=self.queue.maxsize)
+        self.task = None
+
+    def wants(self, event: Event) -> bool:
+        return not self.event_types or isinstance(event, self.event_types)
+
+    async def run(self):
+        # runs until the queue is drained, `publish` starts it again
+        while not self.queue.empty():
+            event = self.queue.get_nowait()
+            try:
+                result = self.handler(event)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Event handler {self.handler} failed on {event.name}: {e}")
+            finally:
+                self.queue.task_done()
+
+
+class EventBus:
+    def __init__(self, queue_size: int = BUS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.subscriptions: list[Subscription] = []
+
+    def subscribe(
+        self,
+        handler: Handler,
+        *event_types: type[Event],
+        maxsize: Optional[int] = None,
+    ) -> Subscription:
+        """Call `handler` for every published event of `event_types` (all if none)."""
+        subscription = Subscription(handler, event_types, maxsize or self.queue_size)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+        if subscription.task is not None:
+            subscription.task.cancel()
+
+    def publish(self, event: Event):
+        loop = asyncio.get_running_loop()
+        for subscription in self.subscriptions:
+            if not subscription.wants(event):
+                continue
+            # workers only run while their queue holds events
+            try:
+                subscription.queue.put_nowait(event)
+                if subscription.task is None or subscription.task.done():
+                    subscription.task = loop.create_task(subscription.run())
+            except asyncio.QueueFull:
+                subscription.dropped += 1
+                logger.warning(
+                    f"Dropped {event.name} for slow subscriber {subscription.handler}"
+                    f" ({subscription.dropped} dropped)."
+                )
+
+    async def join(self):
+        """Wait until all published events were handled."""
+        for subscription in list(self.subscriptions):
+            await subscription.queue.join()
+
+    def reset(self):
+        """Drop the queued events and workers of all subscriptions."""
+        for subscription in self.subscriptions:
+            subscription.reset()
+
+    async def close(self):
+        tasks = [sub.task for sub in self.subscriptions if sub.task is not None]
+        for subscription in list(self.subscriptions):
+            self.unsubscribe(subscription)
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,97 @@
+"""
+EventStream: Fan-out of swap and mint changes to Server-Sent Events clients.
+
+The stream subscribes to the auditor's event bus and forwards swap events as
+`swap` and mint state and balance changes as `mint` events.
+
+Every connected dashboard holds a bounded queue. A change is serialized once
+and put on every queue without waiting, so a slow client never stalls the
+auditor. A client whose queue is full is disconnected and reconnects (the
+browser's EventSource does that by itself) instead of silently missing events.
+"""
+
+import asyncio
+import os
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from loguru import logger
+from pydantic import BaseModel
+
+from .event_bus import (
+    BalanceUpdated,
+    Event,
+    MintStateChanged,
+    SwapCompleted,
+    SwapFailed,
+)
+
+STREAM_QUEUE_SIZE = int(os.environ.get("AUDITOR_STREAM_QUEUE_SIZE", 100))
+STREAM_KEEPALIVE = int(os.environ.get("AUDITOR_STREAM_KEEPALIVE", 15))  # seconds
+STREAM_RETRY = 5000  # ms, reconnection delay for EventSource clients
+
+
+def format_sse(event: str, data: BaseModel) -> str:
+    return f"event: {event}\ndata: {data.model_dump_json()}\n\n"
+
+
+class EventStream:
+    def __init__(
+        self, queue_size: int = STREAM_QUEUE_SIZE, keepalive: float = STREAM_KEEPALIVE
+    ):
+        self.queue_size = queue_size
+        self.keepalive = keepalive
+        self.subscribers: set[asyncio.Queue] = set()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+    def publish(self, event: str, data: BaseModel):
+        if not self.subscribers:
+            return
+        message = format_sse(event, data)
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._disconnect(queue)
+
+    def handle(self, event: Event):
+        """Forward auditor events from the event bus to the clients."""
+        if isinstance(event, (SwapCompleted, SwapFailed)):
+            self.publish("swap", event.swap)
+        elif isinstance(event, (MintStateChanged, BalanceUpdated)):
+            self.publish("mint", event.mint)
+
+    def _disconnect(self, queue: asyncio.Queue):
+        # make room for the sentinel that ends the client's stream
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+        self.unsubscribe(queue)
+        logger.warning("Disconnected slow event stream client.")
+
+    async def sse(
+        self, is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> AsyncIterator[str]:
+        """Yield Server-Sent Events until the client disconnects or falls behind."""
+        queue = self.subscribe()
+        try:
+            yield f"retry: {STREAM_RETRY}\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), self.keepalive)
+                except asyncio.TimeoutError:
+                    if is_disconnected is not None and await is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                if message is None:
+                    break
+                yield message
+        finally:
+            self.unsubscribe(queue)
@@ -0,0 +1,126 @@
+"""
+IpLocationIndex: Compact, memory-mapped index of the dbip-city IP database.
+
+The dbip CSV is converted once into a file of sorted range start and end
+arrays, a coordinate id per range and a deduplicated coordinate table.
+Adjacent ranges with the same coordinates are merged. The file is
+memory-mapped and searched with `bisect`, so loading it is instant and only
+the pages touched by lookups are read.
+
+File layout (native byte order):
+    header:    magic, version, number of ranges, number of coordinates
+    starts:    uint32[ranges]
+    ends:      uint32[ranges]
+    coord_ids: uint32[ranges]
+    coords:    float64[2 * coordinates] (latitude, longitude)
+"""
+
+import csv
+import gzip
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import Iterator, Optional, Tuple, Union
+
+from loguru import logger
+
+MAGIC = b"MLIX"
+VERSION = 1
+HEADER = struct.Struct("=4sIII")
+
+
+def _read_csv(csv_file: Path) -> Iterator[Tuple[int, int, float, float]]:
+    with gzip.open(csv_file, "rt", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if len(row) < 8:
+                continue
+            try:
+                # Dataset layout: ..., latitude, longitude, accuracy
+                latitude_str = row[-3].strip()
+                longitude_str = row[-2].strip()
+                if not latitude_str or not longitude_str:
+                    continue
+                yield int(row[0]), int(row[1]), float(latitude_str), float(longitude_str)
+            except (ValueError, IndexError) as e:
+                logger.debug(f"Skipping invalid row: {row}, error: {e}")
+
+
+def build_index(csv_file: Path, index_file: Path) -> int:
+    """Convert the gzip'd dbip CSV into an index file. Returns the number of ranges."""
+    rows = sorted(_read_csv(csv_file), key=lambda row: row[0])
+    starts, ends, coord_ids = array("I"), array("I"), array("I")
+    coords = array("d")
+    coord_table: dict[Tuple[float, float], int] = {}
+    for start, end, latitude, longitude in rows:
+        coord_id = coord_table.get((latitude, longitude))
+        if coord_id is None:
+            coord_id = coord_table[(latitude, longitude)] = len(coord_table)
+            coords.extend((latitude, longitude))
+        # merge with the previous range if it is adjacent and at the same place
+        if ends and ends[-1] + 1 == start and coord_ids[-1] == coord_id:
+            ends[-1] = end
+            continue
+        starts.append(start)
+        ends.append(end)
+        coord_ids.append(coord_id)
+
+    # write to a temporary file first, readers never see a partial index
+    tmp_file = index_file.with_name(index_file.name + ".tmp")
+    with open(tmp_file, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(starts), len(coord_table)))
+        for values in (starts, ends, coord_ids, coords):
+            values.tofile(f)
+    os.replace(tmp_file, index_file)
+    logger.info(
+        f"Built IP index with {len(starts)} ranges ({len(rows)} rows) and "
+        f"{len(coord_table)} coordinates"
+    )
+    return len(starts)
+
+
+class IpLocationIndex:
+    """Read-only view of an index file, a sequence of (start, end, lat, lon)."""
+
+    def __init__(self, index_file: Union[str, Path]):
+        with open(index_file, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n_ranges, n_coords = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"Not an IP index file of version {VERSION}: {index_file}")
+        view = memoryview(self._mmap)
+        offset = HEADER.size
+        self.starts = view[offset : offset + 4 * n_ranges].cast("I")
+        offset += 4 * n_ranges
+        self.ends = view[offset : offset + 4 * n_ranges].cast("I")
+        offset += 4 * n_ranges
+        self.coord_ids = view[offset : offset + 4 * n_ranges].cast("I")
+        offset += 4 * n_ranges
+        self.coords = view[offset : offset + 16 * n_coords].cast("d")
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, i: int) -> Tuple[int, int, float, float]:
+        coord_id = self.coord_ids[i]
+        return (
+            self.starts[i],
+            self.ends[i],
+            self.coords[2 * coord_id],
+            self.coords[2 * coord_id + 1],
+        )
+
+    def lookup(self, ip_num: int) -> Optional[Tuple[float, float]]:
+        i = bisect_right(self.starts, ip_num) - 1
+        if i < 0 or ip_num > self.ends[i]:
+            return None
+        coord_id = self.coord_ids[i]
+        return (self.coords[2 * coord_id], self.coords[2 * coord_id + 1])
+
+    def close(self):
+        for view in (self.starts, self.ends, self.coord_ids, self.coords):
+            view.release()
+        self._mmap.close()
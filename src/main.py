@@ -1,25 +1,58 @@
 # src/main.py
 
+import asyncio
 from datetime import datetime, timedelta
 import json
 import os
-from typing import List, Optional
-
-from cashu.wallet.helpers import deserialize_token_from_string
-from cashu.core.base import Token
-from fastapi import Depends, FastAPI, HTTPException, status, Query, Path
+import time
+from typing import Any, List, Optional
+
+from fastapi import (
+    Depends,
+    FastAPI,
+    HTTPException,
+    status,
+    Query,
+    Path,
+    Request,
+    Response,
+)
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from loguru import logger
-from sqlalchemy import select, desc, asc, func
+from sqlalchemy import select, func, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.middleware.cors import CORSMiddleware
 
-from . import models, schemas, auditor
-from .database import engine, get_db
+from . import (
+    models,
+    schemas,
+    auditor,
+    conditional,
+    metrics,
+    pagination,
+    projection,
+    stats,
+)
+from .database import (
+    MIGRATIONS_URL,
+    AsyncReadSessionLocal,
+    engine,
+    get_read_db,
+)
+from .donation_queue import DonationQueue, mark_received
+from .event_bus import DonationReceived
 from alembic import command
 from alembic.config import Config
 from .logging import configure_logger
 from .payment_request import PaymentRequest, PaymentPayload
 from .mint_location_resolver import MintLocationResolver
+from .response_cache import ResponseCache
+from .responses import COMPRESSION_MINIMUM_SIZE, GZIP_LEVEL
+
+# Seconds after which the ETag of /stats/ changes even without new data
+STATS_ETAG_PERIOD = 60
 
 # Base URL for the HTTP endpoint in payment requests
 BASE_URL = os.getenv("BASE_URL")
@@ -34,47 +67,116 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
 )
 
+# compresses the uncached responses, cached ones come compressed already
+app.add_middleware(
+    GZipMiddleware, minimum_size=COMPRESSION_MINIMUM_SIZE, compresslevel=GZIP_LEVEL
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Allow all origins (not recommended for production)
     allow_credentials=True,
     allow_methods=["*"],  # Allow all HTTP methods
     allow_headers=["*"],  # Allow all headers
+    expose_headers=[
+        pagination.NEXT_CURSOR_HEADER,
+        pagination.PREV_CURSOR_HEADER,
+        "ETag",
+    ],
 )
+# outermost, so that the request latency includes compression
+app.add_middleware(metrics.MetricsMiddleware)
 
 auditor = auditor.Auditor()
 location_resolver = MintLocationResolver()
+# cached /graph/, /stats/ and /mints/ responses, dropped on every auditor event
+response_cache = ResponseCache()
+auditor.events.subscribe(response_cache.invalidate)
+metrics.registry.register(metrics.MintCollector(auditor.mints))
+
 
+async def locate_mints(mint_ids: Optional[list[int]] = None, relocate: bool = False):
+    """
+    Resolve and store the locations of mints without one (all if no ids).
 
-async def resolve_mint_location(mint: models.Mint, db: AsyncSession):
-    """Resolve and update the location of a mint."""
+    With `relocate`, mints that have a location are resolved again and
+    updated if their IP, or its entry in the IP database, changed.
+    """
     # Only resolve if resolver is ready (database loaded)
     if not location_resolver.ip_ranges:
         return
-    try:
-        coords = location_resolver.resolve_mint_location(mint.url)
-        if coords:
+    query = select(
+        models.Mint.id, models.Mint.url, models.Mint.latitude, models.Mint.longitude
+    )
+    if not relocate:
+        query = query.where(
+            (models.Mint.latitude.is_(None)) | (models.Mint.longitude.is_(None))
+        )
+    if mint_ids is not None:
+        query = query.where(models.Mint.id.in_(mint_ids))
+    async with AsyncReadSessionLocal() as session:
+        mints = (await session.execute(query)).all()
+    if not mints:
+        return
+
+    locations = await location_resolver.resolve_mint_locations(
+        mint.url for mint in mints
+    )
+    located = []
+    async with AsyncSession(bind=engine) as session:
+        for mint in mints:
+            coords = locations.get(mint.url)
+            if not coords:
+                logger.warning(f"Could not resolve location for {mint.url}")
+                continue
+            if coords == (mint.latitude, mint.longitude):
+                continue
             latitude, longitude = coords
-            mint.latitude = latitude
-            mint.longitude = longitude
+            await session.execute(
+                update(models.Mint)
+                .where(models.Mint.id == mint.id)
+                .values(latitude=latitude, longitude=longitude)
+            )
+            located.append(mint.id)
             logger.info(f"Resolved location for {mint.url}: ({latitude}, {longitude})")
-        else:
-            logger.warning(f"Could not resolve location for {mint.url}")
-    except Exception as e:
-        logger.error(f"Error resolving location for {mint.url}: {e}")
+        await session.commit()
+    if located:
+        await auditor.mints.refresh(located)
+        response_cache.invalidate()
+    logger.info(f"Resolved locations for {len(located)} mints")
+
+
+async def relocate_mints():
+    await locate_mints(relocate=True)
+
+
+async def locate_donating_mint(event: DonationReceived):
+    await locate_mints([event.mint_id])
+
+
+# locations are resolved in the background, never in the donation request
+auditor.events.subscribe(locate_donating_mint, DonationReceived)
+background_tasks: set[asyncio.Task] = set()
+
+
+def run_in_background(coro):
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
 
 
 @app.on_event("startup")
 async def startup():
     """
-    Startup event to create database tables and load all Mints into memory.
+    Startup event to create database tables and load all Mints into the registry.
     """
     configure_logger()
 
     os.chdir("src")
     alembic_cfg = Config("alembic.ini")
+    alembic_cfg.set_main_option("sqlalchemy.url", MIGRATIONS_URL)
     command.upgrade(alembic_cfg, "head")
     os.chdir("..")
 
@@ -87,49 +189,44 @@ async def startup():
     except Exception as e:
         logger.error(f"Error initializing location resolver: {e}")
 
-    async with AsyncSession(bind=engine) as session:
-        result = await session.execute(select(models.Mint))
-        mints = result.scalars().all()
-        app.state.mints_cache = {mint.id: mint for mint in mints}
-    print(f"Loaded {len(app.state.mints_cache)} mints into the in-memory cache.")
+    await auditor.mints.load()
+    await auditor.load_last_swap_id()
+    # opens (and migrates) the wallet database before any donation worker runs
+    await auditor.init_wallet()
+    await donation_queue.recover()
 
     # Resolve locations for all existing mints (only if resolver is ready)
     if resolver_ready:
-        async with AsyncSession(bind=engine) as session:
-            result = await session.execute(select(models.Mint))
-            mints = result.scalars().all()
-            resolved_count = 0
-            for mint in mints:
-                # Only resolve if location is not already set
-                if mint.latitude is None or mint.longitude is None:
-                    await resolve_mint_location(mint, session)
-                    if mint.latitude is not None and mint.longitude is not None:
-                        resolved_count += 1
-            await session.commit()
-            logger.info(f"Resolved locations for {resolved_count} mints")
-
-    await auditor.init_wallet()
-
-
-async def receive_token(token: str, db: AsyncSession) -> models.Mint:
-    try:
+        run_in_background(locate_mints())
+    # weekly IP database updates, mints are located again after each
+    run_in_background(location_resolver.run_updates(on_update=relocate_mints))
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await donation_queue.close()
+    await auditor.events.close()
+
+
+async def redeem_donation(
+    donation: models.Donation, resumed: bool = False
+) -> tuple[int, int]:
+    """Receive a donated token and record it on its mint, run by donation_queue."""
+    token = donation.token
+    received = None
+    if resumed:
+        # the previous run may have received the token before it stopped
+        received = await auditor.recover_received_token(token)
+    if received is None:
         received = await auditor.receive_token(token)
-        logger.success(f"Received {received}.")
-    except Exception as e:
-        logger.error(f"Error receiving token: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Error receiving token: {e}",
-        )
-    if received == 0:
-        logger.error(f"Received {received}.")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Received {received}.",
-        )
-    try:
-        token_obj: Token = deserialize_token_from_string(token)
-        mint_url = token_obj.mint.rstrip("/")
+    logger.success(f"Received {received.amount}.")
+    if received.amount == 0:
+        raise ValueError(f"Received {received.amount}.")
+    mint_url = auditor.parse_token(token).mint.rstrip("/")
+    async with AsyncSession(engine, expire_on_commit=False) as db:
         result = await db.execute(
             select(models.Mint).where(models.Mint.url == mint_url)
         )
@@ -137,23 +234,20 @@ async def receive_token(token: str, db: AsyncSession) -> models.Mint:
         logger.info(f"Mint: {mint}")
         if mint:
             # Update Existing Mint
-            mint.balance = auditor.wallet.available_balance.amount
-            mint.sum_donations += received.amount
-            mint.next_update = datetime.utcnow() + timedelta(minutes=1)
-            mint.info = json.dumps(auditor.wallet.mint_info.dict())
+            mint.balance = received.balance.amount
+            mint.sum_donations += received.amount.amount
+            # next_update is left alone, it holds the backoff of an open circuit
+            mint.info = json.dumps(received.mint_info.dict())
             logger.info(f"Updated existing mint: {mint.url}")
             logger.info(f"Balance: {mint.balance}, Sum donations: {mint.sum_donations}")
-            # Resolve location if not already set
-            if mint.latitude is None or mint.longitude is None:
-                await resolve_mint_location(mint, db)
         else:
             # Create New Mint
             mint = models.Mint(
-                name=auditor.wallet.mint_info.name,
+                name=received.mint_info.name,
                 url=mint_url,
-                info=json.dumps(auditor.wallet.mint_info.dict()),
-                balance=auditor.wallet.available_balance.amount,
-                sum_donations=auditor.wallet.available_balance.amount,
+                info=json.dumps(received.mint_info.dict()),
+                balance=received.balance.amount,
+                sum_donations=received.balance.amount,
                 updated_at=datetime.utcnow(),
                 next_update=datetime.utcnow() + timedelta(minutes=1),
                 state=schemas.MintState.UNKNOWN.value,
@@ -163,217 +257,332 @@ async def receive_token(token: str, db: AsyncSession) -> models.Mint:
             )
             logger.info(f"Added new mint: {mint.url}")
             db.add(mint)
-            # Resolve location for new mint
-            await resolve_mint_location(mint, db)
-
+            await db.flush()
+        await db.execute(
+            mark_received(donation.id, mint.id, received.amount.amount)
+        )
         await db.commit()
-        await db.refresh(mint)
-        db.expunge(mint)
 
-        return mint
+    await auditor.mints.refresh([mint.id])
+    # also resolves the location of the mint in the background
+    auditor.events.publish(
+        DonationReceived(mint_id=mint.id, url=mint.url, amount=received.amount.amount)
+    )
+    return mint.id, received.amount.amount
 
-    except Exception as e:
-        logger.error(f"Error in receive_token: {e}")
-        await db.rollback()
-        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+# donated tokens are stored and acknowledged first, then redeemed in the background
+donation_queue = DonationQueue(redeem_donation)
+
+
+async def queue_donation(token: str) -> models.Donation:
+    """Check a token and queue it for redemption, 400 if it is not acceptable."""
+    try:
+        token_obj = auditor.parse_token(token)
+    except ValueError as e:
+        logger.error(f"Error receiving token: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error receiving token: {e}",
+        )
+    if token_obj.amount <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Received {token_obj.amount}.",
+        )
+    return await donation_queue.submit(
+        token, mint_url=token_obj.mint.rstrip("/"), amount=token_obj.amount
+    )
 
 
 @app.post(
     "/mints/",
-    response_model=schemas.MintRead,
-    status_code=status.HTTP_201_CREATED,
+    response_model=schemas.DonationRead,
+    status_code=status.HTTP_202_ACCEPTED,
     summary="Create a new mint",
-    description="Creates a new mint by receiving a Cashu token. The token is validated and processed, and the mint information is stored in the database.",
+    description="Creates or updates a mint by donating a Cashu token. The token is checked and queued, and received in the background. Poll the returned donation at /donations/{donation_id}; once it is RECEIVED, `mint_id` is the mint it was donated to.",
     responses={
-        201: {"description": "Mint successfully created"},
-        400: {"description": "Invalid token or received 0 units"},
-        500: {"description": "Internal server error"},
+        202: {"description": "Token accepted and queued"},
+        400: {"description": "Invalid token or 0 units"},
     },
 )
-async def create_mint(
-    charge_request: schemas.ChargeRequest, db: AsyncSession = Depends(get_db)
-):
-    try:
-        new_mint = await receive_token(charge_request.token, db)
-    except HTTPException as e:
-        raise e
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error submitting token: {e}.",
-        )
+async def create_mint(charge_request: schemas.ChargeRequest, response: Response):
+    donation = await queue_donation(charge_request.token)
+    response.headers["Location"] = f"/donations/{donation.id}"
+    return donation
 
-    return new_mint
+
+@app.get(
+    "/donations/{donation_id}",
+    response_model=schemas.DonationRead,
+    summary="Get donation status",
+    description="Retrieves the status of a donation submitted to POST /mints/ or /donate.",
+    responses={
+        200: {"description": "Donation status"},
+        404: {"description": "Donation not found"},
+    },
+)
+async def read_donation(
+    donation_id: int = Path(..., description="The ID of the donation"),
+):
+    donation = await donation_queue.get(donation_id)
+    if donation is None:
+        raise HTTPException(status_code=404, detail="Donation not found")
+    return donation
 
 
 @app.get(
     "/mints/url",
     response_model=schemas.MintRead,
     summary="Get mint by URL",
-    description="Retrieves a specific mint by its URL. Returns 404 if the mint is not found.",
+    description="Retrieves a specific mint by its URL. Returns 404 if the mint is not found. Use `fields` or `exclude` (comma-separated) to select the returned fields.",
     responses={
         200: {"description": "Mint found and returned"},
+        400: {"description": "Unknown fields"},
         404: {"description": "Mint not found"},
     },
 )
 async def get_mint(
     url: str = Query(..., description="The URL of the mint to retrieve"),
-    db: AsyncSession = Depends(get_db),
+    selection: schemas.MintProjectionParams = Depends(),
 ):
     """Endpoint to retrieve a Mint by its URL."""
-    result = await db.execute(select(models.Mint).where(models.Mint.url == url))
-    mint = result.scalars().first()
+    fields = parse_mint_fields(selection, projection.MINT_FIELDS)
+    mint = await auditor.mints.get_by_url(url)
     if mint is None:
         raise HTTPException(status_code=404, detail="Mint not found")
-    return mint
+    return await read_projected_mint(mint, fields)
 
 
 @app.get(
     "/mints/",
-    response_model=List[schemas.MintRead],
+    response_model=List[schemas.MintSummary],
     summary="List all mints",
-    description="Retrieves a paginated list of all mints in the system. Use skip and limit parameters for pagination.",
-    responses={200: {"description": "List of mints retrieved successfully"}},
+    description="Retrieves a paginated list of all mints in the system. Use skip and limit parameters for pagination. Returns mint summaries without `info` unless it is requested with `fields`.",
+    responses={
+        200: {"description": "List of mints retrieved successfully"},
+        400: {"description": "Unknown fields"},
+    },
 )
 async def read_mints(
-    params: schemas.PaginationParams = Depends(), db: AsyncSession = Depends(get_db)
+    request: Request,
+    params: schemas.PaginationParams = Depends(),
+    selection: schemas.MintProjectionParams = Depends(),
 ):
     """
     Endpoint to retrieve a list of all Mints.
     Supports pagination with `skip` and `limit` query parameters.
     """
-    query = select(models.Mint).offset(params.skip)
-    query = query.limit(params.limit)
-    result = await db.execute(query)
-    mints = result.scalars().all()
-    return mints
+    fields = parse_mint_fields(selection, projection.SUMMARY_FIELDS)
+    await auditor.mints.ensure_loaded()
+    version = (auditor.mints.version,)
+    etag = conditional.make_etag(request, *version)
+    if not_modified := conditional.not_modified(request, etag):
+        return not_modified
+
+    async def compute():
+        return await projection.read_mints(
+            auditor.mints, fields, params.skip, params.limit
+        )
+
+    key = f"mints:{params.skip}:{params.limit}:{','.join(fields)}"
+    return await response_cache.response(
+        request, key, compute, List[dict[str, Any]], version
+    )
 
 
 @app.get(
     "/mints/{mint_id}",
     response_model=schemas.MintRead,
     summary="Get mint by ID",
-    description="Retrieves a specific mint by its ID. Returns 404 if the mint is not found.",
+    description="Retrieves a specific mint by its ID. Returns 404 if the mint is not found. Use `fields` or `exclude` (comma-separated) to select the returned fields.",
     responses={
         200: {"description": "Mint found and returned"},
+        400: {"description": "Unknown fields"},
         404: {"description": "Mint not found"},
     },
 )
 async def read_mint(
     mint_id: int = Path(..., description="The ID of the mint to retrieve"),
-    db: AsyncSession = Depends(get_db),
+    selection: schemas.MintProjectionParams = Depends(),
 ):
     """
     Endpoint to retrieve a single Mint by its ID.
     """
-    result = await db.execute(select(models.Mint).where(models.Mint.id == mint_id))
-    mint = result.scalars().first()
+    fields = parse_mint_fields(selection, projection.MINT_FIELDS)
+    mint = await auditor.mints.get(mint_id)
     if mint is None:
         raise HTTPException(status_code=404, detail="Mint not found")
-    return mint
+    return await read_projected_mint(mint, fields)
+
+
+def parse_mint_fields(
+    selection: schemas.MintProjectionParams, default: tuple[str, ...]
+) -> list[str]:
+    try:
+        return projection.parse_fields(selection.fields, selection.exclude, default)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+async def read_projected_mint(mint: models.Mint, fields: list[str]) -> ORJSONResponse:
+    projected = await projection.read_mint(mint, fields)
+    if projected is None:
+        raise HTTPException(status_code=404, detail="Mint not found")
+    return ORJSONResponse(projected)
 
 
 @app.get(
     "/swaps/",
     response_model=List[schemas.SwapEventRead],
     summary="List all swaps",
-    description="Retrieves a paginated list of all swap events in the system, ordered by creation date (newest first).",
-    responses={200: {"description": "List of swaps retrieved successfully"}},
+    description="Retrieves a paginated list of all swap events in the system, ordered by creation date (newest first). Pass the `X-Next-Cursor` response header as `before` to load older swaps, or the `X-Prev-Cursor` header as `after` to load newer ones.",
+    responses={
+        200: {"description": "List of swaps retrieved successfully"},
+        400: {"description": "Invalid cursor"},
+    },
 )
 async def read_swaps(
-    params: schemas.PaginationParams = Depends(), db: AsyncSession = Depends(get_db)
+    request: Request,
+    response: Response,
+    params: schemas.PaginationParams = Depends(),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Endpoint to retrieve a list of all Swaps.
-    Supports pagination with `skip` and `limit` query parameters.
+    Supports pagination with `skip` and `limit` or the `before` and `after` cursors.
     """
-    result = await db.execute(
-        select(models.SwapEvent)
-        .order_by(desc(models.SwapEvent.created_at))
-        .offset(params.skip)
-        .limit(params.limit)
-    )
-    swaps = result.scalars().all()
-    return swaps
+    # stored swaps never change, only new ones are added
+    etag = conditional.make_etag(request, auditor.last_swap_id)
+    if not_modified := conditional.not_modified(request, etag):
+        return not_modified
+    conditional.set_headers(response, etag)
+    try:
+        query = pagination.paginate_swaps(select(models.SwapEvent), params)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    result = await db.execute(query)
+    return pagination.page_swaps(result.scalars().all(), params, response)
 
 
 @app.get(
     "/swaps/mint/{mint_id}",
     response_model=List[schemas.SwapEventRead],
     summary="List swaps for a specific mint",
-    description="Retrieves a paginated list of swap events for a specific mint. Can filter by whether the mint was the source or destination of the swap.",
-    responses={200: {"description": "List of swaps retrieved successfully"}},
+    description="Retrieves a paginated list of swap events for a specific mint. Can filter by whether the mint was the source or destination of the swap. Supports the same cursors as `/swaps/`.",
+    responses={
+        200: {"description": "List of swaps retrieved successfully"},
+        400: {"description": "Invalid cursor"},
+    },
 )
 async def read_swaps_mint(
+    request: Request,
+    response: Response,
     mint_id: int = Path(..., description="The ID of the mint to filter swaps by"),
     params: schemas.PaginationParams = Depends(),
     received: Optional[bool] = Query(
         None,
         description="If True, shows swaps where the mint was the destination. If False, shows swaps where the mint was the source.",
     ),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Endpoint to retrieve a list of Swaps for a specific Mint.
-    Supports pagination with `skip` and `limit` query parameters.
+    Supports pagination with `skip` and `limit` or the `before` and `after` cursors.
     """
-    result = await db.execute(
-        select(models.SwapEvent)
-        .order_by(desc(models.SwapEvent.created_at))
-        .offset(params.skip)
-        .limit(params.limit)
-        .where(
-            models.SwapEvent.from_id == mint_id
-            if not received
-            else models.SwapEvent.to_id == mint_id
-        )
+    etag = conditional.make_etag(request, auditor.last_swap_id)
+    if not_modified := conditional.not_modified(request, etag):
+        return not_modified
+    conditional.set_headers(response, etag)
+    query = select(models.SwapEvent).where(
+        models.SwapEvent.from_id == mint_id
+        if not received
+        else models.SwapEvent.to_id == mint_id
     )
-    swaps = result.scalars().all()
-    return swaps
+    try:
+        query = pagination.paginate_swaps(query, params)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    result = await db.execute(query)
+    return pagination.page_swaps(result.scalars().all(), params, response)
+
+
+@app.get(
+    "/swaps/{swap_id}/timings",
+    response_model=schemas.SwapTimingsRead,
+    summary="Get phase timings of a swap",
+    description="Retrieves the duration in milliseconds of each phase of a swap: loading both mints, requesting the invoice, the melt quote, selecting the proofs, the melt, waiting for the invoice to be paid and the mint. Phases the swap did not reach are null.",
+    responses={
+        200: {"description": "Timings retrieved successfully"},
+        404: {"description": "No timings recorded for this swap"},
+    },
+)
+async def read_swap_timings(
+    swap_id: int = Path(..., description="The ID of the swap"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Endpoint to retrieve the phase timings of a swap."""
+    timings = await db.get(models.SwapTimings, swap_id)
+    if timings is None:
+        raise HTTPException(status_code=404, detail="Swap timings not found")
+    return timings
 
 
 @app.get(
     "/graph/",
     response_model=schemas.MintGraph,
     summary="Get mint graph",
-    description="Retrieves a graph representation of all mints and their relationships through swaps. Returns nodes (mints) and edges (swaps) with aggregated information.",
+    description="Retrieves a graph representation of all mints and their relationships through swaps. Returns nodes (mints) and edges (swaps) with aggregated information. Use `since` to only aggregate swaps created after the given time, rounded down to the full hour.",
     responses={200: {"description": "Graph data retrieved successfully"}},
 )
-async def read_mint_graph(db: AsyncSession = Depends(get_db)):
+async def read_mint_graph(
+    request: Request,
+    since: Optional[datetime] = Query(
+        None,
+        description="Only aggregate swaps created after this time (UTC), rounded down to the hour",
+    ),
+):
     """
     Endpoint to retrieve a graph of all Mints and Swaps.
     """
-    result = await db.execute(select(models.Mint))
-    mints = result.scalars().all()
-    mints = [schemas.MintRead.model_validate(mint) for mint in mints]
-    for mint in mints:
-        mint.info = ""
-    result = await db.execute(
-        select(models.SwapEvent).order_by(asc(models.SwapEvent.created_at))
+    if since is not None:
+        # one cache entry per hour, not per client supplied timestamp
+        since = stats.floor_hour(since)
+    await auditor.mints.ensure_loaded()
+    version = (auditor.mints.version, auditor.last_swap_id)
+    etag = conditional.make_etag(request, *version)
+    if not_modified := conditional.not_modified(request, etag):
+        return not_modified
+
+    async def compute():
+        mints = await auditor.mints.all()
+        mints = [schemas.MintSummary.model_validate(mint) for mint in mints]
+        async with AsyncReadSessionLocal() as db:
+            edges = await stats.swap_edges(db, since=since)
+        return schemas.MintGraph(nodes=mints, edges=edges)
+
+    key = f"graph:{since.isoformat() if since else ''}"
+    return await response_cache.response(
+        request, key, compute, schemas.MintGraph, version
+    )
+
+
+@app.get(
+    "/events",
+    summary="Stream swap and mint changes",
+    description="Server-Sent Events stream of new swaps (`swap` events, a SwapEventRead) and mint changes (`mint` events, a MintSummary) as the auditor produces them. Clients that fall behind are disconnected and should reconnect and reload.",
+    response_class=StreamingResponse,
+    responses={200: {"description": "Event stream opened", "content": {"text/event-stream": {}}}},
+)
+async def stream_events(request: Request):
+    """
+    Endpoint to stream swap and mint changes to dashboards instead of polling.
+    """
+    return StreamingResponse(
+        auditor.stream.sse(request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    swaps = result.scalars().all()
-    # reduce all swaps to edges with unique from_id, to_id pairs and aggregated total_amount, total_fee, and count
-    edges = {}
-    for swap in swaps:
-        key = (swap.from_id, swap.to_id)
-        if key in edges:
-            edges[key]["count"] += 1
-            edges[key]["total_amount"] += swap.amount
-            edges[key]["total_fee"] += swap.fee
-            edges[key]["last_swap"] = max(edges[key]["last_swap"], swap.created_at)
-            edges[key]["state"] = schemas.MintState(swap.state)
-        else:
-            edges[key] = {
-                "from_id": swap.from_id,
-                "to_id": swap.to_id,
-                "count": 1,
-                "total_amount": swap.amount,
-                "total_fee": swap.fee,
-                "last_swap": swap.created_at,
-                "state": schemas.MintState(swap.state),
-            }
-    edges_list = list(edges.values())
-    return schemas.MintGraph(nodes=mints, edges=edges_list)
 
 
 @app.get(
@@ -386,62 +595,118 @@ async def read_mint_graph(db: AsyncSession = Depends(get_db)):
         500: {"description": "Internal server error"},
     },
 )
-async def get_service_stats(db: AsyncSession = Depends(get_db)):
+async def get_service_stats(request: Request):
     """Endpoint to retrieve service statistics."""
-    try:
-        # Total balance
-        result = await db.execute(select(func.sum(models.Mint.balance)))
-        total_balance = result.scalar() or 0
-
-        # Total swaps
-        result = await db.execute(select(func.count(models.SwapEvent.id)))
-        total_swaps = result.scalar() or 0
-
-        # Swaps in the last 24 hours
-        last_24h = datetime.utcnow() - timedelta(hours=24)
-        result = await db.execute(
-            select(func.count(models.SwapEvent.id)).where(
-                models.SwapEvent.created_at >= last_24h
+    await auditor.mints.ensure_loaded()
+    # the 24h window moves without writes, the ETag changes every period
+    period = int(time.time() // STATS_ETAG_PERIOD)
+    version = (auditor.mints.version, auditor.last_swap_id, period)
+    etag = conditional.make_etag(request, *version)
+    if not_modified := conditional.not_modified(request, etag):
+        return not_modified
+
+    async def compute():
+        async with AsyncReadSessionLocal() as db:
+            # Total balance
+            result = await db.execute(select(func.sum(models.Mint.balance)))
+            total_balance = result.scalar() or 0
+
+            # Swap totals from the hourly rollup
+            all_time = await stats.swap_stats(db)
+            last_24h = await stats.swap_stats(
+                db, since=datetime.utcnow() - timedelta(hours=24)
             )
-        )
-        total_swaps_24h = result.scalar() or 0
-
-        # Total amount swapped
-        result = await db.execute(select(func.sum(models.SwapEvent.amount)))
-        total_amount_swapped = result.scalar() or 0
-
-        # Amount swapped in the last 24 hours
-        result = await db.execute(
-            select(func.sum(models.SwapEvent.amount)).where(
-                models.SwapEvent.created_at >= last_24h
-            )
-        )
-        total_amount_swapped_24h = result.scalar() or 0
-
-        # Average swap time
-        result = await db.execute(select(func.avg(models.SwapEvent.time_taken)))
-        average_swap_time = result.scalar() or 0
-
-        # Average swap time in the last 24 hours
-        result = await db.execute(
-            select(func.avg(models.SwapEvent.time_taken)).where(
-                models.SwapEvent.created_at >= last_24h
-            )
-        )
-        average_swap_time_24h = result.scalar() or 0
 
         return schemas.MintStats(
             total_balance=total_balance,
-            total_swaps=total_swaps,
-            total_swaps_24h=total_swaps_24h,
-            total_amount_swapped=total_amount_swapped,
-            total_amount_swapped_24h=total_amount_swapped_24h,
-            average_swap_time=average_swap_time,
-            average_swap_time_24h=average_swap_time_24h,
+            total_swaps=all_time.count,
+            total_swaps_24h=last_24h.count,
+            total_amount_swapped=all_time.amount,
+            total_amount_swapped_24h=last_24h.amount,
+            average_swap_time=all_time.average_time,
+            average_swap_time_24h=last_24h.average_time,
+        )
+
+    try:
+        response = await response_cache.response(
+            request, "stats", compute, schemas.MintStats, version
         )
     except Exception as e:
         logger.error(f"Error fetching service statistics: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
+    return response
+
+
+@app.get(
+    "/stats/cache",
+    response_model=schemas.CacheStats,
+    summary="Get response cache statistics",
+    description="Retrieves the hit, stale hit, miss and coalesced request counters of the response cache of `/graph/`, `/stats/` and `/mints/`.",
+    responses={200: {"description": "Cache statistics retrieved successfully"}},
+)
+async def get_cache_stats():
+    """Endpoint to retrieve the response cache counters."""
+    return schemas.CacheStats(**response_cache.stats())
+
+
+@app.get(
+    "/stats/mint/{mint_id}",
+    response_model=schemas.MintSwapStats,
+    summary="Get swap statistics of a mint",
+    description="Retrieves statistics of the swaps sent by a specific mint for the last 1h, 24h, 7d and 30d.",
+    responses={
+        200: {"description": "Statistics retrieved successfully"},
+        404: {"description": "Mint not found"},
+    },
+)
+async def get_mint_stats(
+    mint_id: int = Path(..., description="The ID of the mint"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Endpoint to retrieve the swap statistics of a mint per time window."""
+    if await auditor.mints.get(mint_id) is None:
+        raise HTTPException(status_code=404, detail="Mint not found")
+    now = datetime.utcnow()
+    windows = {
+        name: await stats.swap_stats(db, since=now - window, mint_id=mint_id)
+        for name, window in stats.WINDOWS.items()
+    }
+    return schemas.MintSwapStats(mint_id=mint_id, windows=windows)
+
+
+@app.get(
+    "/stats/mint/{mint_id}/timings",
+    response_model=schemas.MintSwapTimings,
+    summary="Get swap phase timings of a mint",
+    description="Retrieves the count, average, minimum and maximum duration in milliseconds of each swap phase that talks to a specific mint, separately for the swaps it sent and received. Use `since` to only aggregate swaps created after the given time.",
+    responses={
+        200: {"description": "Timings retrieved successfully"},
+        404: {"description": "Mint not found"},
+    },
+)
+async def get_mint_timings(
+    mint_id: int = Path(..., description="The ID of the mint"),
+    since: Optional[datetime] = Query(
+        None, description="Only aggregate swaps created after this time (UTC)"
+    ),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Endpoint to retrieve the swap phase timings of a mint."""
+    if await auditor.mints.get(mint_id) is None:
+        raise HTTPException(status_code=404, detail="Mint not found")
+    return await stats.swap_timings(db, mint_id, since=since)
+
+
+@app.get(
+    "/metrics",
+    summary="Get Prometheus metrics",
+    description="Exposes swap phase latencies per mint, swap, donation and error recovery counters, mint balances, running swaps and API request latencies per route in the Prometheus text format.",
+    response_class=Response,
+    responses={200: {"description": "Metrics in the Prometheus text format", "content": {"text/plain": {}}}},
+)
+async def get_metrics():
+    """Endpoint for Prometheus to scrape."""
+    return Response(generate_latest(metrics.registry), media_type=CONTENT_TYPE_LATEST)
 
 
 @app.get(
@@ -473,14 +738,13 @@ async def get_payment_request(
 @app.post(
     "/donate",
     summary="Receive donation",
-    description="Endpoint to receive a Cashu payment as per NUT-18. Processes the donation payment and updates the corresponding mint information.",
+    description="Endpoint to receive a Cashu payment as per NUT-18. The token is checked and queued, and received in the background. The returned `donation_id` can be polled at /donations/{donation_id}.",
     responses={
-        200: {"description": "Donation processed successfully"},
+        200: {"description": "Donation accepted and queued"},
         400: {"description": "Invalid token format"},
-        500: {"description": "Internal server error"},
     },
 )
-async def receive_donation(payload: PaymentPayload, db: AsyncSession = Depends(get_db)):
+async def receive_donation(payload: PaymentPayload):
     """
     Endpoint to receive a Cashu payment as per NUT-18.
     This endpoint is called by the sender wallet to complete the donation.
@@ -488,13 +752,16 @@ async def receive_donation(payload: PaymentPayload, db: AsyncSession = Depends(g
     logger.info(f"Received donation payment payload: {payload}")
     try:
         token = payload.to_tokenv4().serialize()
-        print(f"Received token: {token}")
-        await receive_token(token, db)
     except Exception as e:
         logger.error(f"Error parsing token: {e}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid token format",
         )
+    donation = await queue_donation(token)
 
-    return {"status": "success", "message": "Donation received"}
+    return {
+        "status": "success",
+        "message": "Donation received",
+        "donation_id": donation.id,
+    }
@@ -0,0 +1,136 @@
+"""
+Prometheus metrics of the auditor and the API, served at `/metrics`.
+
+Metrics live in their own registry. Counters and histograms are updated where
+the events happen; mint balances are read from the MintRegistry at scrape
+time, so a scrape costs no database query.
+"""
+
+import time
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    GCCollector,
+    PlatformCollector,
+    ProcessCollector,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+from .circuit_breaker import circuit_state
+from .mint_registry import MintRegistry
+from .schemas import CircuitState
+from .swap_timings import SENDER_PHASES
+
+registry = CollectorRegistry()
+ProcessCollector(registry=registry)
+PlatformCollector(registry=registry)
+GCCollector(registry=registry)
+
+# mints answer in ms to tens of seconds, a quote can take up to the deadline
+PHASE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 10)
+
+SWAP_PHASE_SECONDS = Histogram(
+    "auditor_swap_phase_seconds",
+    "Duration of a swap phase, labelled with the mint the phase talks to.",
+    ["phase", "mint"],
+    buckets=PHASE_BUCKETS,
+    registry=registry,
+)
+SWAPS = Counter(
+    "auditor_swaps",
+    "Stored swaps by outcome.",
+    ["state"],
+    registry=registry,
+)
+SWAPS_IN_FLIGHT = Gauge(
+    "auditor_swaps_in_flight",
+    "Swaps currently running.",
+    registry=registry,
+)
+DONATIONS = Counter(
+    "auditor_donations",
+    "Processed donations by outcome.",
+    ["status"],
+    registry=registry,
+)
+RECOVERED_ERRORS = Counter(
+    "auditor_recover_errors",
+    "Wallet errors seen by recover_errors, by the branch that handled them.",
+    ["branch"],
+    registry=registry,
+)
+REQUEST_SECONDS = Histogram(
+    "auditor_http_request_duration_seconds",
+    "Duration of API requests by route template.",
+    ["method", "route", "status"],
+    buckets=REQUEST_BUCKETS,
+    registry=registry,
+)
+
+
+def observe_swap(from_url: str, to_url: str, state: str, timings: dict[str, float]):
+    SWAPS.labels(state).inc()
+    for phase, duration in timings.items():
+        mint = from_url if phase in SENDER_PHASES else to_url
+        SWAP_PHASE_SECONDS.labels(phase, mint).observe(duration / 1000)
+
+
+class MintCollector:
+    """Balances and circuits of the mints in the registry, collected on every scrape."""
+
+    def __init__(self, mints: MintRegistry):
+        self.mints = mints
+
+    def collect(self):
+        balance = GaugeMetricFamily(
+            "auditor_mint_balance_sat",
+            "Balance of the auditor's wallet at a mint.",
+            labels=["mint"],
+        )
+        circuit_open = GaugeMetricFamily(
+            "auditor_mint_circuit_open",
+            "Whether a mint is kept out of swaps by its circuit breaker.",
+            labels=["mint"],
+        )
+        for mint in list(self.mints.mints.values()):
+            balance.add_metric([mint.url], mint.balance or 0)
+            circuit_open.add_metric(
+                [mint.url], circuit_state(mint) != CircuitState.CLOSED
+            )
+        yield balance
+        yield circuit_open
+
+
+class MetricsMiddleware:
+    """Times each HTTP request and labels it with its route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # the router sets the matched route on the scope; unmatched paths
+            # share one label so random URLs can't add series
+            route = scope.get("route")
+            REQUEST_SECONDS.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status),
+            ).observe(time.perf_counter() - start)
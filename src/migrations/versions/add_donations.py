@@ -0,0 +1,46 @@
+"""Add donations outbox table
+
+Revision ID: add_donations
+Revises: add_swap_edges
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_donations"
+down_revision: Union[str, None] = "add_swap_edges"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "donations",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("token", sa.String(), nullable=True),
+        sa.Column("mint_url", sa.String(length=512), nullable=True),
+        sa.Column("amount", sa.Integer(), nullable=True),
+        sa.Column("status", sa.String(length=10), nullable=True),
+        sa.Column("received", sa.Integer(), nullable=True),
+        sa.Column("mint_id", sa.Integer(), nullable=True),
+        sa.Column("error", sa.String(length=10_000), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["mint_id"], ["mints.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_donations_id", "donations", ["id"])
+    # Outstanding donations are requeued on startup
+    op.create_index("ix_donations_status", "donations", ["status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_donations_status", table_name="donations")
+    op.drop_index("ix_donations_id", table_name="donations")
+    op.drop_table("donations")
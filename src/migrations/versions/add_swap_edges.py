@@ -0,0 +1,45 @@
+"""Add swap edges aggregate table
+
+Revision ID: add_swap_edges
+Revises: add_swap_stats_hourly
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from models import SWAP_EDGES_BACKFILL_SQL, SWAP_EDGES_TRIGGER_SQL
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_swap_edges"
+down_revision: Union[str, None] = "add_swap_stats_hourly"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "swap_edges",
+        sa.Column("from_id", sa.Integer(), nullable=False),
+        sa.Column("to_id", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("total_amount", sa.Integer(), nullable=False),
+        sa.Column("total_fee", sa.Integer(), nullable=False),
+        sa.Column("last_swap", sa.DateTime(), nullable=True),
+        sa.Column("last_state", sa.String(length=10), nullable=True),
+        sa.ForeignKeyConstraint(["from_id"], ["mints.id"]),
+        sa.ForeignKeyConstraint(["to_id"], ["mints.id"]),
+        sa.PrimaryKeyConstraint("from_id", "to_id"),
+    )
+    # Keep the edges up to date on every new swap
+    op.execute(SWAP_EDGES_TRIGGER_SQL)
+    # Backfill the edges from the existing swap history
+    op.execute(SWAP_EDGES_BACKFILL_SQL)
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS swaps_edges_insert")
+    op.drop_table("swap_edges")
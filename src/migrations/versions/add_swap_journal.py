@@ -0,0 +1,49 @@
+"""Add swap journal table
+
+Revision ID: add_swap_journal
+Revises: add_donations
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_swap_journal"
+down_revision: Union[str, None] = "add_donations"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "swap_journal",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("from_id", sa.Integer(), nullable=True),
+        sa.Column("to_id", sa.Integer(), nullable=True),
+        sa.Column("amount", sa.Integer(), nullable=True),
+        sa.Column("mint_quote", sa.String(), nullable=True),
+        sa.Column("melt_quote", sa.String(), nullable=True),
+        sa.Column("state", sa.String(length=10), nullable=True),
+        sa.Column("fee", sa.Integer(), nullable=True),
+        sa.Column("time_taken", sa.Integer(), nullable=True),
+        sa.Column("error", sa.String(length=10_000), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["from_id"], ["mints.id"]),
+        sa.ForeignKeyConstraint(["to_id"], ["mints.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_swap_journal_id", "swap_journal", ["id"])
+    # In-flight swaps are resumed on startup
+    op.create_index("ix_swap_journal_state", "swap_journal", ["state"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_swap_journal_state", table_name="swap_journal")
+    op.drop_index("ix_swap_journal_id", table_name="swap_journal")
+    op.drop_table("swap_journal")
@@ -0,0 +1,47 @@
+"""Add hourly swap stats rollup table
+
+Revision ID: add_swap_stats_hourly
+Revises: add_swaps_indexes
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from models import SWAP_STATS_HOURLY_BACKFILL_SQL, SWAP_STATS_HOURLY_TRIGGER_SQL
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_swap_stats_hourly"
+down_revision: Union[str, None] = "add_swaps_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "swap_stats_hourly",
+        sa.Column("bucket", sa.DateTime(), nullable=False),
+        sa.Column("mint_id", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("n_ok", sa.Integer(), nullable=False),
+        sa.Column("n_error", sa.Integer(), nullable=False),
+        sa.Column("amount", sa.Integer(), nullable=False),
+        sa.Column("fee", sa.Integer(), nullable=False),
+        sa.Column("time_taken_sum", sa.Integer(), nullable=False),
+        sa.Column("time_taken_min", sa.Integer(), nullable=True),
+        sa.Column("time_taken_max", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["mint_id"], ["mints.id"]),
+        sa.PrimaryKeyConstraint("bucket", "mint_id"),
+    )
+    # Keep the rollup up to date on every new swap
+    op.execute(SWAP_STATS_HOURLY_TRIGGER_SQL)
+    # Backfill the rollup from the existing swap history
+    op.execute(SWAP_STATS_HOURLY_BACKFILL_SQL)
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS swaps_stats_hourly_insert")
+    op.drop_table("swap_stats_hourly")
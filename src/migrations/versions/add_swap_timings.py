@@ -0,0 +1,40 @@
+"""Add swap timings table
+
+Revision ID: add_swap_timings
+Revises: add_swap_journal
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_swap_timings"
+down_revision: Union[str, None] = "add_swap_journal"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "swap_timings",
+        sa.Column("swap_id", sa.Integer(), nullable=False),
+        sa.Column("load_to_mint", sa.Float(), nullable=True),
+        sa.Column("load_from_mint", sa.Float(), nullable=True),
+        sa.Column("request_mint", sa.Float(), nullable=True),
+        sa.Column("melt_quote", sa.Float(), nullable=True),
+        sa.Column("select_to_send", sa.Float(), nullable=True),
+        sa.Column("melt", sa.Float(), nullable=True),
+        sa.Column("quote_wait", sa.Float(), nullable=True),
+        sa.Column("mint", sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(["swap_id"], ["swaps.id"]),
+        sa.PrimaryKeyConstraint("swap_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("swap_timings")
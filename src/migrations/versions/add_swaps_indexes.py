@@ -0,0 +1,36 @@
+"""Add indexes for the hot queries on swaps
+
+Revision ID: add_swaps_indexes
+Revises: add_mint_location
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_swaps_indexes"
+down_revision: Union[str, None] = "add_mint_location"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Newest-first listings and time range scans
+    op.create_index("ix_swaps_created_at", "swaps", ["created_at"])
+    # Swaps sent or received by a mint, newest first
+    op.create_index(
+        "ix_swaps_from_id_created_at", "swaps", ["from_id", "created_at"]
+    )
+    op.create_index("ix_swaps_to_id_created_at", "swaps", ["to_id", "created_at"])
+    op.create_index("ix_swaps_state_created_at", "swaps", ["state", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_swaps_state_created_at", table_name="swaps")
+    op.drop_index("ix_swaps_to_id_created_at", table_name="swaps")
+    op.drop_index("ix_swaps_from_id_created_at", table_name="swaps")
+    op.drop_index("ix_swaps_created_at", table_name="swaps")
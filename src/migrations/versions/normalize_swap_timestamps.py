@@ -0,0 +1,32 @@
+"""Store swap timestamps with microseconds
+
+Revision ID: normalize_swap_timestamps
+Revises: add_swap_timings
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "normalize_swap_timestamps"
+down_revision: Union[str, None] = "add_swap_timings"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Swaps created with the former CURRENT_TIMESTAMP default are stored as
+    # 'YYYY-MM-DD HH:MM:SS'. Bring them to the format SQLAlchemy writes, so that
+    # all timestamps compare correctly with each other and with cursors.
+    op.execute(
+        "UPDATE swaps SET created_at = created_at || '.000000' "
+        "WHERE length(created_at) = 19"
+    )
+
+
+def downgrade() -> None:
+    pass
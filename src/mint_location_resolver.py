@@ -4,20 +4,39 @@ MintLocationResolver: Resolves IP addresses of mints to geo coordinates.
 This module handles downloading and maintaining a local copy of the IP location
 database from dbip-city, and provides functionality to resolve mint URLs to
 their geographic coordinates.
+
+Hostnames are resolved with the event loop's `getaddrinfo`, which runs in a
+thread and never blocks the loop. Answers are cached per hostname; the system
+resolver does not report record TTLs, so the cache uses a configured TTL.
 """
 
-import csv
-import gzip
+import asyncio
 import ipaddress
+import json
+import os
 import socket
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Any, Awaitable, Callable, Iterable, Optional, Tuple, Union
 from urllib.parse import urlparse
 
 import httpx
 from loguru import logger
 
+from .ip_index import IpLocationIndex, build_index
+
+# seconds between checks whether the IP database is due for an update
+UPDATE_CHECK_INTERVAL = int(os.environ.get("AUDITOR_IP_DB_CHECK_INTERVAL", 3600))
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# seconds a resolved, or unresolvable, hostname is cached
+DNS_CACHE_TTL = int(os.environ.get("AUDITOR_DNS_CACHE_TTL", 3600))
+DNS_NEGATIVE_CACHE_TTL = int(os.environ.get("AUDITOR_DNS_NEGATIVE_CACHE_TTL", 300))
+DNS_TIMEOUT = float(os.environ.get("AUDITOR_DNS_TIMEOUT", 5))
+# concurrent lookups of resolve_mint_locations
+DNS_CONCURRENCY = int(os.environ.get("AUDITOR_DNS_CONCURRENCY", 16))
+
 
 class MintLocationResolver:
     """
@@ -37,9 +56,21 @@ class MintLocationResolver:
         """Initialize the resolver and ensure data directory exists."""
         self.db_file = self.DB_FILE
         self.last_update_file = self.LAST_UPDATE_FILE
-        self.ip_ranges: list[Tuple[int, int, float, float]] = []
+        # (start, end, latitude, longitude) ranges, empty until loaded
+        self.ip_ranges: Union[IpLocationIndex, list] = []
+        # transport of the download client, replaced in tests
+        self.transport: Optional[httpx.AsyncBaseTransport] = None
+        # hostname -> (expiry on the monotonic clock, IPv4 address or None)
+        self.dns_cache: dict[str, Tuple[float, Optional[str]]] = {}
+        # lookups in progress, concurrent requests for a hostname share them
+        self._dns_inflight: dict[str, asyncio.Future] = {}
         self._ensure_directories()
 
+    @property
+    def index_file(self) -> Path:
+        """Binary index built from the CSV database, see ip_index.py."""
+        return self.db_file.with_name(self.db_file.name + ".idx")
+
     def _ensure_directories(self):
         """Ensure required directories exist."""
         self.db_file.parent.mkdir(parents=True, exist_ok=True)
@@ -85,67 +116,114 @@ class MintLocationResolver:
         days_since_update = (datetime.utcnow() - last_update).days
         return days_since_update >= self.UPDATE_INTERVAL_DAYS
 
-    async def _download_database(self):
-        """Download the IP location database from the remote URL."""
+    @property
+    def validators_file(self) -> Path:
+        """ETag and Last-Modified of the downloaded database."""
+        return self.last_update_file.with_suffix(".json")
+
+    def _get_validators(self) -> dict[str, str]:
+        if not self.db_file.exists() or not self.validators_file.exists():
+            return {}
+        try:
+            return json.loads(self.validators_file.read_text())
+        except Exception as e:
+            logger.warning(f"Error reading database validators: {e}")
+            return {}
+
+    def _save_validators(self, response: httpx.Response):
+        validators = {
+            header: response.headers[header]
+            for header in ("etag", "last-modified")
+            if header in response.headers
+        }
+        try:
+            self.validators_file.write_text(json.dumps(validators))
+        except Exception as e:
+            logger.error(f"Error saving database validators: {e}")
+
+    async def _download_database(self) -> bool:
+        """
+        Download the IP location database from the remote URL.
+
+        The file is streamed to disk and replaces the current one only when
+        complete. Returns False if the server reports it as not modified.
+        """
         logger.info(f"Downloading IP location database from {self.DB_URL}")
+        validators = self._get_validators()
+        headers = {}
+        if "etag" in validators:
+            headers["If-None-Match"] = validators["etag"]
+        if "last-modified" in validators:
+            headers["If-Modified-Since"] = validators["last-modified"]
+        tmp_file = self.db_file.with_name(self.db_file.name + ".download")
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.get(self.DB_URL)
-                response.raise_for_status()
-                with open(self.db_file, "wb") as f:
-                    f.write(response.content)
+            async with httpx.AsyncClient(timeout=60.0, transport=self.transport) as client:
+                async with client.stream("GET", self.DB_URL, headers=headers) as response:
+                    if response.status_code == 304:
+                        logger.info("IP location database not modified")
+                        self._save_last_update_time()
+                        return False
+                    response.raise_for_status()
+                    with open(tmp_file, "wb") as f:
+                        async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                            f.write(chunk)
+            os.replace(tmp_file, self.db_file)
             logger.success(f"Downloaded database to {self.db_file}")
+            self._save_validators(response)
             self._save_last_update_time()
+            return True
         except Exception as e:
             logger.error(f"Error downloading database: {e}")
+            tmp_file.unlink(missing_ok=True)
             raise
 
-    def _load_database(self):
-        """Load the IP location database into memory."""
+    def _open_index(self) -> IpLocationIndex:
+        """Open the index of the database, building it first if it is outdated."""
         if not self.db_file.exists():
             raise FileNotFoundError(
                 f"Database file not found: {self.db_file}. Please download it first."
             )
 
-        logger.info(f"Loading IP location database from {self.db_file}")
-        self.ip_ranges = []
-
+        index_file = self.index_file
         try:
-            with gzip.open(self.db_file, "rt", encoding="utf-8") as f:
-                reader = csv.reader(f)
-                for row in reader:
-                    if len(row) < 8:
-                        continue
-                    try:
-                        start_ip_num = int(row[0])
-                        end_ip_num = int(row[1])
-                        # Dataset layout: ..., latitude, longitude, accuracy
-                        latitude_str = row[-3].strip()
-                        longitude_str = row[-2].strip()
-                        if not latitude_str or not longitude_str:
-                            continue
-                        latitude = float(latitude_str)
-                        longitude = float(longitude_str)
-                        self.ip_ranges.append(
-                            (start_ip_num, end_ip_num, latitude, longitude)
-                        )
-                    except (ValueError, IndexError) as e:
-                        logger.debug(f"Skipping invalid row: {row}, error: {e}")
-                        continue
-
-            # Sort by start IP for binary search efficiency
-            self.ip_ranges.sort(key=lambda x: x[0])
-            logger.success(f"Loaded {len(self.ip_ranges)} IP ranges from database")
+            # one-time conversion, repeated only when a new CSV was downloaded
+            if (
+                not index_file.exists()
+                or index_file.stat().st_mtime < self.db_file.stat().st_mtime
+            ):
+                logger.info(f"Building IP location index from {self.db_file}")
+                build_index(self.db_file, index_file)
+            return IpLocationIndex(index_file)
         except Exception as e:
             logger.error(f"Error loading database: {e}")
             raise
 
-    async def ensure_database_updated(self):
-        """Ensure the database is up to date, downloading if necessary."""
+    def _swap_index(self, ip_ranges: IpLocationIndex):
+        # lookups run on the event loop, none can be using the previous index
+        previous, self.ip_ranges = self.ip_ranges, ip_ranges
+        if previous:
+            previous.close()
+        logger.success(f"Loaded {len(self.ip_ranges)} IP ranges from {self.index_file}")
+
+    def _load_database(self):
+        """Load the IP location database, blocking."""
+        self._swap_index(self._open_index())
+
+    async def reload_database(self):
+        """Build and open the index in a thread and swap it in on the event loop."""
+        self._swap_index(await asyncio.to_thread(self._open_index))
+
+    async def ensure_database_updated(self) -> bool:
+        """
+        Ensure the database is up to date, downloading if necessary.
+
+        Returns True if a new database was loaded.
+        """
+        downloaded = False
         needs_download = self._should_update_database() or not self.db_file.exists()
         if needs_download:
             try:
-                await self._download_database()
+                downloaded = await self._download_database()
             except Exception as e:
                 if not self.db_file.exists():
                     logger.error(
@@ -155,9 +233,29 @@ class MintLocationResolver:
                 logger.warning(
                     f"Download failed ({e}). Proceeding with existing database at {self.db_file}"
                 )
-        self._load_database()
+        if downloaded or not self.ip_ranges:
+            await self.reload_database()
+            return True
+        return False
+
+    async def run_updates(self, on_update: Callable[[], Awaitable[Any]]):
+        """
+        Keep the database up to date while the process runs.
 
-    def _url_to_ip(self, url: str) -> Optional[str]:
+        Checks every UPDATE_CHECK_INTERVAL seconds whether UPDATE_INTERVAL_DAYS
+        have passed and calls `on_update` after a new database was loaded.
+        """
+        while True:
+            await asyncio.sleep(UPDATE_CHECK_INTERVAL)
+            try:
+                if await self.ensure_database_updated():
+                    await on_update()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error updating IP location database: {e}")
+
+    async def _url_to_ip(self, url: str) -> Optional[str]:
         """Extract IP address from a URL by resolving the hostname."""
         try:
             parsed = urlparse(url)
@@ -177,33 +275,58 @@ class MintLocationResolver:
             except ValueError:
                 pass
 
-            # Resolve hostname to IP (prefer IPv4)
-            try:
-                addr_info = socket.getaddrinfo(hostname, None, proto=socket.IPPROTO_TCP)
-            except socket.gaierror as e:
-                logger.warning(f"Could not resolve hostname {hostname}: {e}")
-                return None
-
-            for info in addr_info:
-                sockaddr = info[4]
-                if not sockaddr:
-                    continue
-                ip_candidate = sockaddr[0]
-                try:
-                    ip_obj = ipaddress.ip_address(ip_candidate)
-                    if isinstance(ip_obj, ipaddress.IPv4Address):
-                        return ip_candidate
-                except ValueError:
-                    continue
-
-            logger.warning(
-                f"No IPv4 address found for hostname {hostname}. Unable to resolve location."
-            )
-            return None
+            return await self._resolve_hostname(hostname)
         except Exception as e:
             logger.warning(f"Error extracting IP from URL {url}: {e}")
             return None
 
+    async def _resolve_hostname(self, hostname: str) -> Optional[str]:
+        """Resolve a hostname to an IPv4 address, cached for DNS_CACHE_TTL."""
+        cached = self.dns_cache.get(hostname)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        inflight = self._dns_inflight.get(hostname)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._lookup_hostname(hostname))
+            self._dns_inflight[hostname] = inflight
+            inflight.add_done_callback(lambda _: self._dns_inflight.pop(hostname, None))
+        return await asyncio.shield(inflight)
+
+    async def _lookup_hostname(self, hostname: str) -> Optional[str]:
+        ip = None
+        try:
+            # Resolve hostname to IP (prefer IPv4)
+            loop = asyncio.get_running_loop()
+            addr_info = await asyncio.wait_for(
+                loop.getaddrinfo(hostname, None, proto=socket.IPPROTO_TCP),
+                timeout=DNS_TIMEOUT,
+            )
+            ip = self._first_ipv4(addr_info)
+            if ip is None:
+                logger.warning(
+                    f"No IPv4 address found for hostname {hostname}. Unable to resolve location."
+                )
+        except (socket.gaierror, asyncio.TimeoutError) as e:
+            logger.warning(f"Could not resolve hostname {hostname}: {e!r}")
+        ttl = DNS_CACHE_TTL if ip else DNS_NEGATIVE_CACHE_TTL
+        self.dns_cache[hostname] = (time.monotonic() + ttl, ip)
+        return ip
+
+    @staticmethod
+    def _first_ipv4(addr_info) -> Optional[str]:
+        for info in addr_info:
+            sockaddr = info[4]
+            if not sockaddr:
+                continue
+            ip_candidate = sockaddr[0]
+            try:
+                ip_obj = ipaddress.ip_address(ip_candidate)
+                if isinstance(ip_obj, ipaddress.IPv4Address):
+                    return ip_candidate
+            except ValueError:
+                continue
+        return None
+
     def _ip_to_coordinates(self, ip: str) -> Optional[Tuple[float, float]]:
         """Resolve IP address to latitude/longitude coordinates."""
         if not self.ip_ranges:
@@ -218,23 +341,15 @@ class MintLocationResolver:
             logger.warning(f"Invalid IP address {ip}: {e}")
             return None
 
-        # Binary search for the IP range
-        left, right = 0, len(self.ip_ranges) - 1
-        while left <= right:
-            mid = (left + right) // 2
-            start_ip, end_ip, lat, lon = self.ip_ranges[mid]
-
-            if start_ip <= ip_num <= end_ip:
-                return (lat, lon)
-            elif ip_num < start_ip:
-                right = mid - 1
-            else:
-                left = mid + 1
-
+        coordinates = self.ip_ranges.lookup(ip_num)
+        if coordinates is not None:
+            return coordinates
         logger.debug(f"IP {ip} not found in database")
         return None
 
-    def resolve_mint_location(self, mint_url: str) -> Optional[Tuple[float, float]]:
+    async def resolve_mint_location(
+        self, mint_url: str
+    ) -> Optional[Tuple[float, float]]:
         """
         Resolve a mint URL to its geographic coordinates.
 
@@ -244,7 +359,21 @@ class MintLocationResolver:
         Returns:
             Tuple of (latitude, longitude) if found, None otherwise
         """
-        ip = self._url_to_ip(mint_url)
+        ip = await self._url_to_ip(mint_url)
         if not ip:
             return None
         return self._ip_to_coordinates(ip)
+
+    async def resolve_mint_locations(
+        self, mint_urls: Iterable[str]
+    ) -> dict[str, Optional[Tuple[float, float]]]:
+        """Resolve many mint URLs concurrently, at most DNS_CONCURRENCY at a time."""
+        semaphore = asyncio.Semaphore(DNS_CONCURRENCY)
+
+        async def resolve(mint_url: str):
+            async with semaphore:
+                return await self.resolve_mint_location(mint_url)
+
+        mint_urls = list(dict.fromkeys(mint_urls))
+        locations = await asyncio.gather(*(resolve(url) for url in mint_urls))
+        return dict(zip(mint_urls, locations))
@@ -0,0 +1,107 @@
+"""
+MintRegistry: In-memory view of the `mints` table.
+
+The auditor and the API read mints from the registry instead of loading the
+whole table for every swap or request. Every write to a mint must be followed
+by `refresh` for the written ids (write-through), which re-reads only those
+rows by primary key. The large `info` column is not loaded, accessing it on a
+registry mint raises. Listeners are called with the previous and the new
+version of every mint that `refresh` re-read.
+"""
+
+import asyncio
+from typing import Callable, Iterable, Optional
+
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.orm import defer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import read_engine
+from .models import Mint
+
+
+class MintRegistry:
+    def __init__(self):
+        self.mints: dict[int, Mint] = {}
+        self.ids_by_url: dict[str, int] = {}
+        self.loaded = False
+        # bumped on every change, lets readers detect that the registry changed
+        self.version = 0
+        self.lock = asyncio.Lock()
+        self.listeners: list[Callable[[Optional[Mint], Mint], None]] = []
+
+    def clear(self):
+        """Drop all mints. The registry is loaded again on next access."""
+        self.mints = {}
+        self.ids_by_url = {}
+        self.loaded = False
+        self.version += 1
+
+    @staticmethod
+    def _select():
+        return select(Mint).options(defer(Mint.info, raiseload=True))
+
+    def _set(self, mint: Mint):
+        previous = self.mints.get(mint.id)
+        if previous is not None and previous.url != mint.url:
+            self.ids_by_url.pop(previous.url, None)
+        self.mints[mint.id] = mint
+        self.ids_by_url[mint.url] = mint.id
+
+    async def load(self):
+        """Load all mints from the database."""
+        async with self.lock:
+            async with AsyncSession(read_engine, expire_on_commit=False) as session:
+                result = await session.execute(self._select())
+                mints = result.scalars().all()
+                session.expunge_all()  # Detach mints before session closes
+            self.mints = {}
+            self.ids_by_url = {}
+            for mint in mints:
+                self._set(mint)
+            self.loaded = True
+            self.version += 1
+        logger.info(f"Loaded {len(self.mints)} mints into the registry.")
+
+    async def ensure_loaded(self):
+        if not self.loaded:
+            await self.load()
+
+    async def refresh(self, mint_ids: Iterable[int]):
+        """Re-read the given mints from the database after they were written."""
+        mint_ids = set(mint_ids)
+        if not self.loaded or not mint_ids:
+            return
+        async with self.lock:
+            async with AsyncSession(read_engine, expire_on_commit=False) as session:
+                result = await session.execute(
+                    self._select().where(Mint.id.in_(mint_ids))
+                )
+                mints = result.scalars().all()
+                session.expunge_all()
+            changes = []
+            for mint in mints:
+                changes.append((self.mints.get(mint.id), mint))
+                self._set(mint)
+            for mint_id in mint_ids - {mint.id for mint in mints}:
+                removed = self.mints.pop(mint_id, None)
+                if removed is not None:
+                    self.ids_by_url.pop(removed.url, None)
+            self.version += 1
+        for previous, mint in changes:
+            for listener in self.listeners:
+                listener(previous, mint)
+
+    async def all(self) -> list[Mint]:
+        await self.ensure_loaded()
+        return [self.mints[mint_id] for mint_id in sorted(self.mints)]
+
+    async def get(self, mint_id: int) -> Optional[Mint]:
+        await self.ensure_loaded()
+        return self.mints.get(mint_id)
+
+    async def get_by_url(self, url: str) -> Optional[Mint]:
+        await self.ensure_loaded()
+        mint_id = self.ids_by_url.get(url)
+        return self.mints.get(mint_id) if mint_id is not None else None
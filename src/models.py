@@ -1,4 +1,17 @@
-from sqlalchemy import Column, DateTime, Integer, String, func, ForeignKey, Float
+from datetime import datetime
+
+from sqlalchemy import (
+    DDL,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    event,
+    func,
+)
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
@@ -33,7 +46,220 @@ class SwapEvent(Base):
     to_url = Column(String, ForeignKey("mints.url"))
     amount = Column(Integer)
     fee = Column(Integer)
-    created_at = Column(DateTime, default=func.now())
+    # set in Python: SQLite's CURRENT_TIMESTAMP has no fraction of a second and
+    # would not compare correctly with the pagination cursors
+    created_at = Column(DateTime, default=datetime.utcnow)
     time_taken = Column(Integer)
     state = Column(String(10))
     error = Column(String(10_000))
+
+    __table_args__ = (
+        # newest-first listings and time range scans of /swaps/ and /stats/
+        Index("ix_swaps_created_at", "created_at"),
+        # /swaps/mint/{mint_id} for sent and received swaps
+        Index("ix_swaps_from_id_created_at", "from_id", "created_at"),
+        Index("ix_swaps_to_id_created_at", "to_id", "created_at"),
+        Index("ix_swaps_state_created_at", "state", "created_at"),
+    )
+
+
+class SwapTimings(Base):
+    """Durations (in milliseconds) of the phases of a swap, see swap_timings.py."""
+
+    __tablename__ = "swap_timings"
+
+    swap_id = Column(Integer, ForeignKey("swaps.id"), primary_key=True)
+    load_to_mint = Column(Float, nullable=True)
+    load_from_mint = Column(Float, nullable=True)
+    request_mint = Column(Float, nullable=True)
+    melt_quote = Column(Float, nullable=True)
+    select_to_send = Column(Float, nullable=True)
+    melt = Column(Float, nullable=True)
+    quote_wait = Column(Float, nullable=True)
+    mint = Column(Float, nullable=True)
+
+
+class Donation(Base):
+    """Outbox of donated tokens, redeemed in the background by DonationQueue."""
+
+    __tablename__ = "donations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # cleared once the token is received
+    token = Column(String, nullable=True)
+    mint_url = Column(String(512))
+    amount = Column(Integer)
+    status = Column(String(10))
+    received = Column(Integer, nullable=True)
+    mint_id = Column(Integer, ForeignKey("mints.id"), nullable=True)
+    error = Column(String(10_000), nullable=True)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # outstanding donations are requeued on startup
+        Index("ix_donations_status", "status"),
+    )
+
+
+class SwapJournal(Base):
+    """
+    Progress of a running swap, written before each step that moves funds so
+    that a swap interrupted by a restart or a failure can be finished or
+    rolled back.
+    """
+
+    __tablename__ = "swap_journal"
+
+    id = Column(Integer, primary_key=True, index=True)
+    from_id = Column(Integer, ForeignKey("mints.id"))
+    to_id = Column(Integer, ForeignKey("mints.id"))
+    amount = Column(Integer)
+    mint_quote = Column(String)
+    melt_quote = Column(String)
+    state = Column(String(10))
+    fee = Column(Integer, nullable=True)
+    time_taken = Column(Integer, nullable=True)
+    error = Column(String(10_000), nullable=True)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # in-flight swaps are resumed on startup
+        Index("ix_swap_journal_state", "state"),
+    )
+
+
+class SwapStatsHourly(Base):
+    """Hourly rollup of swaps per sending mint, maintained by a trigger on swaps."""
+
+    __tablename__ = "swap_stats_hourly"
+
+    bucket = Column(DateTime, primary_key=True)
+    mint_id = Column(Integer, ForeignKey("mints.id"), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    n_ok = Column(Integer, nullable=False, default=0)
+    n_error = Column(Integer, nullable=False, default=0)
+    amount = Column(Integer, nullable=False, default=0)
+    fee = Column(Integer, nullable=False, default=0)
+    time_taken_sum = Column(Integer, nullable=False, default=0)
+    time_taken_min = Column(Integer)
+    time_taken_max = Column(Integer)
+
+
+# Bucket format must match how SQLAlchemy stores DateTime values in SQLite.
+# The statements are shared with the migrations and stats.backfill.
+SWAP_STATS_HOURLY_TRIGGER_SQL = """
+CREATE TRIGGER IF NOT EXISTS swaps_stats_hourly_insert AFTER INSERT ON swaps
+BEGIN
+    INSERT INTO swap_stats_hourly (
+        bucket, mint_id, count, n_ok, n_error, amount, fee,
+        time_taken_sum, time_taken_min, time_taken_max
+    )
+    VALUES (
+        strftime('%Y-%m-%d %H:00:00.000000', NEW.created_at),
+        NEW.from_id,
+        1,
+        NEW.state = 'OK',
+        NEW.state = 'ERROR',
+        coalesce(NEW.amount, 0),
+        coalesce(NEW.fee, 0),
+        coalesce(NEW.time_taken, 0),
+        coalesce(NEW.time_taken, 0),
+        coalesce(NEW.time_taken, 0)
+    )
+    ON CONFLICT (bucket, mint_id) DO UPDATE SET
+        count = count + 1,
+        n_ok = n_ok + excluded.n_ok,
+        n_error = n_error + excluded.n_error,
+        amount = amount + excluded.amount,
+        fee = fee + excluded.fee,
+        time_taken_sum = time_taken_sum + excluded.time_taken_sum,
+        time_taken_min = min(time_taken_min, excluded.time_taken_min),
+        time_taken_max = max(time_taken_max, excluded.time_taken_max);
+END
+"""
+SWAP_STATS_HOURLY_BACKFILL_SQL = """
+INSERT INTO swap_stats_hourly (
+    bucket, mint_id, count, n_ok, n_error, amount, fee,
+    time_taken_sum, time_taken_min, time_taken_max
+)
+SELECT
+    strftime('%Y-%m-%d %H:00:00.000000', created_at),
+    from_id,
+    count(*),
+    sum(state = 'OK'),
+    sum(state = 'ERROR'),
+    sum(coalesce(amount, 0)),
+    sum(coalesce(fee, 0)),
+    sum(coalesce(time_taken, 0)),
+    min(coalesce(time_taken, 0)),
+    max(coalesce(time_taken, 0))
+FROM swaps
+GROUP BY 1, 2
+"""
+# % is escaped as %% in DDL statements
+event.listen(
+    SwapStatsHourly.__table__,
+    "after_create",
+    DDL(SWAP_STATS_HOURLY_TRIGGER_SQL.replace("%", "%%")),
+)
+
+
+class SwapEdge(Base):
+    """Aggregate of all swaps between two mints, maintained by a trigger on swaps."""
+
+    __tablename__ = "swap_edges"
+
+    from_id = Column(Integer, ForeignKey("mints.id"), primary_key=True)
+    to_id = Column(Integer, ForeignKey("mints.id"), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Integer, nullable=False, default=0)
+    total_fee = Column(Integer, nullable=False, default=0)
+    last_swap = Column(DateTime)
+    last_state = Column(String(10))
+
+
+SWAP_EDGES_TRIGGER_SQL = """
+CREATE TRIGGER IF NOT EXISTS swaps_edges_insert AFTER INSERT ON swaps
+BEGIN
+    INSERT INTO swap_edges (
+        from_id, to_id, count, total_amount, total_fee, last_swap, last_state
+    )
+    VALUES (
+        NEW.from_id,
+        NEW.to_id,
+        1,
+        coalesce(NEW.amount, 0),
+        coalesce(NEW.fee, 0),
+        NEW.created_at,
+        NEW.state
+    )
+    ON CONFLICT (from_id, to_id) DO UPDATE SET
+        count = count + 1,
+        total_amount = total_amount + excluded.total_amount,
+        total_fee = total_fee + excluded.total_fee,
+        last_state = CASE
+            WHEN excluded.last_swap >= last_swap THEN excluded.last_state
+            ELSE last_state
+        END,
+        last_swap = max(last_swap, excluded.last_swap);
+END
+"""
+# SQLite takes the bare `state` column from the row that holds max(created_at)
+SWAP_EDGES_BACKFILL_SQL = """
+INSERT INTO swap_edges (
+    from_id, to_id, count, total_amount, total_fee, last_swap, last_state
+)
+SELECT
+    from_id,
+    to_id,
+    count(*),
+    sum(coalesce(amount, 0)),
+    sum(coalesce(fee, 0)),
+    max(created_at),
+    state
+FROM swaps
+GROUP BY from_id, to_id
+"""
+event.listen(SwapEdge.__table__, "after_create", DDL(SWAP_EDGES_TRIGGER_SQL))
@@ -0,0 +1,70 @@
+"""
+Keyset pagination for swap listings.
+
+Swaps are listed newest first, ordered by (created_at, id). A cursor is an
+opaque token holding the (created_at, id) of a row. `before` returns the rows
+older than the cursor, `after` the rows newer than it, so every page is a
+range read on the created_at indexes no matter how deep the client pages.
+"""
+
+import base64
+from datetime import datetime
+from typing import Sequence
+
+from fastapi import Response
+from sqlalchemy import Select, asc, desc, tuple_
+
+from . import models, schemas
+
+# Response headers with the cursors of the returned page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PREV_CURSOR_HEADER = "X-Prev-Cursor"
+
+
+def encode_cursor(swap: models.SwapEvent) -> str:
+    raw = f"{swap.created_at.isoformat()}|{swap.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Raises ValueError if the cursor is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, swap_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(swap_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def paginate_swaps(query: Select, params: schemas.PaginationParams) -> Select:
+    """Apply ordering, cursors, skip and limit of `params` to a swap query."""
+    if params.before and params.after:
+        raise ValueError("Only one of before and after can be given")
+    key = tuple_(models.SwapEvent.created_at, models.SwapEvent.id)
+    if params.after:
+        # newer rows, read upwards from the cursor and reversed by the caller
+        query = query.where(key > tuple_(*decode_cursor(params.after))).order_by(
+            asc(models.SwapEvent.created_at), asc(models.SwapEvent.id)
+        )
+    else:
+        if params.before:
+            query = query.where(key < tuple_(*decode_cursor(params.before)))
+        query = query.order_by(
+            desc(models.SwapEvent.created_at), desc(models.SwapEvent.id)
+        )
+    return query.offset(params.skip).limit(params.limit)
+
+
+def page_swaps(
+    swaps: Sequence[models.SwapEvent],
+    params: schemas.PaginationParams,
+    response: Response,
+) -> list[models.SwapEvent]:
+    """Return the page newest first and set the cursor headers on `response`."""
+    swaps = list(swaps)
+    if params.after:
+        swaps.reverse()
+    if swaps:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(swaps[-1])
+        response.headers[PREV_CURSOR_HEADER] = encode_cursor(swaps[0])
+    return swaps
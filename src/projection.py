@@ -0,0 +1,76 @@
+"""
+Field projection of the mint endpoints.
+
+`fields=` and `exclude=` select the columns of a mint a client receives.
+Fields kept in the mint registry are served from memory. The large `info`
+column is not part of the registry, it is read from the database only when
+requested and then only together with the other requested columns.
+"""
+
+from typing import Any, Optional
+
+from sqlalchemy import select
+
+from .database import AsyncReadSessionLocal
+from .mint_registry import MintRegistry
+from .models import Mint
+from .schemas import MintRead, MintSummary
+
+MINT_FIELDS = tuple(MintRead.model_fields)
+SUMMARY_FIELDS = tuple(MintSummary.model_fields)
+# columns that are only read from the database
+DATABASE_FIELDS = tuple(field for field in MINT_FIELDS if field not in SUMMARY_FIELDS)
+
+
+def _split(value: Optional[str]) -> list[str]:
+    if not value:
+        return []
+    return [field.strip() for field in value.split(",") if field.strip()]
+
+
+def parse_fields(
+    fields: Optional[str], exclude: Optional[str], default: tuple[str, ...]
+) -> list[str]:
+    """Resolve `fields` and `exclude` to mint columns. Raises ValueError."""
+    selected = _split(fields) or list(default)
+    excluded = _split(exclude)
+    unknown = sorted(set(selected + excluded) - set(MINT_FIELDS))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    projected = [
+        field for field in MINT_FIELDS if field in selected and field not in excluded
+    ]
+    if not projected:
+        raise ValueError("No fields selected")
+    return projected
+
+
+def _project(mint: Mint, fields: list[str]) -> dict[str, Any]:
+    return {field: getattr(mint, field) for field in fields}
+
+
+async def _read_columns(fields: list[str], query_filter=None, skip=0, limit=None):
+    columns = [getattr(Mint, field) for field in fields]
+    query = select(*columns).order_by(Mint.id).offset(skip).limit(limit)
+    if query_filter is not None:
+        query = query.where(query_filter)
+    async with AsyncReadSessionLocal() as db:
+        result = await db.execute(query)
+        return [dict(row._mapping) for row in result.all()]
+
+
+async def read_mints(
+    registry: MintRegistry, fields: list[str], skip: int = 0, limit: int = 100
+) -> list[dict[str, Any]]:
+    if not any(field in DATABASE_FIELDS for field in fields):
+        mints = await registry.all()
+        return [_project(mint, fields) for mint in mints[skip : skip + limit]]
+    return await _read_columns(fields, skip=skip, limit=limit)
+
+
+async def read_mint(mint: Mint, fields: list[str]) -> Optional[dict[str, Any]]:
+    """Project a mint of the registry, reading database-only fields by id."""
+    if not any(field in DATABASE_FIELDS for field in fields):
+        return _project(mint, fields)
+    rows = await _read_columns(fields, query_filter=Mint.id == mint.id)
+    return rows[0] if rows else None
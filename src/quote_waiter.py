@@ -0,0 +1,140 @@
+"""
+Waiting for a mint quote to be paid before its tokens are minted.
+
+The state of the quote is polled with exponential backoff and jitter until a
+deadline. Mints that advertise NUT-17 WebSocket subscriptions for bolt11 mint
+quotes also push the state; polling then continues at the slowest interval
+as a fallback in case the subscription fails or misses the update. The
+WebSocket connection can't go through a proxy, so with TOR or a proxy
+configured for the wallet the quote is only polled.
+"""
+
+import asyncio
+import json
+import os
+import random
+from typing import Optional
+
+import websockets
+from cashu.core.base import Method, MintQuoteState
+from cashu.core.crypto.keys import random_hash
+from cashu.core.settings import settings
+from cashu.wallet.wallet import Wallet
+from loguru import logger
+
+QUOTE_POLL_INITIAL = float(os.environ.get("AUDITOR_QUOTE_POLL_INITIAL", 0.25))  # s
+QUOTE_POLL_MAX = float(os.environ.get("AUDITOR_QUOTE_POLL_MAX", 5))  # seconds
+QUOTE_DEADLINE = float(os.environ.get("AUDITOR_QUOTE_DEADLINE", 120))  # seconds
+
+# states in which the quote can be minted, or already was
+COMPLETED = (MintQuoteState.paid.value, MintQuoteState.issued.value)
+
+
+def websocket_url(mint_url: str) -> str:
+    url = mint_url.rstrip("/")
+    if url.startswith("https://"):
+        return "wss://" + url[len("https://") :] + "/v1/ws"
+    return "ws://" + url.removeprefix("http://") + "/v1/ws"
+
+
+def uses_proxy() -> bool:
+    """Whether the wallet talks to mints through TOR or a proxy."""
+    return bool(settings.tor or settings.socks_proxy or settings.http_proxy)
+
+
+def supports_websocket(wallet: Wallet) -> bool:
+    # a direct connection would bypass the proxy and reveal our address
+    if uses_proxy():
+        return False
+    mint_info = getattr(wallet, "mint_info", None)
+    if mint_info is None:
+        return False
+    try:
+        return mint_info.supports_websocket_mint_quote(Method.bolt11, wallet.unit)
+    except Exception:
+        return False
+
+
+async def poll_mint_quote(wallet: Wallet, quote_id: str, initial: float) -> str:
+    delay = initial
+    while True:
+        try:
+            quote = await wallet.get_mint_quote(quote_id)
+            if quote.state.value in COMPLETED:
+                return quote.state.value
+        except Exception as e:
+            # transient errors are retried until the deadline
+            logger.warning(f"Error checking mint quote {quote_id}: {e}")
+        # full jitter keeps concurrent swaps from polling in lockstep
+        await asyncio.sleep(random.uniform(delay / 2, delay))
+        delay = min(delay * 2, QUOTE_POLL_MAX)
+
+
+async def subscribe_mint_quote(mint_url: str, quote_id: str) -> str:
+    """Wait for the NUT-17 notification that the quote was paid."""
+    sub_id = random_hash()
+    async with websockets.connect(websocket_url(mint_url)) as websocket:
+        await websocket.send(
+            json.dumps(
+                {
+                    "jsonrpc": "2.0",
+                    "id": 0,
+                    "method": "subscribe",
+                    "params": {
+                        "kind": "bolt11_mint_quote",
+                        "subId": sub_id,
+                        "filters": [quote_id],
+                    },
+                }
+            )
+        )
+        async for message in websocket:
+            data = json.loads(message)
+            if "error" in data:
+                raise Exception(f"Subscription failed: {data['error']}")
+            params = data.get("params") or {}
+            if params.get("subId") != sub_id:
+                continue
+            state = (params.get("payload") or {}).get("state")
+            if state in COMPLETED:
+                return state
+    raise Exception("Subscription closed by the mint.")
+
+
+async def wait_for_mint_quote(
+    wallet: Wallet, quote_id: str, deadline: Optional[float] = None
+) -> str:
+    """
+    Wait until the mint quote is paid and return its state. Raises
+    asyncio.TimeoutError if it is not paid within `deadline` seconds.
+    """
+    waiters = []
+    initial = QUOTE_POLL_INITIAL
+    if supports_websocket(wallet):
+        waiters.append(asyncio.ensure_future(subscribe_mint_quote(wallet.url, quote_id)))
+        initial = QUOTE_POLL_MAX
+    waiters.append(asyncio.ensure_future(poll_mint_quote(wallet, quote_id, initial)))
+    deadline = deadline if deadline is not None else QUOTE_DEADLINE
+    try:
+        return await asyncio.wait_for(_first_result(waiters), deadline)
+    except asyncio.TimeoutError:
+        raise asyncio.TimeoutError(
+            f"Mint quote {quote_id} was not paid within {deadline:g} seconds."
+        )
+    finally:
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+
+
+async def _first_result(waiters: list[asyncio.Future]) -> str:
+    pending = set(waiters)
+    while True:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for waiter in done:
+            if waiter.exception() is None:
+                return waiter.result()
+        if not pending:
+            raise done.pop().exception()
+        for waiter in done:
+            logger.warning(f"Waiting for mint quote: {waiter.exception()}")
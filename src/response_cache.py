@@ -0,0 +1,199 @@
+"""
+ResponseCache: Cache of serialized API responses.
+
+Expensive read endpoints (`/graph/`, `/stats/`, `/mints/`) compute their
+response once and serve the encoded JSON body from memory, compressed once
+per entry for each encoding clients ask for:
+
+* An entry is fresh for `ttl` seconds. Within `stale_ttl` seconds after that,
+  the stale body is served while a single background task recomputes it.
+* Concurrent requests for a key that is not cached share one computation
+  (single-flight) instead of each running the same queries.
+* Each entry is stored with the data version it was computed at, the
+  registry version and last swap id the endpoint passes in. A request for
+  another version recomputes the entry, so a write is visible as soon as it
+  is committed, without waiting for the event bus. The ETag of a response
+  is derived from the version of the entry it serves, so a body and its
+  ETag always belong together.
+* `invalidate` is called for every event on the auditor's event bus. It
+  drops all entries, so the next request recomputes them.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import Request, Response
+from loguru import logger
+from pydantic import TypeAdapter
+
+from . import conditional
+from .responses import COMPRESSION_MINIMUM_SIZE, compress, negotiate_encoding
+
+CACHE_TTL = float(os.environ.get("AUDITOR_CACHE_TTL", 60))  # seconds
+CACHE_STALE_TTL = float(os.environ.get("AUDITOR_CACHE_STALE_TTL", 300))  # seconds
+
+
+class CacheEntry:
+    def __init__(self, body: bytes, generation: int, version: Any = None):
+        self.body = body
+        self.generation = generation
+        self.version = version
+        self.created_at = time.monotonic()
+        # compressed bodies by encoding, computed once on first request
+        self.encoded: dict[str, asyncio.Task] = {}
+
+    async def encode(self, encoding: Optional[str]) -> bytes:
+        if encoding is None:
+            return self.body
+        task = self.encoded.get(encoding)
+        if task is None:
+            # compressing megabytes takes a while, keep it off the event loop
+            task = asyncio.create_task(
+                asyncio.to_thread(compress, self.body, encoding)
+            )
+            self.encoded[encoding] = task
+        return await asyncio.shield(task)
+
+
+class ResponseCache:
+    def __init__(self, ttl: float = CACHE_TTL, stale_ttl: float = CACHE_STALE_TTL):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.entries: dict[str, CacheEntry] = {}
+        # running computations by key, generation and version
+        self.inflight: dict[tuple[str, int, Any], asyncio.Task] = {}
+        # bumped by `invalidate`, entries computed before are not served
+        self.generation = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.adapters: dict[Any, TypeAdapter] = {}
+
+    def _adapter(self, response_type: Any) -> TypeAdapter:
+        adapter = self.adapters.get(response_type)
+        if adapter is None:
+            adapter = self.adapters[response_type] = TypeAdapter(response_type)
+        return adapter
+
+    def invalidate(self, event: Any = None):
+        self.generation += 1
+        self.entries = {}
+
+    def clear(self):
+        self.invalidate()
+        self.hits = self.stale_hits = self.misses = self.coalesced = 0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "entries": len(self.entries),
+        }
+
+    async def get(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        response_type: Any,
+        version: Any = None,
+    ) -> CacheEntry:
+        """Return the entry for `key` at `version`, computing it with `compute` if needed."""
+        entry = self.entries.get(key)
+        if (
+            entry is not None
+            and entry.generation == self.generation
+            and entry.version == version
+        ):
+            age = time.monotonic() - entry.created_at
+            if age < self.ttl:
+                self.hits += 1
+                return entry
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._compute(key, compute, response_type, version)
+                return entry
+        if (key, self.generation, version) in self.inflight:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+        # shielded, a cancelled request must not cancel the shared computation
+        return await asyncio.shield(
+            self._compute(key, compute, response_type, version)
+        )
+
+    def _compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        response_type: Any,
+        version: Any,
+    ) -> asyncio.Task:
+        # computations started before an invalidation or for another version are not shared
+        task = self.inflight.get((key, self.generation, version))
+        if task is None:
+            task = asyncio.create_task(self._run(key, compute, response_type, version))
+            # revalidations run without a waiting request, errors are logged in _run
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self.inflight[(key, self.generation, version)] = task
+        return task
+
+    async def _run(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        response_type: Any,
+        version: Any,
+    ) -> CacheEntry:
+        generation = self.generation
+        try:
+            value = await compute()
+            # pydantic-core writes JSON as fast as orjson without a dict round trip
+            adapter = self._adapter(response_type)
+            body = adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+            # the version is read before the computation, the body is never older
+            entry = CacheEntry(body, generation, version)
+            # a write during the computation may have made the result outdated
+            if generation == self.generation:
+                self.entries[key] = entry
+            return entry
+        except Exception as e:
+            logger.error(f"Error computing cached response {key}: {e}")
+            raise
+        finally:
+            self.inflight.pop((key, generation, version), None)
+
+    async def response(
+        self,
+        request: Request,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        response_type: Any,
+        version: Any = None,
+    ) -> Response:
+        """
+        JSON response for `key`, compressed as negotiated with the client. With a
+        `version`, it carries the ETag and Cache-Control headers of the entry.
+        """
+        entry = await self.get(key, compute, response_type, version)
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        if len(entry.body) < COMPRESSION_MINIMUM_SIZE:
+            encoding = None
+        headers = {}
+        if encoding is not None:
+            # identity responses get their Vary header from GZipMiddleware
+            headers = {"Content-Encoding": encoding, "Vary": "Accept-Encoding"}
+        response = Response(
+            content=await entry.encode(encoding),
+            media_type="application/json",
+            headers=headers,
+        )
+        if entry.version is not None:
+            conditional.set_headers(
+                response, conditional.make_etag(request, *entry.version)
+            )
+        return response
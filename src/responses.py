@@ -0,0 +1,54 @@
+"""
+Compression of API responses negotiated from `Accept-Encoding`.
+
+The cached responses of the heavy endpoints are compressed once per cache
+entry and encoding (see response_cache.py). All other responses are gzipped
+by `GZipMiddleware` in main.py.
+"""
+
+import gzip
+import os
+from typing import Optional
+
+import brotli
+
+COMPRESSION_MINIMUM_SIZE = int(os.environ.get("AUDITOR_COMPRESSION_MINIMUM_SIZE", 1000))
+# brotli quality 4 compresses large JSON bodies better than 5-6 and ~5x faster
+BROTLI_QUALITY = int(os.environ.get("AUDITOR_BROTLI_QUALITY", 4))
+GZIP_LEVEL = int(os.environ.get("AUDITOR_GZIP_LEVEL", 6))
+
+# supported encodings in order of preference
+ENCODINGS = ("br", "gzip")
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the preferred supported encoding the client accepts, None for identity."""
+    if not accept_encoding:
+        return None
+    qualities: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    accepted = [
+        encoding
+        for encoding in ENCODINGS
+        if qualities.get(encoding, qualities.get("*", 0.0)) > 0
+    ]
+    if not accepted:
+        return None
+    return max(accepted, key=lambda encoding: qualities.get(encoding, qualities.get("*")))
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    raise ValueError(f"Unsupported encoding: {encoding}")
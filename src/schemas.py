@@ -10,6 +10,21 @@ class PaginationParams(BaseModel):
     limit: int = Field(
         default=100, ge=1, le=1000, description="Number of items to return"
     )
+    before: Optional[str] = Field(
+        default=None, description="Cursor, only return items older than it"
+    )
+    after: Optional[str] = Field(
+        default=None, description="Cursor, only return items newer than it"
+    )
+
+
+class MintProjectionParams(BaseModel):
+    fields: Optional[str] = Field(
+        default=None, description="Comma-separated mint fields to return"
+    )
+    exclude: Optional[str] = Field(
+        default=None, description="Comma-separated mint fields to leave out"
+    )
 
 
 class PaymentRequestResponse(BaseModel):
@@ -23,14 +38,50 @@ class MintState(Enum):
     UNKNOWN = "UNKNOWN"
 
 
+class SwapJournalState(Enum):
+    QUOTED = "QUOTED"  # quotes requested, no funds moved
+    MELTING = "MELTING"  # proofs reserved and possibly sent to the sending mint
+    MELTED = "MELTED"  # invoice paid, receiving mint not yet minted
+    MINTED = "MINTED"
+    FAILED = "FAILED"
+
+
+class CircuitState(Enum):
+    CLOSED = "CLOSED"  # the mint takes part in swaps
+    OPEN = "OPEN"  # failing, skipped until its `next_update`
+    HALF_OPEN = "HALF_OPEN"  # backoff elapsed, waiting for a probe
+
+
 class ChargeRequest(BaseModel):
     token: str
 
 
-class MintRead(BaseModel):
+class DonationStatus(Enum):
+    QUEUED = "QUEUED"
+    PROCESSING = "PROCESSING"
+    RECEIVED = "RECEIVED"
+    FAILED = "FAILED"
+
+
+class DonationRead(BaseModel):
+    id: int
+    mint_url: str
+    amount: int
+    status: DonationStatus
+    received: Optional[int] = None
+    mint_id: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class MintSummary(BaseModel):
+    """A mint without its large `info` column, the default of list views."""
+
     id: int
     url: str
-    info: Optional[str] = None
     name: str
     balance: int
     sum_donations: int
@@ -46,6 +97,10 @@ class MintRead(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class MintRead(MintSummary):
+    info: Optional[str] = None
+
+
 class SwapEventRead(BaseModel):
     id: int
     from_id: int
@@ -62,6 +117,22 @@ class SwapEventRead(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class SwapTimingsRead(BaseModel):
+    """Durations of the phases of a swap in milliseconds, None if not reached."""
+
+    swap_id: int
+    load_to_mint: Optional[float] = None
+    load_from_mint: Optional[float] = None
+    request_mint: Optional[float] = None
+    melt_quote: Optional[float] = None
+    select_to_send: Optional[float] = None
+    melt: Optional[float] = None
+    quote_wait: Optional[float] = None
+    mint: Optional[float] = None
+
+    model_config = {"from_attributes": True}
+
+
 class MintGraphEdge(BaseModel):
     from_id: int
     to_id: int
@@ -73,7 +144,7 @@ class MintGraphEdge(BaseModel):
 
 
 class MintGraph(BaseModel):
-    nodes: list[MintRead]
+    nodes: list[MintSummary]
     edges: list[MintGraphEdge]
 
 
@@ -85,3 +156,41 @@ class MintStats(BaseModel):
     total_amount_swapped_24h: int
     average_swap_time: float
     average_swap_time_24h: float
+
+
+class SwapStats(BaseModel):
+    count: int
+    n_ok: int
+    n_error: int
+    amount: int
+    fee: int
+    average_time: float
+    min_time: Optional[float] = None
+    max_time: Optional[float] = None
+
+
+class MintSwapStats(BaseModel):
+    mint_id: int
+    windows: dict[str, SwapStats]
+
+
+class PhaseTiming(BaseModel):
+    count: int
+    average_time: float
+    min_time: Optional[float] = None
+    max_time: Optional[float] = None
+
+
+class MintSwapTimings(BaseModel):
+    mint_id: int
+    # phases the mint ran as the sender and as the receiver of swaps
+    sent: dict[str, PhaseTiming]
+    received: dict[str, PhaseTiming]
+
+
+class CacheStats(BaseModel):
+    hits: int
+    stale_hits: int
+    misses: int
+    coalesced: int
+    entries: int
@@ -0,0 +1,187 @@
+"""
+Swap statistics served from the hourly rollup table `swap_stats_hourly`.
+
+The rollup is keyed by hour and sending mint and is kept up to date by a
+trigger on `swaps`. Time windows are answered from the full hours in the
+rollup plus the swaps of the partial first hour, which are read from `swaps`
+through the `created_at` index, so results are exact.
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import case, delete, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models, schemas
+from .swap_timings import RECEIVER_PHASES, SENDER_PHASES
+
+WINDOWS = {
+    "1h": timedelta(hours=1),
+    "24h": timedelta(hours=24),
+    "7d": timedelta(days=7),
+    "30d": timedelta(days=30),
+}
+
+
+def floor_hour(dt: datetime) -> datetime:
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+async def backfill(db: AsyncSession):
+    """Rebuild the rollup from the full swap history."""
+    await db.execute(delete(models.SwapStatsHourly))
+    await db.execute(text(models.SWAP_STATS_HOURLY_BACKFILL_SQL))
+    await db.commit()
+
+
+def _combine(rows: list) -> schemas.SwapStats:
+    count = sum(row[0] or 0 for row in rows)
+    time_taken_sum = sum(row[5] or 0 for row in rows)
+    minimums = [row[6] for row in rows if row[6] is not None]
+    maximums = [row[7] for row in rows if row[7] is not None]
+    return schemas.SwapStats(
+        count=count,
+        n_ok=sum(row[1] or 0 for row in rows),
+        n_error=sum(row[2] or 0 for row in rows),
+        amount=sum(row[3] or 0 for row in rows),
+        fee=sum(row[4] or 0 for row in rows),
+        average_time=time_taken_sum / count if count else 0,
+        min_time=min(minimums) if minimums else None,
+        max_time=max(maximums) if maximums else None,
+    )
+
+
+async def swap_stats(
+    db: AsyncSession,
+    since: Optional[datetime] = None,
+    mint_id: Optional[int] = None,
+) -> schemas.SwapStats:
+    """Aggregate swaps created after `since` (all time if None), optionally of one sending mint."""
+    hourly = models.SwapStatsHourly
+    query = select(
+        func.sum(hourly.count),
+        func.sum(hourly.n_ok),
+        func.sum(hourly.n_error),
+        func.sum(hourly.amount),
+        func.sum(hourly.fee),
+        func.sum(hourly.time_taken_sum),
+        func.min(hourly.time_taken_min),
+        func.max(hourly.time_taken_max),
+    )
+    if mint_id is not None:
+        query = query.where(hourly.mint_id == mint_id)
+    if since is None:
+        return _combine([(await db.execute(query)).one()])
+
+    # full hours from the rollup, the partial first hour from swaps
+    boundary = floor_hour(since) + timedelta(hours=1)
+    query = query.where(hourly.bucket >= boundary)
+    swap = models.SwapEvent
+    edge_query = select(
+        func.count(swap.id),
+        func.sum(case((swap.state == schemas.MintState.OK.value, 1), else_=0)),
+        func.sum(case((swap.state == schemas.MintState.ERROR.value, 1), else_=0)),
+        func.sum(swap.amount),
+        func.sum(swap.fee),
+        func.sum(swap.time_taken),
+        func.min(swap.time_taken),
+        func.max(swap.time_taken),
+    ).where(swap.created_at >= since, swap.created_at < boundary)
+    if mint_id is not None:
+        edge_query = edge_query.where(swap.from_id == mint_id)
+    rows = [(await db.execute(query)).one(), (await db.execute(edge_query)).one()]
+    return _combine(rows)
+
+
+async def swap_edges(db: AsyncSession, since: Optional[datetime] = None) -> list[dict]:
+    """
+    Swaps aggregated per (from_id, to_id) pair. All-time edges are read from
+    the `swap_edges` table, edges of a time window from `swaps` through the
+    `created_at` index.
+    """
+    if since is None:
+        edge = models.SwapEdge
+        result = await db.execute(
+            select(
+                edge.from_id,
+                edge.to_id,
+                edge.count,
+                edge.total_amount,
+                edge.total_fee,
+                edge.last_swap,
+                edge.last_state,
+            ).order_by(edge.from_id, edge.to_id)
+        )
+    else:
+        swap = models.SwapEvent
+        # SQLite returns the bare `state` column of the row holding max(created_at)
+        result = await db.execute(
+            select(
+                swap.from_id,
+                swap.to_id,
+                func.count(swap.id),
+                func.sum(func.coalesce(swap.amount, 0)),
+                func.sum(func.coalesce(swap.fee, 0)),
+                func.max(swap.created_at),
+                swap.state,
+            )
+            .where(swap.created_at >= since)
+            .group_by(swap.from_id, swap.to_id)
+            .order_by(swap.from_id, swap.to_id)
+        )
+    return [
+        {
+            "from_id": from_id,
+            "to_id": to_id,
+            "count": count,
+            "total_amount": total_amount,
+            "total_fee": total_fee,
+            "last_swap": last_swap,
+            "state": schemas.MintState(state),
+        }
+        for from_id, to_id, count, total_amount, total_fee, last_swap, state in result.all()
+    ]
+
+
+async def _phase_timings(
+    db: AsyncSession, mint_column, mint_id: int, phases: tuple, since: Optional[datetime]
+) -> dict[str, schemas.PhaseTiming]:
+    timings = models.SwapTimings
+    columns = []
+    for phase in phases:
+        column = getattr(timings, phase)
+        columns += [func.count(column), func.avg(column), func.min(column), func.max(column)]
+    query = (
+        select(*columns)
+        .join(models.SwapEvent, models.SwapEvent.id == timings.swap_id)
+        .where(mint_column == mint_id)
+    )
+    if since is not None:
+        query = query.where(models.SwapEvent.created_at >= since)
+    row = (await db.execute(query)).one()
+    return {
+        phase: schemas.PhaseTiming(
+            count=row[4 * i],
+            average_time=row[4 * i + 1] or 0,
+            min_time=row[4 * i + 2],
+            max_time=row[4 * i + 3],
+        )
+        for i, phase in enumerate(phases)
+    }
+
+
+async def swap_timings(
+    db: AsyncSession, mint_id: int, since: Optional[datetime] = None
+) -> schemas.MintSwapTimings:
+    """
+    Phase durations of the swaps of a mint created after `since` (all time
+    if None). Each phase is attributed to the mint it talks to: the sending
+    phases to the sending mint, the receiving phases to the receiving mint.
+    """
+    swap = models.SwapEvent
+    return schemas.MintSwapTimings(
+        mint_id=mint_id,
+        sent=await _phase_timings(db, swap.from_id, mint_id, SENDER_PHASES, since),
+        received=await _phase_timings(db, swap.to_id, mint_id, RECEIVER_PHASES, since),
+    )
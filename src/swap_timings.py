@@ -0,0 +1,40 @@
+"""
+Per-phase timings of a swap, stored in `swap_timings` next to its SwapEvent.
+
+Each phase talks to one of the two mints: the sending mint loads, quotes and
+pays the invoice, the receiving mint loads, creates the invoice and mints.
+Selecting the proofs to send is local to the sending wallet.
+"""
+
+import time
+from contextlib import contextmanager
+
+# phases of a swap in the order they run, with the mint they talk to
+SENDER_PHASES = ("load_from_mint", "melt_quote", "select_to_send", "melt")
+RECEIVER_PHASES = ("load_to_mint", "request_mint", "quote_wait", "mint")
+PHASES = (
+    "load_to_mint",
+    "load_from_mint",
+    "request_mint",
+    "melt_quote",
+    "select_to_send",
+    "melt",
+    "quote_wait",
+    "mint",
+)
+
+
+class PhaseTimer:
+    """Monotonic durations (in milliseconds) of the phases of a swap."""
+
+    def __init__(self):
+        self.phases: dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        # failed phases are timed too, a timeout is what we want to see
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = (time.perf_counter() - start) * 1000
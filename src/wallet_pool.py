@@ -0,0 +1,165 @@
+"""
+WalletPool: Keeps long-lived Nutshell wallets per mint URL.
+
+Creating a wallet with `Wallet.with_db` runs the wallet database migrations and
+reads the seed and keysets from disk every time. The pool does this once per
+mint, keeps the loaded keysets, mint info and proofs in memory and evicts
+wallets that have not been used for a while.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from cashu.wallet.wallet import Wallet
+from loguru import logger
+
+WALLET_POOL_SIZE = int(os.environ.get("AUDITOR_WALLET_POOL_SIZE", 256))
+WALLET_IDLE_TTL = int(os.environ.get("AUDITOR_WALLET_IDLE_TTL", 60 * 60))  # seconds
+MINT_RELOAD_TTL = int(os.environ.get("AUDITOR_MINT_RELOAD_TTL", 10 * 60))  # seconds
+
+
+class _MigratedWallet(Wallet):
+    """Wallet whose database migrations already ran in this process."""
+
+    async def _migrate_database(self):
+        pass
+
+
+class PooledWallet:
+    def __init__(self, wallet: Wallet):
+        self.wallet = wallet
+        self.last_used = time.monotonic()
+        self.mint_loaded_at: Optional[float] = None
+
+
+class WalletPool:
+    """
+    LRU pool of wallets keyed by mint URL.
+
+    Use `acquire` for exclusive access to a mint's wallet (swaps, minting,
+    receiving) and `get` for read-only access such as reading the balance.
+    """
+
+    def __init__(
+        self,
+        db_dir: str = ".",
+        max_size: int = WALLET_POOL_SIZE,
+        idle_ttl: float = WALLET_IDLE_TTL,
+        mint_reload_ttl: float = MINT_RELOAD_TTL,
+    ):
+        self.db_dir = db_dir
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.mint_reload_ttl = mint_reload_ttl
+        self.entries: OrderedDict[str, PooledWallet] = OrderedDict()
+        self.locks: dict[str, asyncio.Lock] = {}
+        self.migrated = False
+        # the per-mint locks don't keep different mints from migrating at once
+        self.migration_lock = asyncio.Lock()
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return url.rstrip("/")
+
+    def _lock(self, key: str) -> asyncio.Lock:
+        return self.locks.setdefault(key, asyncio.Lock())
+
+    async def _open_wallet(self, url: str) -> Wallet:
+        if self.migrated:
+            wallet = await _MigratedWallet.with_db(url, self.db_dir)
+        else:
+            # only the first wallet of this process runs the migrations of the
+            # shared database, concurrent first opens wait for it to finish
+            async with self.migration_lock:
+                wallet_cls = _MigratedWallet if self.migrated else Wallet
+                wallet = await wallet_cls.with_db(url, self.db_dir)
+                self.migrated = True
+        await wallet.load_proofs(reload=True)
+        return wallet
+
+    async def _get_or_open(self, key: str) -> PooledWallet:
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = PooledWallet(await self._open_wallet(key))
+            self.entries[key] = entry
+            logger.debug(f"Opened pooled wallet for {key} ({len(self.entries)})")
+            await self.evict()
+        self.entries.move_to_end(key)
+        entry.last_used = time.monotonic()
+        return entry
+
+    async def get(self, url: str) -> Wallet:
+        """Return the warm wallet for `url`, opening it if necessary."""
+        key = self._key(url)
+        async with self._lock(key):
+            entry = await self._get_or_open(key)
+        return entry.wallet
+
+    @asynccontextmanager
+    async def acquire(self, url: str, load_mint: bool = False) -> AsyncIterator[Wallet]:
+        """Hold the wallet for `url` exclusively for the duration of the block."""
+        key = self._key(url)
+        async with self._lock(key):
+            entry = await self._get_or_open(key)
+            if load_mint:
+                await self._load_mint(entry)
+            try:
+                yield entry.wallet
+            finally:
+                entry.last_used = time.monotonic()
+
+    async def load_mint(self, wallet: Wallet, force: bool = False):
+        """Load keysets and mint info unless they were loaded recently."""
+        entry = self.entries.get(self._key(wallet.url))
+        if entry is None or entry.wallet is not wallet:
+            await wallet.load_mint()
+            return
+        await self._load_mint(entry, force=force)
+
+    async def _load_mint(self, entry: PooledWallet, force: bool = False):
+        now = time.monotonic()
+        if (
+            not force
+            and entry.mint_loaded_at is not None
+            and now - entry.mint_loaded_at < self.mint_reload_ttl
+        ):
+            return
+        await entry.wallet.load_mint()
+        entry.mint_loaded_at = now
+
+    async def evict(self):
+        """Drop idle wallets and the least recently used ones above `max_size`."""
+        now = time.monotonic()
+        for key in list(self.entries.keys()):
+            entry = self.entries.get(key)
+            if entry is None:
+                # closed by a concurrent eviction while we awaited
+                continue
+            over_size = len(self.entries) > self.max_size
+            idle = now - entry.last_used > self.idle_ttl
+            if not over_size and not idle:
+                continue
+            lock = self.locks.get(key)
+            if lock is not None and lock.locked():
+                continue
+            await self._close(key)
+
+    async def _close(self, key: str):
+        # popped before the await, a concurrent eviction skips the key
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self.locks.pop(key, None)
+        try:
+            await entry.wallet.db.engine.dispose()
+        except Exception as e:
+            logger.warning(f"Error closing wallet for {key}: {e}")
+        logger.debug(f"Evicted pooled wallet for {key}")
+
+    async def close(self):
+        for key in list(self.entries.keys()):
+            await self._close(key)
@@ -4,7 +4,7 @@ import os
 import pytest_asyncio
 from httpx import AsyncClient
 
-from src.main import app
+from src.main import app, auditor, donation_queue, response_cache
 from src.database import engine
 from src.models import Base
 
@@ -15,9 +15,18 @@ os.environ["TESTING"] = "True"
 async def async_client():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    auditor.mints.clear()
+    response_cache.clear()
+    # queues and workers are bound to the event loop of the test
+    auditor.events.reset()
+    donation_queue.reset()
 
     async with AsyncClient(app=app, base_url="http://test") as client:
         yield client
 
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+    # pools whose connections were waited for are bound to this test's loop
+    await engine.dispose()
+    auditor.mints.clear()
+    response_cache.clear()
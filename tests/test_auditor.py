@@ -1,17 +1,22 @@
 # tests/test_auditor.py
 
+import asyncio
+from contextlib import asynccontextmanager
+
 import pytest
 import pytest_asyncio
 from unittest.mock import AsyncMock
 from datetime import datetime
 from types import SimpleNamespace
 
+from cashu.core.base import MeltQuoteState, MintQuoteState, Unit
+from src import auditor as auditor_module
 from src.auditor import Auditor
-from src.models import Mint, Base
-from src.schemas import MintState
+from src.models import Mint, Base, SwapEvent, SwapJournal
+from src.schemas import MintState, SwapJournalState
 from src.database import engine
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 
 
 @pytest_asyncio.fixture(scope="function")
@@ -88,38 +93,6 @@ async def test_bump_mint_n_mints(db_setup):
         assert updated_mint.n_mints == initial_mints + 1
 
 
-@pytest.mark.asyncio
-async def test_bump_mint_n_melts(db_setup):
-    """Test bumping melt count for a mint."""
-    auditor = Auditor()
-
-    async with AsyncSession(engine) as session:
-        mint = Mint(
-            url="https://testmint.example.com",
-            name="Test Mint",
-            balance=100,
-            sum_donations=100,
-            updated_at=datetime.utcnow(),
-            next_update=datetime.utcnow(),
-            state=MintState.UNKNOWN.value,
-            n_errors=0,
-            n_mints=0,
-            n_melts=0,
-        )
-        session.add(mint)
-        await session.commit()
-        await session.refresh(mint)
-        initial_melts = mint.n_melts
-
-    await auditor.bump_mint_n_melts(mint)
-
-    async with AsyncSession(engine) as session:
-        result = await session.execute(select(Mint).where(Mint.id == mint.id))
-        updated_mint = result.scalars().first()
-        assert updated_mint.n_melts == initial_melts + 1
-        assert updated_mint.state == MintState.OK.value
-
-
 @pytest.mark.asyncio
 async def test_get_mint(db_setup):
     """Test getting a mint by URL."""
@@ -157,8 +130,8 @@ async def test_get_mint_not_found(db_setup):
 
 
 @pytest.mark.asyncio
-async def test_store_swap_event(db_setup):
-    """Test storing a swap event."""
+async def test_store_swap_outcome_stores_swap_event(db_setup):
+    """Test storing the swap event of a swap outcome."""
     auditor = Auditor()
 
     async with AsyncSession(engine) as session:
@@ -192,9 +165,11 @@ async def test_store_swap_event(db_setup):
         await session.refresh(mint1)
         await session.refresh(mint2)
 
-    await auditor.store_swap_event(
+    await auditor.store_swap_outcome(
         from_mint=mint1,
+        from_wallet=fake_wallet(50),
         to_mint=mint2,
+        to_wallet=fake_wallet(250),
         amount=50,
         fee=1,
         time_taken=100,
@@ -218,8 +193,8 @@ async def test_store_swap_event(db_setup):
 
 
 @pytest.mark.asyncio
-async def test_store_swap_event_with_error(db_setup):
-    """Test storing a swap event with an error."""
+async def test_store_swap_outcome_stores_error(db_setup):
+    """Test storing the swap event of a failed swap."""
     auditor = Auditor()
 
     async with AsyncSession(engine) as session:
@@ -253,9 +228,11 @@ async def test_store_swap_event_with_error(db_setup):
         await session.refresh(mint1)
         await session.refresh(mint2)
 
-    await auditor.store_swap_event(
+    await auditor.store_swap_outcome(
         from_mint=mint1,
+        from_wallet=fake_wallet(100),
         to_mint=mint2,
+        to_wallet=fake_wallet(200),
         amount=50,
         fee=0,
         time_taken=0,
@@ -491,3 +468,729 @@ async def test_recover_errors_unhandled():
     wallet = SimpleNamespace(proofs=[])
     handled = await auditor.recover_errors(wallet, Exception("other error"))
     assert handled is False
+
+
+def make_mint(url: str, balance: int, sum_donations: int, state=MintState.OK) -> Mint:
+    return Mint(
+        url=url,
+        name=url,
+        balance=balance,
+        sum_donations=sum_donations,
+        updated_at=datetime.utcnow(),
+        next_update=datetime.utcnow(),
+        state=state.value,
+        n_errors=0,
+        n_mints=0,
+        n_melts=0,
+    )
+
+
+@pytest.mark.asyncio
+async def test_reserve_swap_pair_is_disjoint(db_setup):
+    auditor = Auditor()
+    async with AsyncSession(engine) as session:
+        session.add_all(
+            [
+                make_mint(f"https://mint{i}.example.com", 500, 1000)
+                for i in range(4)
+            ]
+        )
+        await session.commit()
+
+    to_a, from_a, _ = await auditor.reserve_swap_pair()
+    to_b, from_b, _ = await auditor.reserve_swap_pair()
+    assert len({to_a.id, from_a.id, to_b.id, from_b.id}) == 4
+    assert auditor.busy_mints == {to_a.id, from_a.id, to_b.id, from_b.id}
+
+    # all mints are busy, no third lane can start
+    with pytest.raises(ValueError):
+        await auditor.reserve_swap_pair()
+
+    auditor.release_swap_pair(to_a, from_a)
+    assert auditor.busy_mints == {to_b.id, from_b.id}
+    to_c, from_c, _ = await auditor.reserve_swap_pair()
+    assert {to_c.id, from_c.id} == {to_a.id, from_a.id}
+
+
+@pytest.mark.asyncio
+async def test_choose_from_mint_and_amount_excludes_busy(db_setup, monkeypatch):
+    auditor = Auditor()
+    async with AsyncSession(engine) as session:
+        to_mint = make_mint("https://mint-target.example.com", 40, 200)
+        busy_mint = make_mint("https://mint-busy.example.com", 500, 400)
+        idle_mint = make_mint("https://mint-idle.example.com", 300, 400)
+        session.add_all([to_mint, busy_mint, idle_mint])
+        await session.commit()
+        await session.refresh(to_mint)
+        await session.refresh(busy_mint)
+        await session.refresh(idle_mint)
+
+    monkeypatch.setattr("src.auditor.random.randint", lambda *_: 50)
+    monkeypatch.setattr("src.auditor.random.choice", lambda seq: seq[0])
+
+    from_mint, amount = await auditor.choose_from_mint_and_amount(
+        to_mint, exclude={busy_mint.id}
+    )
+    assert from_mint.id == idle_mint.id
+    assert amount == 50
+
+
+@pytest.mark.asyncio
+async def test_failing_mint_is_skipped_until_probed(db_setup, monkeypatch):
+    from datetime import timedelta
+
+    from src.circuit_breaker import circuit_state
+    from src.schemas import CircuitState
+
+    auditor = Auditor()
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        failing = make_mint("https://mint-failing.example.com", 10, 100)
+        healthy = make_mint("https://mint-healthy.example.com", 20, 100)
+        session.add_all([failing, healthy])
+        await session.commit()
+
+    await auditor.bump_mint_errors(failing.id)
+    stored = await auditor.mints.get(failing.id)
+    assert stored.state == MintState.ERROR.value
+    assert circuit_state(stored) == CircuitState.OPEN
+    for _ in range(5):
+        chosen = await auditor.choose_to_mint()
+        assert chosen.url == "https://mint-healthy.example.com"
+
+    # open circuits are not probed
+    probed = []
+
+    async def fake_get(url):
+        async def get_info():
+            probed.append(url)
+
+        return SimpleNamespace(_get_info=get_info)
+
+    monkeypatch.setattr(auditor.wallets, "get", fake_get)
+    await auditor.probe_mints()
+    assert probed == []
+
+    # once the backoff elapsed, a successful probe closes the circuit
+    async with AsyncSession(engine) as session:
+        await session.execute(
+            update(Mint)
+            .where(Mint.id == failing.id)
+            .values(next_update=datetime.utcnow() - timedelta(seconds=1))
+        )
+        await session.commit()
+    await auditor.mints.refresh([failing.id])
+    assert circuit_state(await auditor.mints.get(failing.id)) == CircuitState.HALF_OPEN
+    await auditor.probe_mints()
+    assert probed == ["https://mint-failing.example.com"]
+    stored = await auditor.mints.get(failing.id)
+    assert stored.next_update is None
+    assert circuit_state(stored) == CircuitState.CLOSED
+    assert failing.id not in auditor.breaker.failures
+
+
+@pytest.mark.asyncio
+async def test_failed_probe_reopens_with_longer_backoff(db_setup, monkeypatch):
+    from datetime import timedelta
+
+    from src.circuit_breaker import circuit_state
+    from src.schemas import CircuitState
+
+    auditor = Auditor()
+    auditor.breaker.failures[1] = 3
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        mint = make_mint("https://mint-down.example.com", 10, 100, MintState.ERROR)
+        mint.next_update = datetime.utcnow() - timedelta(seconds=1)
+        session.add(mint)
+        await session.commit()
+    assert mint.id == 1
+
+    async def fake_get(url):
+        async def get_info():
+            raise Exception("connection refused")
+
+        return SimpleNamespace(_get_info=get_info)
+
+    monkeypatch.setattr(auditor.wallets, "get", fake_get)
+    start = datetime.utcnow()
+    await auditor.probe_mints()
+    stored = await auditor.mints.get(mint.id)
+    assert circuit_state(stored) == CircuitState.OPEN
+    assert auditor.breaker.failures[mint.id] == 4
+    # the fourth failure backs off for half to all of 8 base backoffs
+    backoff = (stored.next_update - start).total_seconds()
+    assert backoff >= 4 * auditor.breaker.base - 1
+
+
+@pytest.mark.asyncio
+async def test_update_all_balances_skips_slow_mints(db_setup, monkeypatch):
+    auditor = Auditor()
+    async with AsyncSession(engine) as session:
+        session.add_all(
+            [
+                make_mint("https://mint-fast.example.com", 10, 100),
+                make_mint("https://mint-slow.example.com", 20, 100),
+                make_mint("https://mint-broken.example.com", 30, 100),
+            ]
+        )
+        await session.commit()
+
+    async def fake_get(url):
+        if "slow" in url:
+            await asyncio.sleep(1)
+        if "broken" in url:
+            raise Exception("boom")
+        return SimpleNamespace(available_balance=SimpleNamespace(amount=77))
+
+    monkeypatch.setattr("src.auditor.REFRESH_TIMEOUT", 0.05)
+    monkeypatch.setattr(auditor.wallets, "get", fake_get)
+    await auditor.update_all_balances()
+
+    async with AsyncSession(engine) as session:
+        result = await session.execute(select(Mint).order_by(Mint.id))
+        balances = {mint.url: mint.balance for mint in result.scalars().all()}
+    assert balances == {
+        "https://mint-fast.example.com": 77,
+        "https://mint-slow.example.com": 20,
+        "https://mint-broken.example.com": 30,
+    }
+
+
+@pytest.mark.asyncio
+async def test_refresh_mints_bounded_concurrency(monkeypatch):
+    auditor = Auditor()
+    running = 0
+    max_running = 0
+
+    async def job(mint):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return mint.id
+
+    monkeypatch.setattr("src.auditor.REFRESH_CONCURRENCY", 3)
+    mints = [SimpleNamespace(id=i, url=f"https://mint{i}.example.com") for i in range(10)]
+    results = await auditor.refresh_mints(mints, job)
+    assert [result for _, result in results] == list(range(10))
+    assert max_running == 3
+
+
+def fake_wallet(balance: int, name: str = "Wallet Mint"):
+    mint_info = SimpleNamespace(name=name, dict=lambda: {"name": name})
+    return SimpleNamespace(
+        available_balance=SimpleNamespace(amount=balance), mint_info=mint_info
+    )
+
+
+@pytest.mark.asyncio
+async def test_store_swap_outcome_success(db_setup):
+    auditor = Auditor()
+    async with AsyncSession(engine) as session:
+        from_mint = make_mint("https://mint-from.example.com", 100, 100)
+        to_mint = make_mint("https://mint-to.example.com", 50, 100, MintState.UNKNOWN)
+        session.add_all([from_mint, to_mint])
+        await session.commit()
+        await session.refresh(from_mint)
+        await session.refresh(to_mint)
+
+    await auditor.store_swap_outcome(
+        from_mint,
+        fake_wallet(59, "From"),
+        to_mint,
+        fake_wallet(90, "To"),
+        amount=40,
+        fee=1,
+        time_taken=120,
+        state=MintState.OK.value,
+    )
+
+    async with AsyncSession(engine) as session:
+        from src.models import SwapEvent
+
+        stored_from = await session.get(Mint, from_mint.id)
+        stored_to = await session.get(Mint, to_mint.id)
+        assert (stored_from.balance, stored_from.n_melts) == (59, 1)
+        assert stored_from.state == MintState.OK.value
+        assert stored_from.name == "From"
+        assert (stored_to.balance, stored_to.n_mints) == (90, 1)
+        assert stored_to.state == MintState.UNKNOWN.value
+        result = await session.execute(select(SwapEvent))
+        swap = result.scalars().one()
+        assert (swap.amount, swap.fee, swap.state) == (40, 1, MintState.OK.value)
+
+
+@pytest.mark.asyncio
+async def test_store_swap_outcome_stores_timings(db_setup):
+    from src.models import SwapTimings
+    from src.swap_timings import PhaseTimer
+
+    auditor = Auditor()
+    async with AsyncSession(engine) as session:
+        from_mint = make_mint("https://mint-from.example.com", 100, 100)
+        to_mint = make_mint("https://mint-to.example.com", 50, 100)
+        session.add_all([from_mint, to_mint])
+        await session.commit()
+        await session.refresh(from_mint)
+        await session.refresh(to_mint)
+
+    timer = PhaseTimer()
+    with timer.phase("load_to_mint"):
+        pass
+    with pytest.raises(RuntimeError):
+        with timer.phase("melt_quote"):
+            raise RuntimeError("timeout")
+    assert set(timer.phases) == {"load_to_mint", "melt_quote"}
+
+    await auditor.store_swap_outcome(
+        from_mint,
+        fake_wallet(100),
+        to_mint,
+        fake_wallet(50),
+        amount=40,
+        fee=0,
+        time_taken=0,
+        state=MintState.ERROR.value,
+        error="melt quote failed",
+        timings=timer.phases,
+    )
+
+    async with AsyncSession(engine) as session:
+        swap = (await session.execute(select(SwapEvent))).scalars().one()
+        timings = await session.get(SwapTimings, swap.id)
+        assert timings.melt_quote == timer.phases["melt_quote"]
+        assert timings.load_to_mint >= 0
+        assert timings.melt is None
+
+
+@pytest.mark.asyncio
+async def test_store_swap_outcome_error(db_setup):
+    auditor = Auditor()
+    async with AsyncSession(engine) as session:
+        from_mint = make_mint("https://mint-from.example.com", 100, 100)
+        to_mint = make_mint("https://mint-to.example.com", 50, 100)
+        session.add_all([from_mint, to_mint])
+        await session.commit()
+        await session.refresh(from_mint)
+        await session.refresh(to_mint)
+
+    await auditor.store_swap_outcome(
+        from_mint,
+        fake_wallet(100),
+        to_mint,
+        fake_wallet(50),
+        amount=40,
+        fee=0,
+        time_taken=0,
+        state=MintState.ERROR.value,
+        error="melt failed",
+    )
+
+    async with AsyncSession(engine) as session:
+        stored_from = await session.get(Mint, from_mint.id)
+        stored_to = await session.get(Mint, to_mint.id)
+        assert stored_from.n_errors == 1
+        assert stored_from.n_melts == 0
+        assert stored_from.state == MintState.ERROR.value
+        assert stored_to.n_mints == 0
+        assert stored_to.state == MintState.OK.value
+
+
+@pytest.mark.asyncio
+async def test_store_swap_outcome_publishes_events(db_setup):
+    auditor = Auditor()
+    async with AsyncSession(engine) as session:
+        from_mint = make_mint("https://mint-from.example.com", 100, 100)
+        to_mint = make_mint("https://mint-to.example.com", 50, 100)
+        session.add_all([from_mint, to_mint])
+        await session.commit()
+        await session.refresh(from_mint)
+        await session.refresh(to_mint)
+    await auditor.mints.load()
+    queue = auditor.stream.subscribe()
+
+    await auditor.store_swap_outcome(
+        from_mint,
+        fake_wallet(59),
+        to_mint,
+        fake_wallet(90),
+        amount=40,
+        fee=1,
+        time_taken=120,
+        state=MintState.OK.value,
+    )
+    await auditor.events.join()
+
+    messages = []
+    while not queue.empty():
+        messages.append(queue.get_nowait())
+    events = [message.split("\n")[0] for message in messages]
+    assert events.count("event: mint") == 2
+    assert events.count("event: swap") == 1
+    assert '"amount":40' in messages[events.index("event: swap")]
+    await auditor.events.close()
+
+
+class FakeWalletPool:
+    def __init__(self, wallets: dict):
+        self.wallets = wallets
+        self.acquired: list[str] = []
+
+    @asynccontextmanager
+    async def acquire(self, url: str, load_mint: bool = False):
+        self.acquired.append(url)
+        yield self.wallets[url]
+
+
+def swap_wallet(balance: int, **methods):
+    wallet = fake_wallet(balance)
+    wallet.load_proofs = AsyncMock()
+    for name, method in methods.items():
+        setattr(wallet, name, method)
+    return wallet
+
+
+async def journal_swap(state: SwapJournalState, **overrides) -> tuple[int, Mint, Mint]:
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        from_mint = make_mint("https://mint-from.example.com", 100, 100)
+        to_mint = make_mint("https://mint-to.example.com", 50, 100)
+        session.add_all([from_mint, to_mint])
+        await session.flush()
+        entry = SwapJournal(
+            from_id=from_mint.id,
+            to_id=to_mint.id,
+            amount=40,
+            mint_quote="mint-quote",
+            melt_quote="melt-quote",
+            state=state.value,
+            **overrides,
+        )
+        session.add(entry)
+        await session.commit()
+    return entry.id, from_mint, to_mint
+
+
+async def journal_state(journal_id: int) -> SwapJournal:
+    async with AsyncSession(engine) as session:
+        return await session.get(SwapJournal, journal_id)
+
+
+@pytest.mark.asyncio
+async def test_resume_swaps_mints_paid_invoice(db_setup):
+    auditor = Auditor()
+    journal_id, from_mint, to_mint = await journal_swap(
+        SwapJournalState.MELTED, fee=1, time_taken=300
+    )
+    mint = AsyncMock(return_value=[])
+    to_wallet = swap_wallet(
+        90,
+        get_mint_quote=AsyncMock(return_value=SimpleNamespace(state=MintQuoteState.paid)),
+        mint=mint,
+    )
+    auditor.wallets = FakeWalletPool(
+        {from_mint.url: swap_wallet(59), to_mint.url: to_wallet}
+    )
+
+    await auditor.resume_swaps()
+
+    mint.assert_awaited_once_with(40, "mint-quote")
+    assert (await journal_state(journal_id)).state == SwapJournalState.MINTED.value
+    async with AsyncSession(engine) as session:
+        swap = (await session.execute(select(SwapEvent))).scalars().one()
+        assert (swap.amount, swap.fee, swap.time_taken) == (40, 1, 300)
+        assert swap.state == MintState.OK.value
+        assert (await session.get(Mint, to_mint.id)).balance == 90
+
+
+@pytest.mark.asyncio
+async def test_resume_swaps_rolls_back_unpaid_melt(db_setup, monkeypatch):
+    auditor = Auditor()
+    journal_id, from_mint, to_mint = await journal_swap(SwapJournalState.MELTING)
+    from_wallet = swap_wallet(
+        100,
+        get_melt_quote=AsyncMock(
+            return_value=SimpleNamespace(state=MeltQuoteState.unpaid)
+        ),
+    )
+    to_wallet = swap_wallet(50, get_mint_quote=AsyncMock(), mint=AsyncMock())
+    auditor.wallets = FakeWalletPool({from_mint.url: from_wallet, to_mint.url: to_wallet})
+    check_proofs = AsyncMock()
+    monkeypatch.setattr(auditor, "check_proofs", check_proofs)
+
+    await auditor.resume_swaps()
+
+    check_proofs.assert_awaited_once_with(from_wallet)
+    to_wallet.mint.assert_not_awaited()
+    entry = await journal_state(journal_id)
+    assert entry.state == SwapJournalState.FAILED.value
+    async with AsyncSession(engine) as session:
+        assert (await session.execute(select(SwapEvent))).scalars().all() == []
+
+
+@pytest.mark.asyncio
+async def test_resume_swaps_completes_issued_swap(db_setup):
+    # the process stopped after minting but before the journal was updated
+    auditor = Auditor()
+    journal_id, from_mint, to_mint = await journal_swap(SwapJournalState.MELTING)
+    from_wallet = swap_wallet(
+        59,
+        get_melt_quote=AsyncMock(return_value=SimpleNamespace(state=MeltQuoteState.paid)),
+    )
+    to_wallet = swap_wallet(
+        90,
+        get_mint_quote=AsyncMock(
+            return_value=SimpleNamespace(state=MintQuoteState.issued)
+        ),
+        mint=AsyncMock(),
+    )
+    auditor.wallets = FakeWalletPool({from_mint.url: from_wallet, to_mint.url: to_wallet})
+
+    await auditor.resume_swaps()
+
+    to_wallet.mint.assert_not_awaited()
+    assert (await journal_state(journal_id)).state == SwapJournalState.MINTED.value
+
+
+@pytest.mark.asyncio
+async def test_resume_swaps_leaves_pending_melt(db_setup):
+    auditor = Auditor()
+    journal_id, from_mint, to_mint = await journal_swap(SwapJournalState.MELTING)
+    from_wallet = swap_wallet(
+        100,
+        get_melt_quote=AsyncMock(
+            return_value=SimpleNamespace(state=MeltQuoteState.pending)
+        ),
+    )
+    auditor.wallets = FakeWalletPool(
+        {from_mint.url: from_wallet, to_mint.url: swap_wallet(50)}
+    )
+
+    await auditor.resume_swaps()
+
+    # wallets are acquired in a fixed order
+    assert auditor.wallets.acquired == sorted([from_mint.url, to_mint.url])
+    assert (await journal_state(journal_id)).state == SwapJournalState.MELTING.value
+
+
+def settling_melt_wallets(monkeypatch, melt) -> tuple:
+    """Wallets of a swap whose melt fails while its proofs are spent and pending."""
+    proofs = [SimpleNamespace(amount=32), SimpleNamespace(amount=16)]
+    from_wallet = swap_wallet(
+        100,
+        proofs=proofs,
+        melt_quote=AsyncMock(
+            return_value=SimpleNamespace(quote="melt-quote", amount=40, fee_reserve=2)
+        ),
+        select_to_send=AsyncMock(return_value=(proofs, 48)),
+        melt=melt,
+        check_proof_state=AsyncMock(
+            return_value=SimpleNamespace(
+                states=[
+                    SimpleNamespace(spent=True, unspent=False, pending=False),
+                    SimpleNamespace(spent=False, unspent=False, pending=True),
+                ]
+            )
+        ),
+        set_reserved_for_send=AsyncMock(),
+        invalidate=AsyncMock(),
+    )
+    to_wallet = swap_wallet(
+        50,
+        request_mint=AsyncMock(
+            return_value=SimpleNamespace(quote="mint-quote", request="lnbc1")
+        ),
+    )
+    monkeypatch.setattr(
+        auditor_module,
+        "wait_for_mint_quote",
+        AsyncMock(side_effect=asyncio.TimeoutError("not paid")),
+    )
+    return proofs, from_wallet, to_wallet
+
+
+@pytest.mark.asyncio
+async def test_swap_with_unsettled_melt_leaves_outcome_to_resumer(db_setup, monkeypatch):
+    auditor = Auditor()
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        from_mint = make_mint("https://mint-from.example.com", 100, 100)
+        to_mint = make_mint("https://mint-to.example.com", 50, 100)
+        session.add_all([from_mint, to_mint])
+        await session.commit()
+    await auditor.mints.load()
+    auditor.wallets = SimpleNamespace(load_mint=AsyncMock())
+    proofs, from_wallet, to_wallet = settling_melt_wallets(
+        monkeypatch, AsyncMock(side_effect=Exception("Lightning payment failed"))
+    )
+
+    with pytest.raises(Exception, match="Lightning payment failed"):
+        await auditor.swap(to_mint, to_wallet, from_mint, from_wallet, 40)
+
+    from_wallet.invalidate.assert_awaited_once_with([proofs[0]])
+    async with AsyncSession(engine) as session:
+        entry = (await session.execute(select(SwapJournal))).scalars().one()
+        assert entry.state == SwapJournalState.MELTING.value
+        assert entry.error == "Lightning payment failed"
+        # the resumer stores the outcome, once
+        assert (await session.execute(select(SwapEvent))).scalars().all() == []
+        # the circuit of the sending mint opens right away
+        mint = await session.get(Mint, from_mint.id)
+        assert (mint.state, mint.n_errors) == (MintState.ERROR.value, 1)
+        assert mint.next_update > datetime.utcnow()
+
+
+@pytest.mark.asyncio
+async def test_failed_melt_is_resumed_while_running(db_setup, monkeypatch):
+    auditor = Auditor()
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        from_mint = make_mint("https://mint-from.example.com", 100, 100)
+        to_mint = make_mint("https://mint-to.example.com", 50, 100)
+        session.add_all([from_mint, to_mint])
+        await session.commit()
+    await auditor.mints.load()
+
+    async def melt(*args):
+        # give resume_task a chance to pick up the entry of the running swap
+        await asyncio.sleep(0.05)
+        raise Exception("Lightning payment failed")
+
+    _, from_wallet, to_wallet = settling_melt_wallets(monkeypatch, melt)
+    from_wallet.get_melt_quote = AsyncMock(
+        return_value=SimpleNamespace(state=MeltQuoteState.unpaid)
+    )
+    auditor.wallets = FakeWalletPool({from_mint.url: from_wallet, to_mint.url: to_wallet})
+    auditor.wallets.load_mint = AsyncMock()
+    monkeypatch.setattr(auditor, "check_proofs", AsyncMock())
+    monkeypatch.setattr(auditor_module, "RESUME_INTERVAL", 0.01)
+    resume_task = asyncio.create_task(auditor.resume_task())
+
+    auditor.busy_mints.update((from_mint.id, to_mint.id))
+    try:
+        with pytest.raises(Exception, match="Lightning payment failed"):
+            await auditor.swap(to_mint, to_wallet, from_mint, from_wallet, 40)
+    finally:
+        auditor.release_swap_pair(to_mint, from_mint)
+    # the running swap was left alone
+    from_wallet.get_melt_quote.assert_not_awaited()
+
+    for _ in range(100):
+        async with AsyncSession(engine) as session:
+            entry = (await session.execute(select(SwapJournal))).scalars().one()
+        if entry.state == SwapJournalState.FAILED.value:
+            break
+        await asyncio.sleep(0.01)
+    resume_task.cancel()
+
+    assert entry.state == SwapJournalState.FAILED.value
+    async with AsyncSession(engine) as session:
+        swap = (await session.execute(select(SwapEvent))).scalars().one()
+        assert swap.state == MintState.ERROR.value
+        assert swap.error == "Lightning payment failed"
+        # counted once, when the melt failed
+        assert (await session.get(Mint, from_mint.id)).n_errors == 1
+
+
+@pytest.mark.asyncio
+async def test_resume_swaps_stores_failed_melt_once(db_setup, monkeypatch):
+    auditor = Auditor()
+    journal_id, from_mint, to_mint = await journal_swap(
+        SwapJournalState.MELTING, error="Lightning payment failed"
+    )
+    await auditor.mints.load()
+    from_wallet = swap_wallet(
+        100,
+        get_melt_quote=AsyncMock(
+            return_value=SimpleNamespace(state=MeltQuoteState.unpaid)
+        ),
+    )
+    auditor.wallets = FakeWalletPool(
+        {from_mint.url: from_wallet, to_mint.url: swap_wallet(50)}
+    )
+    monkeypatch.setattr(auditor, "check_proofs", AsyncMock())
+
+    await auditor.resume_swaps()
+
+    entry = await journal_state(journal_id)
+    assert entry.state == SwapJournalState.FAILED.value
+    assert entry.error == "Lightning payment failed"
+    async with AsyncSession(engine) as session:
+        swap = (await session.execute(select(SwapEvent))).scalars().one()
+        assert swap.state == MintState.ERROR.value
+        assert swap.error == "Lightning payment failed"
+        # swap() counted the error when the melt failed
+        assert (await session.get(Mint, from_mint.id)).n_errors == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "spent, ours, expected", [(True, True, 9), (False, True, None), (True, False, None)]
+)
+async def test_recover_received_token(monkeypatch, spent, ours, expected):
+    auditor = Auditor()
+    proofs = [
+        SimpleNamespace(id="00ad", amount=8, secret="a"),
+        SimpleNamespace(id="00ad", amount=2, secret="b"),
+    ]
+    # proofs spent by somebody else are not in our wallet
+    used = proofs if ours else proofs[:1]
+    get_proofs = AsyncMock(return_value=used)
+    monkeypatch.setattr(auditor_module, "get_proofs", get_proofs)
+    monkeypatch.setattr(
+        auditor_module,
+        "deserialize_token_from_string",
+        lambda token: SimpleNamespace(
+            mint="https://mint.example.com", unit="sat", amount=10, proofs=proofs
+        ),
+    )
+    wallet = swap_wallet(
+        109,
+        unit=Unit.sat,
+        check_proof_state=AsyncMock(
+            return_value=SimpleNamespace(
+                states=[SimpleNamespace(spent=spent)] * len(proofs)
+            )
+        ),
+        get_fees_for_proofs=lambda proofs: 1,
+        db=SimpleNamespace(),
+    )
+    auditor.wallets = FakeWalletPool({"https://mint.example.com": wallet})
+
+    received = await auditor.recover_received_token("token")
+
+    wallet.check_proof_state.assert_awaited_once_with(proofs)
+    if spent:
+        get_proofs.assert_awaited_once_with(db=wallet.db, id="00ad", table="proofs_used")
+    if expected is None:
+        assert received is None
+    else:
+        assert received.amount.amount == expected
+        assert received.balance.amount == 109
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("failing", ["load_mint", "mint"])
+async def test_mint_outstanding_bumps_errors(db_setup, monkeypatch, failing):
+    auditor = Auditor()
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        mint = make_mint("https://mint.example.com", 100, 100)
+        session.add(mint)
+        await session.commit()
+    await auditor.mints.load()
+    quote = SimpleNamespace(quote="quote", amount=10, paid=False)
+    monkeypatch.setattr(
+        auditor_module, "get_bolt11_mint_quotes", AsyncMock(return_value=[quote])
+    )
+    monkeypatch.setattr(auditor_module.asyncio, "sleep", AsyncMock())
+    wallet = swap_wallet(
+        100, db=None, mint=AsyncMock(side_effect=Exception("mint unreachable"))
+    )
+    auditor.wallets = FakeWalletPool({mint.url: wallet})
+    auditor.wallets.load_mint = AsyncMock(
+        side_effect=Exception("mint unreachable") if failing == "load_mint" else None
+    )
+
+    await auditor.mint_outstanding()
+
+    stored = await auditor.mints.get(mint.id)
+    assert stored.n_errors == 1
+    assert stored.state == MintState.ERROR.value
+    assert not auditor.breaker.allows(stored)
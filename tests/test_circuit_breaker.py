@@ -0,0 +1,42 @@
+# tests/test_circuit_breaker.py
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from src.circuit_breaker import CircuitBreaker, circuit_state
+from src.schemas import CircuitState, MintState
+
+
+def mint(state: MintState, next_update=None):
+    return SimpleNamespace(state=state.value, next_update=next_update)
+
+
+def test_circuit_state():
+    now = datetime.utcnow()
+    later = now + timedelta(minutes=1)
+    earlier = now - timedelta(minutes=1)
+    # healthy mints are closed whatever their next_update
+    assert circuit_state(mint(MintState.OK, later), now) == CircuitState.CLOSED
+    assert circuit_state(mint(MintState.UNKNOWN, later), now) == CircuitState.CLOSED
+    assert circuit_state(mint(MintState.ERROR), now) == CircuitState.CLOSED
+    assert circuit_state(mint(MintState.ERROR, later), now) == CircuitState.OPEN
+    assert circuit_state(mint(MintState.ERROR, earlier), now) == CircuitState.HALF_OPEN
+
+
+def test_backoff_doubles_up_to_maximum():
+    breaker = CircuitBreaker(base=10, maximum=100)
+    upper = []
+    for _ in range(6):
+        start = datetime.utcnow()
+        next_update = breaker.trip(1)
+        backoff = (next_update - start).total_seconds()
+        upper.append(min(10 * 2 ** len(upper), 100))
+        # jittered between half and the full backoff
+        assert upper[-1] / 2 - 0.1 <= backoff <= upper[-1] + 0.1
+    assert upper == [10, 20, 40, 80, 100, 100]
+
+    breaker.reset(1)
+    start = datetime.utcnow()
+    assert (breaker.trip(1) - start).total_seconds() <= 10.1
+    # failures are counted per mint
+    assert breaker.failures == {1: 1}
@@ -0,0 +1,72 @@
+# tests/test_compression.py
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import engine
+from src.models import Mint
+from src.responses import negotiate_encoding
+from src.schemas import MintState
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        (None, None),
+        ("", None),
+        ("identity", None),
+        ("gzip, deflate", "gzip"),
+        ("gzip, deflate, br", "br"),
+        ("br;q=0.5, gzip;q=0.8", "gzip"),
+        ("br;q=0, gzip", "gzip"),
+        ("*", "br"),
+        ("*;q=0", None),
+    ],
+)
+def test_negotiate_encoding(accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding", ["br", "gzip", "identity"])
+async def test_mints_are_compressed(async_client, encoding):
+    async with AsyncSession(engine) as session:
+        for i in range(3):
+            session.add(
+                Mint(
+                    url=f"https://mint{i}.example.com",
+                    name=f"Mint {i}",
+                    info='{"description": "' + "x" * 5000 + '"}',
+                    balance=100,
+                    sum_donations=100,
+                    updated_at=datetime.utcnow(),
+                    next_update=datetime.utcnow(),
+                    state=MintState.OK.value,
+                    n_errors=0,
+                    n_mints=0,
+                    n_melts=0,
+                )
+            )
+        await session.commit()
+
+    response = await async_client.get(
+        "/mints/?fields=id,info", headers={"Accept-Encoding": encoding}
+    )
+    assert response.status_code == 200
+    assert response.headers["Vary"] == "Accept-Encoding"
+    if encoding == "identity":
+        assert "content-encoding" not in response.headers
+    else:
+        assert response.headers["content-encoding"] == encoding
+        assert int(response.headers["content-length"]) < 5000
+    # the client decodes the body transparently
+    assert len(response.json()) == 3
+
+
+@pytest.mark.asyncio
+async def test_small_responses_are_not_compressed(async_client):
+    response = await async_client.get("/stats/", headers={"Accept-Encoding": "br"})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
@@ -0,0 +1,133 @@
+# tests/test_conditional_api.py
+
+import pytest
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import engine, read_engine
+from src.main import auditor
+from src.models import Mint
+from src.schemas import MintState
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", ["/mints/", "/graph/", "/stats/", "/swaps/"])
+async def test_etag_and_not_modified(async_client, path):
+    response = await async_client.get(path)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert "max-age" in response.headers["Cache-Control"]
+
+    response = await async_client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    # lists of tags and the tag without its weak prefix match as well
+    response = await async_client.get(
+        path, headers={"If-None-Match": f'"other", {etag.removeprefix("W/")}'}
+    )
+    assert response.status_code == 304
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", ["/mints/", "/graph/", "/stats/"])
+async def test_not_modified_across_encodings(async_client, path):
+    etags = {}
+    for encoding in ["br", "gzip", "identity"]:
+        response = await async_client.get(path, headers={"Accept-Encoding": encoding})
+        assert response.status_code == 200
+        etags[encoding] = response.headers["ETag"]
+    # one weak tag covers every encoding of the body
+    assert len(set(etags.values())) == 1
+    assert etags["br"].startswith('W/"')
+
+    for encoding in ["br", "gzip", "identity"]:
+        response = await async_client.get(
+            path,
+            headers={"Accept-Encoding": encoding, "If-None-Match": etags["br"]},
+        )
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etags["br"]
+
+
+@pytest.mark.asyncio
+async def test_etag_changes_with_data_version(async_client):
+    swaps_etag = (await async_client.get("/swaps/")).headers["ETag"]
+    mints_etag = (await async_client.get("/mints/")).headers["ETag"]
+    assert swaps_etag != mints_etag
+
+    auditor.last_swap_id += 1
+    response = await async_client.get("/swaps/", headers={"If-None-Match": swaps_etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != swaps_etag
+
+    await auditor.mints.load()
+    response = await async_client.get("/mints/", headers={"If-None-Match": mints_etag})
+    assert response.status_code == 200
+
+    # the query string is part of the ETag
+    response = await async_client.get(
+        "/swaps/?limit=5", headers={"If-None-Match": response.headers["ETag"]}
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_etag_belongs_to_the_cached_body(async_client):
+    """After a write, the new body is served under a new ETag that then validates."""
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        mint = Mint(
+            url="https://mint.example.com",
+            name="Mint",
+            balance=100,
+            sum_donations=100,
+            updated_at=datetime.utcnow(),
+            next_update=datetime.utcnow(),
+            state=MintState.ERROR.value,
+            n_errors=1,
+            n_mints=0,
+            n_melts=0,
+        )
+        session.add(mint)
+        await session.commit()
+    await auditor.mints.load()
+    old_etag = (await async_client.get("/mints/")).headers["ETag"]
+
+    await auditor.bump_mint_errors(mint.id)
+    response = await async_client.get("/mints/", headers={"If-None-Match": old_etag})
+    assert response.status_code == 200
+    assert response.json()[0]["n_errors"] == 2
+    new_etag = response.headers["ETag"]
+    assert new_etag != old_etag
+
+    response = await async_client.get("/mints/")
+    assert response.headers["ETag"] == new_etag
+    assert response.json()[0]["n_errors"] == 2
+    response = await async_client.get("/mints/", headers={"If-None-Match": new_etag})
+    assert response.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_not_modified_runs_no_queries(async_client):
+    etags = {
+        path: (await async_client.get(path)).headers["ETag"]
+        for path in ["/graph/", "/stats/", "/swaps/"]
+    }
+    queries = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        queries.append(statement)
+
+    event.listen(read_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        for path, etag in etags.items():
+            response = await async_client.get(path, headers={"If-None-Match": etag})
+            assert response.status_code == 304
+    finally:
+        event.remove(
+            read_engine.sync_engine, "before_cursor_execute", before_cursor_execute
+        )
+    assert queries == []
@@ -1,16 +1,19 @@
+import asyncio
 import json
 from datetime import datetime
 from types import SimpleNamespace
 from unittest.mock import AsyncMock
 
+import httpx
 import pytest
 from httpx import AsyncClient
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.main import auditor
-from src.models import Mint
-from src.schemas import MintState
+from src.auditor import ReceivedToken
+from src.main import auditor, donation_queue, location_resolver, relocate_mints
+from src.models import Donation, Mint
+from src.schemas import DonationStatus, MintState
 from src.database import engine
 
 
@@ -54,47 +57,53 @@ async def create_mint_record(**overrides) -> Mint:
         return mint
 
 
-def setup_wallet(monkeypatch, balance: int = 400, name: str = "Mock Mint"):
-    class MintInfo:
-        def __init__(self, mint_name: str):
-            self.name = mint_name
+class MintInfo:
+    def __init__(self, mint_name: str):
+        self.name = mint_name
 
-        def dict(self):
-            return {"name": self.name}
+    def dict(self):
+        return {"name": self.name}
 
-    wallet = SimpleNamespace(
-        available_balance=SimpleNamespace(amount=balance),
-        mint_info=MintInfo(name),
+
+def received_token(amount: int, balance: int = 400, name: str = "Mock Mint"):
+    return ReceivedToken(
+        amount=FakeAmount(amount), balance=FakeAmount(balance), mint_info=MintInfo(name)
     )
-    monkeypatch.setattr(auditor, "wallet", wallet, raising=False)
-    return wallet
 
 
-def stub_token(monkeypatch, mint_url: str):
-    token_obj = SimpleNamespace(mint=mint_url)
+def stub_token(monkeypatch, mint_url: str, amount: int = 10):
+    token_obj = SimpleNamespace(mint=mint_url, unit="sat", amount=amount)
     monkeypatch.setattr(
-        "src.main.deserialize_token_from_string",
+        "src.auditor.deserialize_token_from_string",
         lambda _: token_obj,
     )
 
 
+async def donate(async_client, token: str = "stub-token") -> dict:
+    """Submit a token and return its donation once it was processed."""
+    response = await async_client.post("/mints/", json={"token": token})
+    assert response.status_code == 202
+    assert response.json()["status"] == DonationStatus.QUEUED.value
+    assert response.headers["location"] == f"/donations/{response.json()['id']}"
+    await donation_queue.join()
+    response = await async_client.get(response.headers["location"])
+    assert response.status_code == 200
+    return response.json()
+
+
 @pytest.mark.asyncio
 async def test_create_mint_creates_new_record(async_client, monkeypatch):
-    setup_wallet(monkeypatch, balance=450, name="Fresh Mint")
-    receive_mock = AsyncMock(return_value=FakeAmount(75))
+    receive_mock = AsyncMock(return_value=received_token(75, 450, "Fresh Mint"))
     monkeypatch.setattr(auditor, "receive_token", receive_mock)
-    stub_token(monkeypatch, "https://new-mint.example.com/")
+    stub_token(monkeypatch, "https://new-mint.example.com/", amount=75)
 
-    response = await async_client.post("/mints/", json={"token": "stub-token"})
+    donation = await donate(async_client)
 
-    assert response.status_code == 201
-    data = response.json()
-    assert data["url"] == "https://new-mint.example.com"
-    assert data["name"] == "Fresh Mint"
-    assert data["balance"] == 450
-    assert data["sum_donations"] == 450
-    assert data["state"] == MintState.UNKNOWN.value
-    receive_mock.assert_awaited()
+    assert donation["status"] == DonationStatus.RECEIVED.value
+    assert donation["mint_url"] == "https://new-mint.example.com"
+    assert donation["amount"] == 75
+    assert donation["received"] == 75
+    receive_mock.assert_awaited_once_with("stub-token")
 
     async with AsyncSession(engine) as session:
         result = await session.execute(
@@ -102,9 +111,15 @@ async def test_create_mint_creates_new_record(async_client, monkeypatch):
         )
         mint = result.scalars().first()
         assert mint is not None
+        assert mint.id == donation["mint_id"]
+        assert mint.name == "Fresh Mint"
         assert mint.balance == 450
         assert mint.sum_donations == 450
+        assert mint.state == MintState.UNKNOWN.value
         assert json.loads(mint.info)["name"] == "Fresh Mint"
+        # the token is not kept once it was received
+        stored = await session.get(Donation, donation["id"])
+        assert stored.token is None
 
 
 @pytest.mark.asyncio
@@ -118,38 +133,279 @@ async def test_create_mint_updates_existing_record(async_client, monkeypatch):
         state=MintState.OK.value,
     )
 
-    setup_wallet(monkeypatch, balance=320, name="Updated Mint")
-    receive_mock = AsyncMock(return_value=FakeAmount(25))
+    receive_mock = AsyncMock(return_value=received_token(25, 320, "Updated Mint"))
     monkeypatch.setattr(auditor, "receive_token", receive_mock)
-    stub_token(monkeypatch, "https://existing.example.com/")
+    stub_token(monkeypatch, "https://existing.example.com/", amount=25)
 
-    response = await async_client.post("/mints/", json={"token": "stub-token"})
-    assert response.status_code == 201
-    data = response.json()
-    assert data["id"] == existing.id
-    assert data["balance"] == 320
-    assert data["sum_donations"] == 225
-    assert data["name"] == "Existing Mint"
+    donation = await donate(async_client)
+    assert donation["status"] == DonationStatus.RECEIVED.value
+    assert donation["mint_id"] == existing.id
 
     async with AsyncSession(engine) as session:
         result = await session.execute(select(Mint).where(Mint.id == existing.id))
         mint = result.scalars().first()
+        assert mint.name == "Existing Mint"
         assert mint.balance == 320
         assert mint.sum_donations == 225
         assert json.loads(mint.info)["name"] == "Updated Mint"
+    assert (await auditor.mints.get(existing.id)).balance == 320
+
+
+@pytest.mark.asyncio
+async def test_create_mint_resolves_location_in_background(async_client, monkeypatch):
+    monkeypatch.setattr(
+        auditor, "receive_token", AsyncMock(return_value=received_token(75))
+    )
+    stub_token(monkeypatch, "https://located.example.com/")
+    monkeypatch.setattr(location_resolver, "ip_ranges", [(0, 1, 0.0, 0.0)])
+    resolve_mock = AsyncMock(return_value={"https://located.example.com": (1.5, 2.5)})
+    monkeypatch.setattr(location_resolver, "resolve_mint_locations", resolve_mock)
+
+    donation = await donate(async_client)
+
+    await auditor.events.join()
+    resolve_mock.assert_awaited_once()
+    mint = await auditor.mints.get(donation["mint_id"])
+    assert (mint.latitude, mint.longitude) == (1.5, 2.5)
+
+
+@pytest.mark.asyncio
+async def test_donations_are_serialized_per_mint(async_client, monkeypatch):
+    active: dict[str, int] = {}
+    most_active: dict[str, int] = {}
+    release = asyncio.Event()
+
+    async def receive(token: str):
+        active[token] = active.get(token, 0) + 1
+        most_active[token] = max(most_active.get(token, 0), active[token])
+        await release.wait()
+        active[token] -= 1
+        return received_token(5)
+
+    monkeypatch.setattr(auditor, "receive_token", receive)
+    monkeypatch.setattr(
+        "src.auditor.deserialize_token_from_string",
+        lambda token: SimpleNamespace(
+            mint=f"https://{token}.example.com", unit="sat", amount=5
+        ),
+    )
+
+    for token in ["a", "a", "a", "b", "b"]:
+        response = await async_client.post("/mints/", json={"token": token})
+        assert response.status_code == 202
+    for _ in range(100):
+        if active.get("a") and active.get("b"):
+            break
+        await asyncio.sleep(0.01)
+    # both mints receive in parallel, each one token at a time
+    assert active == {"a": 1, "b": 1}
+    release.set()
+    await donation_queue.join()
+
+    assert most_active == {"a": 1, "b": 1}
+    async with AsyncSession(engine) as session:
+        result = await session.execute(select(Donation.status))
+        assert result.scalars().all() == [DonationStatus.RECEIVED.value] * 5
+
+
+@pytest.mark.asyncio
+async def test_relocate_mints_updates_changed_locations(async_client, monkeypatch):
+    moved = await create_mint_record(
+        url="https://moved.example.com", latitude=1.0, longitude=1.0
+    )
+    unchanged = await create_mint_record(
+        url="https://unchanged.example.com", latitude=3.0, longitude=4.0
+    )
+    monkeypatch.setattr(location_resolver, "ip_ranges", [(0, 1, 0.0, 0.0)])
+    resolve_mock = AsyncMock(
+        return_value={
+            "https://moved.example.com": (5.0, 6.0),
+            "https://unchanged.example.com": (3.0, 4.0),
+        }
+    )
+    monkeypatch.setattr(location_resolver, "resolve_mint_locations", resolve_mock)
+    refresh_mock = AsyncMock()
+    monkeypatch.setattr(auditor.mints, "refresh", refresh_mock)
+
+    await relocate_mints()
+
+    refresh_mock.assert_awaited_once_with([moved.id])
+    async with AsyncSession(engine) as session:
+        mint = await session.get(Mint, moved.id)
+        assert (mint.latitude, mint.longitude) == (5.0, 6.0)
+        mint = await session.get(Mint, unchanged.id)
+        assert (mint.latitude, mint.longitude) == (3.0, 4.0)
 
 
 @pytest.mark.asyncio
 async def test_create_mint_rejects_zero_amount(async_client, monkeypatch):
-    setup_wallet(monkeypatch)
-    receive_mock = AsyncMock(return_value=FakeAmount(0))
+    receive_mock = AsyncMock(return_value=received_token(0))
     monkeypatch.setattr(auditor, "receive_token", receive_mock)
+    stub_token(monkeypatch, "https://zero.example.com", amount=0)
 
     response = await async_client.post("/mints/", json={"token": "stub-token"})
 
     assert response.status_code == 400
     assert response.json()["detail"] == "Received 0."
-    receive_mock.assert_awaited()
+    receive_mock.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_create_mint_records_failed_redemption(async_client, monkeypatch):
+    receive_mock = AsyncMock(side_effect=Exception("Token already spent."))
+    monkeypatch.setattr(auditor, "receive_token", receive_mock)
+    stub_token(monkeypatch, "https://spent.example.com")
+
+    donation = await donate(async_client)
+
+    assert donation["status"] == DonationStatus.FAILED.value
+    assert donation["error"] == "Token already spent."
+    assert donation["mint_id"] is None
+
+
+@pytest.mark.asyncio
+async def test_transient_redemption_errors_are_retried(async_client, monkeypatch):
+    receive_mock = AsyncMock(
+        side_effect=[httpx.ConnectError("Connection refused"), received_token(5)]
+    )
+    monkeypatch.setattr(auditor, "receive_token", receive_mock)
+    recover_mock = AsyncMock(return_value=None)
+    monkeypatch.setattr(auditor, "recover_received_token", recover_mock)
+    monkeypatch.setattr(donation_queue, "retry_base", 0.01)
+    stub_token(monkeypatch, "https://unreachable.example.com")
+
+    donation = await donate(async_client)
+
+    assert donation["status"] == DonationStatus.QUEUED.value
+    assert donation["error"] == "Connection refused"
+    for _ in range(100):
+        await asyncio.sleep(0.01)
+        await donation_queue.join()
+        donation = await donation_queue.get(donation["id"])
+        if donation.status != DonationStatus.QUEUED.value:
+            break
+    assert donation.status == DonationStatus.RECEIVED.value
+    # the failed attempt may have received the token
+    recover_mock.assert_awaited_once_with("stub-token")
+    assert receive_mock.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_read_donation_not_found(async_client):
+    response = await async_client.get("/donations/999")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_outstanding_donations_are_recovered(async_client, monkeypatch):
+    receive_mock = AsyncMock(return_value=received_token(5))
+    monkeypatch.setattr(auditor, "receive_token", receive_mock)
+    recover_mock = AsyncMock(return_value=None)
+    monkeypatch.setattr(auditor, "recover_received_token", recover_mock)
+    stub_token(monkeypatch, "https://recovered.example.com")
+    async with AsyncSession(engine) as session:
+        session.add_all(
+            [
+                Donation(
+                    token="interrupted",
+                    mint_url="https://recovered.example.com",
+                    amount=5,
+                    status=DonationStatus.PROCESSING.value,
+                ),
+                Donation(
+                    token="failed",
+                    mint_url="https://recovered.example.com",
+                    amount=5,
+                    status=DonationStatus.FAILED.value,
+                ),
+            ]
+        )
+        await session.commit()
+
+    await donation_queue.recover()
+    await donation_queue.join()
+
+    # the interrupted token was not received yet
+    recover_mock.assert_awaited_once_with("interrupted")
+    receive_mock.assert_awaited_once_with("interrupted")
+
+
+@pytest.mark.asyncio
+async def test_interrupted_donation_already_received(async_client, monkeypatch):
+    """A token received before the process stopped is recorded, not failed as spent."""
+    receive_mock = AsyncMock(side_effect=Exception("Token already spent."))
+    monkeypatch.setattr(auditor, "receive_token", receive_mock)
+    monkeypatch.setattr(
+        auditor, "recover_received_token", AsyncMock(return_value=received_token(5))
+    )
+    stub_token(monkeypatch, "https://recovered.example.com")
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        donation = Donation(
+            token="interrupted",
+            mint_url="https://recovered.example.com",
+            amount=5,
+            status=DonationStatus.PROCESSING.value,
+        )
+        session.add(donation)
+        await session.commit()
+
+    await donation_queue.recover()
+    await donation_queue.join()
+
+    receive_mock.assert_not_awaited()
+    donation = await donation_queue.get(donation.id)
+    assert donation.status == DonationStatus.RECEIVED.value
+    assert donation.received == 5
+    mint = await auditor.mints.get(donation.mint_id)
+    assert mint.url == "https://recovered.example.com"
+
+
+@pytest.mark.asyncio
+async def test_donation_is_recorded_with_the_mint_update(async_client, monkeypatch):
+    """A crash after the mint was credited does not leave the donation outstanding."""
+    receive_mock = AsyncMock(return_value=received_token(5))
+    monkeypatch.setattr(auditor, "receive_token", receive_mock)
+    monkeypatch.setattr(
+        auditor.mints, "refresh", AsyncMock(side_effect=Exception("crash"))
+    )
+    stub_token(monkeypatch, "https://crashing.example.com")
+
+    donation = await donate(async_client)
+
+    assert donation["status"] == DonationStatus.RECEIVED.value
+    assert donation["received"] == 5
+    async with AsyncSession(engine) as session:
+        mint = await session.get(Mint, donation["mint_id"])
+        assert mint.sum_donations == 400
+    # nothing is left for the next start to redeem or to credit again
+    await donation_queue.recover()
+    await donation_queue.join()
+    receive_mock.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_donation_worker_survives_database_errors(async_client, monkeypatch):
+    monkeypatch.setattr(
+        auditor, "receive_token", AsyncMock(return_value=received_token(5))
+    )
+    stub_token(monkeypatch, "https://flaky.example.com")
+    set_values = donation_queue._set
+    calls = []
+
+    async def flaky_set(donation_id, **values):
+        calls.append(donation_id)
+        if len(calls) == 1:
+            raise Exception("database is locked")
+        await set_values(donation_id, **values)
+
+    monkeypatch.setattr(donation_queue, "_set", flaky_set)
+    first = await donation_queue.submit("first", "https://flaky.example.com", 5)
+    second = await donation_queue.submit("second", "https://flaky.example.com", 5)
+    await donation_queue.join()
+
+    # the first donation stays outstanding, the worker goes on with the next
+    assert (await donation_queue.get(first.id)).status == DonationStatus.QUEUED.value
+    assert (await donation_queue.get(second.id)).status == DonationStatus.RECEIVED.value
 
 
 @pytest.mark.asyncio
@@ -157,7 +413,6 @@ async def test_create_mint(async_client: AsyncClient):
     # This is a sample token, replace with a valid one for your tests
     token = "cashuAeyJ0b2tlbiI6IFt7InByb29mcyI6IFt7ImlkIjogIjAwIiwgImFtb3VudCI6IDEsICJzZWNyZXQiOiAiYjRmMzk5Y2Q3YTRlYTIxOWJhMGUzMWRlZDAzYjM3Y2YifSwgeyJpZCI6ICIwMCIsICJhbW91bnQiOiAyLCAic2VjcmV0IjogIjM1ZDY0Y2U3Yzk5MGI4YTYzYzY0YjM5Mjc5Yzc0MjZlIn1dLCAibWludCI6ICJodHRwOi8vbG9jYWxob3N0OjgwMDAifV19"
 
-    response = await async_client.post("/mints/", json={"token": token})
-
-    # Since we don't have a valid mint, we expect a 400
-    assert response.status_code == 400
+    # Since we don't have a valid mint, the donation fails in the background
+    donation = await donate(async_client, token)
+    assert donation["status"] == DonationStatus.FAILED.value
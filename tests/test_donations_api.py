@@ -1,10 +1,16 @@
 import base64
+from datetime import datetime, timedelta
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import cbor2
 import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.main import BASE_URL
+from src.database import engine
+from src.main import BASE_URL, auditor, redeem_donation
+from src.models import Donation, Mint
+from src.schemas import DonationStatus, MintState
 
 
 def decode_payment_request(pr_value: str):
@@ -49,31 +55,79 @@ def sample_payload():
 async def test_receive_donation_success(async_client):
     token_mock = MagicMock()
     token_mock.serialize.return_value = "serialized-token"
-    receive_mock = AsyncMock()
+    queue_mock = AsyncMock(return_value=MagicMock(id=7))
 
     with patch(
         "src.main.PaymentPayload.to_tokenv4", return_value=token_mock
-    ) as mocked_to_tokenv4, patch("src.main.receive_token", receive_mock):
+    ) as mocked_to_tokenv4, patch("src.main.queue_donation", queue_mock):
         response = await async_client.post("/donate", json=sample_payload())
 
     assert response.status_code == 200
+    assert response.json()["donation_id"] == 7
     mocked_to_tokenv4.assert_called_once()
-    assert receive_mock.await_count == 1
-    args, _ = receive_mock.await_args
-    assert args[0] == "serialized-token"
-    assert args[1].__class__.__name__ == "AsyncSession"
+    queue_mock.assert_awaited_once_with("serialized-token")
 
 
 @pytest.mark.asyncio
 async def test_receive_donation_invalid_payload(async_client):
-    receive_mock = AsyncMock()
+    queue_mock = AsyncMock()
 
     with patch(
         "src.main.PaymentPayload.to_tokenv4",
         side_effect=ValueError("boom"),
-    ), patch("src.main.receive_token", receive_mock):
+    ), patch("src.main.queue_donation", queue_mock):
         response = await async_client.post("/donate", json=sample_payload())
 
     assert response.status_code == 400
     assert response.json()["detail"] == "Invalid token format"
-    receive_mock.assert_not_awaited()
+    queue_mock.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_redeem_donation_keeps_circuit_backoff(async_client):
+    next_update = datetime.utcnow() + timedelta(hours=1)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        mint = Mint(
+            url="https://mint.example.com",
+            name="Mint",
+            balance=100,
+            sum_donations=100,
+            updated_at=datetime.utcnow(),
+            next_update=next_update,
+            state=MintState.ERROR.value,
+            n_errors=3,
+            n_mints=0,
+            n_melts=0,
+        )
+        donation = Donation(
+            token="token",
+            mint_url="https://mint.example.com",
+            amount=5,
+            status=DonationStatus.PROCESSING.value,
+        )
+        session.add_all([mint, donation])
+        await session.commit()
+    await auditor.mints.load()
+
+    received = SimpleNamespace(
+        amount=SimpleNamespace(amount=5),
+        balance=SimpleNamespace(amount=105),
+        mint_info=SimpleNamespace(dict=lambda: {"name": "Mint"}),
+    )
+    with patch.object(
+        auditor, "receive_token", AsyncMock(return_value=received)
+    ), patch.object(
+        auditor,
+        "parse_token",
+        return_value=SimpleNamespace(mint="https://mint.example.com/"),
+    ):
+        assert await redeem_donation(donation) == (mint.id, 5)
+
+    mint = await auditor.mints.get(mint.id)
+    assert mint.sum_donations == 105
+    # the donation does not close the circuit of a failing mint
+    assert mint.next_update == next_update
+    async with AsyncSession(engine) as session:
+        donation = await session.get(Donation, donation.id)
+        assert donation.status == DonationStatus.RECEIVED.value
+        assert donation.received == 5
@@ -0,0 +1,135 @@
+# tests/test_event_bus.py
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.auditor import Auditor
+from src.database import engine
+from src.event_bus import (
+    BalanceUpdated,
+    DonationReceived,
+    EventBus,
+    MintStateChanged,
+    SwapCompleted,
+    SwapFailed,
+)
+from src.models import Mint
+from src.schemas import MintState, SwapEventRead
+
+
+def make_swap(state: MintState = MintState.OK) -> SwapEventRead:
+    return SwapEventRead(
+        id=1,
+        from_id=1,
+        to_id=2,
+        from_url="https://mint1.example.com",
+        to_url="https://mint2.example.com",
+        amount=10,
+        fee=1,
+        created_at=datetime.utcnow(),
+        time_taken=100,
+        state=state,
+    )
+
+
+@pytest.mark.asyncio
+async def test_subscribers_receive_their_event_types():
+    bus = EventBus()
+    swaps, everything = [], []
+    bus.subscribe(swaps.append, SwapCompleted, SwapFailed)
+
+    async def handle(event):
+        everything.append(event)
+
+    bus.subscribe(handle)
+    bus.publish(SwapCompleted(swap=make_swap()))
+    bus.publish(DonationReceived(mint_id=1, url="https://mint1.example.com", amount=5))
+    await bus.join()
+
+    assert [type(event) for event in swaps] == [SwapCompleted]
+    assert [type(event) for event in everything] == [SwapCompleted, DonationReceived]
+    await bus.close()
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_does_not_block_publish():
+    bus = EventBus()
+    release = asyncio.Event()
+    handled = []
+
+    async def slow(event):
+        await release.wait()
+        handled.append(event)
+
+    subscription = bus.subscribe(slow, maxsize=2)
+    for _ in range(5):
+        bus.publish(DonationReceived(mint_id=1, url="https://mint1.example.com", amount=5))
+    await asyncio.sleep(0)
+    bus.publish(DonationReceived(mint_id=1, url="https://mint1.example.com", amount=5))
+
+    # one event is being handled, two are queued, the rest was dropped
+    assert subscription.dropped == 3
+    release.set()
+    await bus.join()
+    assert len(handled) == 3
+    await bus.close()
+
+
+@pytest.mark.asyncio
+async def test_failing_handler_keeps_subscription_alive():
+    bus = EventBus()
+    handled = []
+
+    def handler(event):
+        handled.append(event)
+        raise RuntimeError("boom")
+
+    bus.subscribe(handler)
+    bus.publish(SwapFailed(swap=make_swap(MintState.ERROR)))
+    bus.publish(SwapFailed(swap=make_swap(MintState.ERROR)))
+    await bus.join()
+    assert len(handled) == 2
+    await bus.close()
+
+
+@pytest.mark.asyncio
+async def test_auditor_publishes_state_and_balance_changes():
+    async with engine.begin() as conn:
+        await conn.run_sync(Mint.metadata.create_all)
+    try:
+        auditor = Auditor()
+        events = []
+        auditor.events.subscribe(events.append, MintStateChanged, BalanceUpdated)
+        async with AsyncSession(engine) as session:
+            mint = Mint(
+                url="https://mint1.example.com",
+                name="Mint 1",
+                balance=100,
+                sum_donations=100,
+                updated_at=datetime.utcnow(),
+                next_update=datetime.utcnow(),
+                state=MintState.OK.value,
+                n_errors=0,
+                n_mints=0,
+                n_melts=0,
+            )
+            session.add(mint)
+            await session.commit()
+            await session.refresh(mint)
+            mint_id = mint.id
+        await auditor.mints.load()
+
+        await auditor.bump_mint_errors(mint_id)
+        await auditor.events.join()
+
+        assert len(events) == 1
+        assert isinstance(events[0], MintStateChanged)
+        assert events[0].previous_state == MintState.OK
+        assert events[0].mint.state == MintState.ERROR
+        await auditor.events.close()
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Mint.metadata.drop_all)
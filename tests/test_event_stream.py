@@ -0,0 +1,73 @@
+# tests/test_event_stream.py
+
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+
+from src.event_stream import EventStream
+from src.schemas import SwapEventRead, MintState
+
+
+def make_swap(swap_id: int) -> SwapEventRead:
+    return SwapEventRead(
+        id=swap_id,
+        from_id=1,
+        to_id=2,
+        from_url="https://mint1.example.com",
+        to_url="https://mint2.example.com",
+        amount=10,
+        fee=1,
+        created_at=datetime.utcnow(),
+        time_taken=100,
+        state=MintState.OK,
+    )
+
+
+@pytest.mark.asyncio
+async def test_publish_reaches_all_subscribers():
+    stream = EventStream()
+    first = stream.subscribe()
+    second = stream.subscribe()
+    stream.publish("swap", make_swap(1))
+
+    for queue in (first, second):
+        message = queue.get_nowait()
+        event, data = message.strip().split("\n")
+        assert event == "event: swap"
+        assert json.loads(data.removeprefix("data: "))["id"] == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_disconnected():
+    stream = EventStream(queue_size=2)
+    slow = stream.subscribe()
+    for i in range(3):
+        stream.publish("swap", make_swap(i))
+
+    assert slow not in stream.subscribers
+    # the stream of the slow client ends instead of skipping events
+    assert slow.get_nowait() is None
+
+
+@pytest.mark.asyncio
+async def test_sse_yields_events_and_keepalives():
+    stream = EventStream(keepalive=0.05)
+    disconnected = False
+
+    async def is_disconnected():
+        return disconnected
+
+    events = stream.sse(is_disconnected)
+    assert (await events.__anext__()).startswith("retry:")
+    assert stream.subscribers
+
+    stream.publish("swap", make_swap(7))
+    assert (await events.__anext__()).startswith("event: swap")
+    assert await events.__anext__() == ": keepalive\n\n"
+
+    disconnected = True
+    with pytest.raises(StopAsyncIteration):
+        await asyncio.wait_for(events.__anext__(), 1)
+    assert not stream.subscribers
@@ -1,12 +1,13 @@
 # tests/test_graph_api.py
 
 import pytest
-from datetime import datetime
+from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.models import Mint, SwapEvent
 from src.schemas import MintState
 from src.database import engine
+from src.main import response_cache
 
 
 @pytest.mark.asyncio
@@ -175,3 +176,94 @@ async def test_read_graph_multiple_edges(async_client):
     data = response.json()
     assert len(data["nodes"]) == 3
     assert len(data["edges"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_read_graph_last_state_and_since(async_client):
+    now = datetime.utcnow()
+    async with AsyncSession(engine) as session:
+        mint1 = Mint(
+            url="https://mint1.example.com",
+            name="Mint 1",
+            balance=100,
+            sum_donations=100,
+            updated_at=now,
+            next_update=now,
+            state=MintState.UNKNOWN.value,
+            n_errors=0,
+            n_mints=0,
+            n_melts=0,
+        )
+        mint2 = Mint(
+            url="https://mint2.example.com",
+            name="Mint 2",
+            balance=200,
+            sum_donations=200,
+            updated_at=now,
+            next_update=now,
+            state=MintState.UNKNOWN.value,
+            n_errors=0,
+            n_mints=0,
+            n_melts=0,
+        )
+        session.add_all([mint1, mint2])
+        await session.commit()
+        await session.refresh(mint1)
+        await session.refresh(mint2)
+        mint1_id, mint1_url = mint1.id, mint1.url
+        mint2_id, mint2_url = mint2.id, mint2.url
+
+        # the newest swap failed, an older one is inserted afterwards
+        for amount, age, state in [
+            (10, timedelta(hours=1), MintState.OK),
+            (20, timedelta(minutes=1), MintState.ERROR),
+            (40, timedelta(days=2), MintState.OK),
+        ]:
+            session.add(
+                SwapEvent(
+                    from_id=mint1_id,
+                    to_id=mint2_id,
+                    from_url=mint1_url,
+                    to_url=mint2_url,
+                    amount=amount,
+                    fee=1,
+                    created_at=now - age,
+                    time_taken=100,
+                    state=state.value,
+                )
+            )
+            await session.commit()
+
+    response = await async_client.get("/graph/")
+    assert response.status_code == 200
+    edge = response.json()["edges"][0]
+    assert edge["count"] == 3
+    assert edge["total_amount"] == 70
+    assert edge["total_fee"] == 3
+    assert edge["state"] == MintState.ERROR.value
+
+    since = (now - timedelta(hours=2)).isoformat()
+    response = await async_client.get("/graph/", params={"since": since})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["nodes"]) == 2
+    edge = data["edges"][0]
+    assert edge["count"] == 2
+    assert edge["total_amount"] == 30
+    assert edge["state"] == MintState.ERROR.value
+
+    since = (now + timedelta(hours=1)).isoformat()
+    response = await async_client.get("/graph/", params={"since": since})
+    assert response.json()["edges"] == []
+
+
+@pytest.mark.asyncio
+async def test_read_graph_since_shares_hourly_cache_entries(async_client):
+    hour = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    for minute in range(5):
+        since = (hour - timedelta(hours=1, minutes=-minute)).isoformat()
+        response = await async_client.get("/graph/", params={"since": since})
+        assert response.status_code == 200
+
+    assert response_cache.stats()["entries"] == 1
+    assert response_cache.misses == 1
@@ -0,0 +1,78 @@
+"""Tests for the binary IP location index"""
+
+import csv
+import gzip
+import os
+from pathlib import Path
+
+import pytest
+
+from src.ip_index import IpLocationIndex, build_index
+from src.mint_location_resolver import MintLocationResolver
+
+
+def write_database(path: Path, rows: list[tuple[int, int, str, str]]):
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        for start, end, lat, lon in rows:
+            writer.writerow([start, end, "US", "", "", "City", "", lat, lon, ""])
+
+
+def test_build_index_merges_adjacent_ranges(tmp_path):
+    db_file = tmp_path / "db.csv.gz"
+    write_database(
+        db_file,
+        [
+            # out of order, adjacent and at the same place: merged
+            (200, 299, "1.5", "2.5"),
+            (100, 199, "1.5", "2.5"),
+            # same place but not adjacent: kept apart, coordinates shared
+            (400, 499, "1.5", "2.5"),
+            (500, 599, "3.25", "-4.75"),
+            # row without coordinates
+            (600, 699, "", ""),
+        ],
+    )
+    assert build_index(db_file, tmp_path / "db.idx") == 3
+
+    index = IpLocationIndex(tmp_path / "db.idx")
+    assert list(index) == [
+        (100, 299, 1.5, 2.5),
+        (400, 499, 1.5, 2.5),
+        (500, 599, 3.25, -4.75),
+    ]
+    assert len(index.coords) == 4  # two distinct places
+    assert index.lookup(99) is None
+    assert index.lookup(100) == (1.5, 2.5)
+    assert index.lookup(250) == (1.5, 2.5)
+    assert index.lookup(300) is None
+    assert index.lookup(599) == (3.25, -4.75)
+    assert index.lookup(650) is None
+    index.close()
+
+
+def test_index_rejects_other_files(tmp_path):
+    path = tmp_path / "db.idx"
+    path.write_bytes(b"not an index at all")
+    with pytest.raises(ValueError):
+        IpLocationIndex(path)
+
+
+def test_resolver_rebuilds_index_for_new_database(tmp_path):
+    resolver = MintLocationResolver()
+    resolver.db_file = tmp_path / "db.csv.gz"
+    write_database(resolver.db_file, [(100, 199, "1.5", "2.5")])
+    resolver._load_database()
+    assert resolver.index_file.exists()
+    assert resolver._ip_to_coordinates("0.0.0.150") == (1.5, 2.5)
+
+    # the index is reused while it is newer than the database
+    build_time = resolver.index_file.stat().st_mtime
+    resolver._load_database()
+    assert resolver.index_file.stat().st_mtime == build_time
+
+    # a newly downloaded database is converted again
+    write_database(resolver.db_file, [(100, 199, "7.0", "8.0")])
+    os.utime(resolver.db_file, (build_time + 10, build_time + 10))
+    resolver._load_database()
+    assert resolver._ip_to_coordinates("0.0.0.150") == (7.0, 8.0)
@@ -0,0 +1,85 @@
+# tests/test_metrics.py
+
+import pytest
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src import metrics
+from src.database import engine
+from src.main import auditor
+from src.models import Mint
+from src.schemas import MintState
+
+
+def sample(name: str, **labels) -> float:
+    return metrics.registry.get_sample_value(name, labels) or 0
+
+
+def test_observe_swap_attributes_phases_to_mints():
+    before_ok = sample("auditor_swaps_total", state="OK")
+    before_melt = sample(
+        "auditor_swap_phase_seconds_count", phase="melt", mint="https://from.example.com"
+    )
+
+    metrics.observe_swap(
+        "https://from.example.com",
+        "https://to.example.com",
+        MintState.OK.value,
+        {"melt": 1500.0, "mint": 200.0},
+    )
+
+    assert sample("auditor_swaps_total", state="OK") == before_ok + 1
+    assert (
+        sample(
+            "auditor_swap_phase_seconds_count",
+            phase="melt",
+            mint="https://from.example.com",
+        )
+        == before_melt + 1
+    )
+    assert sample(
+        "auditor_swap_phase_seconds_sum", phase="mint", mint="https://to.example.com"
+    ) >= 0.2
+    assert (
+        sample("auditor_swap_phase_seconds_count", phase="mint", mint="https://from.example.com")
+        == 0
+    )
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(async_client):
+    async with AsyncSession(engine) as session:
+        session.add(
+            Mint(
+                url="https://mint.example.com",
+                name="Mint",
+                balance=420,
+                sum_donations=420,
+                updated_at=datetime.utcnow(),
+                next_update=datetime.utcnow(),
+                state=MintState.OK.value,
+                n_errors=0,
+                n_mints=0,
+                n_melts=0,
+            )
+        )
+        await session.commit()
+    await auditor.mints.load()
+
+    assert (await async_client.get("/stats/")).status_code == 200
+    assert (await async_client.get("/does-not-exist/123")).status_code == 404
+
+    response = await async_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'auditor_mint_balance_sat{mint="https://mint.example.com"} 420.0' in body
+    assert 'auditor_mint_circuit_open{mint="https://mint.example.com"} 0.0' in body
+    assert "auditor_swaps_in_flight 0.0" in body
+    # requests are labelled with the route template, not the path
+    assert (
+        'auditor_http_request_duration_seconds_count{method="GET",route="/stats/",status="200"}'
+        in body
+    )
+    assert 'route="/does-not-exist/123"' not in body
+    assert 'route="unmatched",status="404"' in body
@@ -1,13 +1,16 @@
 """Tests for MintLocationResolver"""
 
+import asyncio
 import csv
 import gzip
+import os
 import tempfile
 from datetime import datetime, timedelta
 from pathlib import Path
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, patch
 import socket
 
+import httpx
 import pytest
 
 from src.mint_location_resolver import MintLocationResolver
@@ -179,33 +182,58 @@ def test_load_database_nonexistent(temp_data_dir):
         resolver._load_database()
 
 
+def database_server(content: bytes, requests: list):
+    """Local stand-in for the database host with ETag support."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=content, headers={"ETag": '"v1"'})
+
+    return httpx.MockTransport(handler)
+
+
 @pytest.mark.asyncio
 async def test_download_database(temp_data_dir):
     """Test downloading the database."""
     resolver = MintLocationResolver()
     resolver.db_file = Path(temp_data_dir) / "dbip-city-ipv4-num.csv.gz"
+    requests = []
+    resolver.transport = database_server(b"test content", requests)
 
-    # Mock the HTTP response
-    mock_response = MagicMock()
-    mock_response.content = b"test content"
-    mock_response.raise_for_status = MagicMock()
+    assert await resolver._download_database() is True
+    assert resolver.db_file.read_bytes() == b"test content"
+    assert resolver._get_last_update_time() is not None
+    assert "if-none-match" not in requests[0].headers
 
-    with patch("httpx.AsyncClient") as mock_client:
-        mock_client.return_value.__aenter__.return_value.get = AsyncMock(
-            return_value=mock_response
-        )
-        await resolver._download_database()
+    # the second download is a conditional GET
+    assert await resolver._download_database() is False
+    assert requests[1].headers["if-none-match"] == '"v1"'
+    assert resolver.db_file.read_bytes() == b"test content"
 
-    assert resolver.db_file.exists()
-    assert resolver._get_last_update_time() is not None
 
+@pytest.mark.asyncio
+async def test_download_database_failure_keeps_file(sample_ip_database):
+    """Test that a failed download does not replace the database."""
+    resolver = MintLocationResolver()
+    resolver.db_file = sample_ip_database
+    content = sample_ip_database.read_bytes()
+    resolver.transport = httpx.MockTransport(lambda request: httpx.Response(500))
 
-def test_url_to_ip():
+    with pytest.raises(httpx.HTTPStatusError):
+        await resolver._download_database()
+    assert resolver.db_file.read_bytes() == content
+    assert list(Path(sample_ip_database).parent.glob("*.download")) == []
+
+
+@pytest.mark.asyncio
+async def test_url_to_ip():
     """Test extracting IP from URL."""
     resolver = MintLocationResolver()
 
     # Direct IP address in URL
-    ip = resolver._url_to_ip("https://192.168.1.1:3338")
+    ip = await resolver._url_to_ip("https://192.168.1.1:3338")
     assert ip == "192.168.1.1"
 
     # Hostname resolving to IPv4
@@ -214,18 +242,18 @@ def test_url_to_ip():
         (socket.AF_INET6, None, None, None, ("::1", 0)),
     ]
     with patch("socket.getaddrinfo", return_value=addr_info) as mock_getaddrinfo:
-        ip = resolver._url_to_ip("https://example.com:3338")
+        ip = await resolver._url_to_ip("https://example.com:3338")
         assert ip == "1.2.3.4"
         mock_getaddrinfo.assert_called_once()
 
     # Hostname resolving only to IPv6 (unsupported)
     ipv6_only = [(socket.AF_INET6, None, None, None, ("::1", 0))]
     with patch("socket.getaddrinfo", return_value=ipv6_only):
-        ip = resolver._url_to_ip("https://ipv6-only.example.com")
+        ip = await resolver._url_to_ip("https://ipv6-only.example.com")
         assert ip is None
 
     # Invalid URL
-    ip = resolver._url_to_ip("not-a-url")
+    ip = await resolver._url_to_ip("not-a-url")
     assert ip is None
 
 
@@ -258,41 +286,111 @@ def test_ip_to_coordinates_not_loaded():
     assert coords is None
 
 
-def test_resolve_mint_location(sample_ip_database):
+@pytest.mark.asyncio
+async def test_url_to_ip_caches_answers():
+    """Test that hostnames are resolved once while cached."""
+    resolver = MintLocationResolver()
+    addr_info = [(socket.AF_INET, None, None, None, ("1.2.3.4", 0))]
+    with patch("socket.getaddrinfo", return_value=addr_info) as mock_getaddrinfo:
+        ips = await asyncio.gather(
+            *(resolver._url_to_ip("https://example.com") for _ in range(5))
+        )
+        assert ips == ["1.2.3.4"] * 5
+        assert await resolver._url_to_ip("https://example.com:3338") == "1.2.3.4"
+        mock_getaddrinfo.assert_called_once()
+
+        # expired answers are resolved again
+        resolver.dns_cache["example.com"] = (0, "1.2.3.4")
+        await resolver._url_to_ip("https://example.com")
+        assert mock_getaddrinfo.call_count == 2
+
+    # failures are cached too
+    error = socket.gaierror("Name or service not known")
+    with patch("socket.getaddrinfo", side_effect=error) as mock_getaddrinfo:
+        assert await resolver._url_to_ip("https://unknown.example.com") is None
+        assert await resolver._url_to_ip("https://unknown.example.com") is None
+        mock_getaddrinfo.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_resolve_mint_location(sample_ip_database):
     """Test resolving mint location."""
     resolver = MintLocationResolver()
     resolver.db_file = sample_ip_database
     resolver._load_database()
 
-    with patch.object(resolver, "_url_to_ip", return_value="1.0.0.100"):
-        coords = resolver.resolve_mint_location("https://example.com:3338")
+    with patch.object(resolver, "_url_to_ip", AsyncMock(return_value="1.0.0.100")):
+        coords = await resolver.resolve_mint_location("https://example.com:3338")
         assert coords == (34.0522, -118.2437)
 
-    with patch.object(resolver, "_url_to_ip", return_value=None):
-        coords = resolver.resolve_mint_location("https://example.com:3338")
+    with patch.object(resolver, "_url_to_ip", AsyncMock(return_value=None)):
+        coords = await resolver.resolve_mint_location("https://example.com:3338")
         assert coords is None
 
 
 @pytest.mark.asyncio
-async def test_ensure_database_updated_new_download(temp_data_dir):
-    """Test ensuring database is updated when it needs to be downloaded."""
+async def test_resolve_mint_locations(sample_ip_database):
+    """Test resolving many mint locations at once."""
     resolver = MintLocationResolver()
-    resolver.db_file = Path(temp_data_dir) / "dbip-city-ipv4-num.csv.gz"
+    resolver.db_file = sample_ip_database
+    resolver._load_database()
 
-    # Mock download
-    mock_response = MagicMock()
-    mock_response.content = b"test content"
-    mock_response.raise_for_status = MagicMock()
+    ips = {"a.example.com": "1.0.0.1", "b.example.com": "1.0.1.1"}
 
-    with patch("httpx.AsyncClient") as mock_client:
-        mock_client.return_value.__aenter__.return_value.get = AsyncMock(
-            return_value=mock_response
+    def getaddrinfo(host, *args, **kwargs):
+        if host not in ips:
+            raise socket.gaierror("Name or service not known")
+        return [(socket.AF_INET, None, None, None, (ips[host], 0))]
+
+    with patch("socket.getaddrinfo", side_effect=getaddrinfo):
+        locations = await resolver.resolve_mint_locations(
+            ["https://a.example.com", "https://b.example.com", "https://c.example.com"]
         )
-        # Mock the load to avoid needing real CSV data
-        with patch.object(resolver, "_load_database"):
-            await resolver.ensure_database_updated()
+    assert locations == {
+        "https://a.example.com": (34.0522, -118.2437),
+        "https://b.example.com": (40.7128, -74.0060),
+        "https://c.example.com": None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_ensure_database_updated_new_download(sample_ip_database, temp_data_dir):
+    """Test ensuring database is updated when it needs to be downloaded."""
+    content = sample_ip_database.read_bytes()
+    sample_ip_database.unlink()
+    resolver = MintLocationResolver()
+    resolver.db_file = Path(temp_data_dir) / "dbip-city-ipv4-num.csv.gz"
+    resolver.transport = database_server(content, [])
 
+    assert await resolver.ensure_database_updated() is True
     assert resolver.db_file.exists()
+    assert len(resolver.ip_ranges) == 3
+
+
+@pytest.mark.asyncio
+async def test_ensure_database_updated_swaps_index(sample_ip_database):
+    """Test that an updated database replaces the loaded index."""
+    resolver = MintLocationResolver()
+    resolver.db_file = sample_ip_database
+    resolver._load_database()
+    previous = resolver.ip_ranges
+
+    with gzip.open(sample_ip_database, "rb") as f:
+        rows = f.read().decode().splitlines()
+    updated = gzip.compress("\n".join(rows[:1]).encode())
+    resolver.transport = database_server(updated, [])
+    # the last update is older than UPDATE_INTERVAL_DAYS
+    old_time = datetime.utcnow() - timedelta(days=8)
+    resolver.last_update_file.write_text(old_time.isoformat())
+    os.utime(resolver.index_file, (0, 0))
+
+    assert await resolver.ensure_database_updated() is True
+    assert resolver.ip_ranges is not previous
+    assert len(resolver.ip_ranges) == 1
+    assert resolver._ip_to_coordinates("1.0.1.100") is None
+
+    # not due again, nothing is downloaded
+    assert await resolver.ensure_database_updated() is False
 
 
 @pytest.mark.asyncio
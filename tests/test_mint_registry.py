@@ -0,0 +1,88 @@
+# tests/test_mint_registry.py
+
+import pytest
+import pytest_asyncio
+from datetime import datetime
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import engine
+from src.mint_registry import MintRegistry
+from src.models import Base, Mint
+from src.schemas import MintState
+
+
+@pytest_asyncio.fixture(scope="function")
+async def db_setup():
+    """Create database tables for each test."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+
+async def add_mint(url: str, balance: int = 100) -> Mint:
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        mint = Mint(
+            url=url,
+            name=url,
+            balance=balance,
+            sum_donations=balance,
+            updated_at=datetime.utcnow(),
+            next_update=datetime.utcnow(),
+            state=MintState.OK.value,
+            n_errors=0,
+            n_mints=0,
+            n_melts=0,
+        )
+        session.add(mint)
+        await session.commit()
+        return mint
+
+
+@pytest.mark.asyncio
+async def test_registry_loads_lazily(db_setup):
+    mint = await add_mint("https://mint.example.com")
+    registry = MintRegistry()
+    assert not registry.loaded
+
+    mints = await registry.all()
+    assert [m.id for m in mints] == [mint.id]
+    assert (await registry.get(mint.id)).url == "https://mint.example.com"
+    assert (await registry.get_by_url("https://mint.example.com")).id == mint.id
+    assert await registry.get_by_url("https://other.example.com") is None
+
+
+@pytest.mark.asyncio
+async def test_registry_refresh_is_write_through(db_setup):
+    mint = await add_mint("https://mint.example.com", balance=100)
+    registry = MintRegistry()
+    await registry.load()
+    version = registry.version
+
+    async with AsyncSession(engine) as session:
+        await session.execute(
+            update(Mint).where(Mint.id == mint.id).values(balance=Mint.balance + 5)
+        )
+        await session.commit()
+    # not visible until the writer refreshes the registry
+    assert (await registry.get(mint.id)).balance == 100
+
+    await registry.refresh([mint.id])
+    assert (await registry.get(mint.id)).balance == 105
+    assert registry.version > version
+
+    new_mint = await add_mint("https://new.example.com")
+    await registry.refresh([new_mint.id])
+    assert [m.id for m in await registry.all()] == [mint.id, new_mint.id]
+
+
+@pytest.mark.asyncio
+async def test_registry_clear(db_setup):
+    await add_mint("https://mint.example.com")
+    registry = MintRegistry()
+    await registry.load()
+    registry.clear()
+    assert not registry.loaded
+    assert len(await registry.all()) == 1
@@ -2,11 +2,13 @@
 
 import pytest
 from datetime import datetime
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.models import Mint
 from src.schemas import MintState
-from src.database import engine
+from src.database import engine, read_engine
+from src.main import auditor
 
 
 @pytest.mark.asyncio
@@ -172,3 +174,110 @@ async def test_get_mint_by_url_with_trailing_slash(async_client):
     # So this should return 404 since the URL doesn't match exactly
     response = await async_client.get("/mints/url?url=https://testmint.example.com/")
     assert response.status_code == 404
+
+
+async def add_mint_with_info() -> int:
+    async with AsyncSession(engine) as session:
+        mint = Mint(
+            url="https://info.example.com",
+            name="Info Mint",
+            info='{"version": "Nutshell/0.16.0"}',
+            balance=100,
+            sum_donations=100,
+            updated_at=datetime.utcnow(),
+            next_update=datetime.utcnow(),
+            state=MintState.OK.value,
+            n_errors=0,
+            n_mints=0,
+            n_melts=0,
+        )
+        session.add(mint)
+        await session.commit()
+        await session.refresh(mint)
+        return mint.id
+
+
+@pytest.mark.asyncio
+async def test_read_mints_returns_summaries(async_client):
+    await add_mint_with_info()
+    response = await async_client.get("/mints/")
+    assert response.status_code == 200
+    mint = response.json()[0]
+    assert "info" not in mint
+    assert mint["name"] == "Info Mint"
+    assert mint["state"] == MintState.OK.value
+
+
+@pytest.mark.asyncio
+async def test_read_mints_projection(async_client):
+    await add_mint_with_info()
+    queries = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        queries.append(statement)
+
+    event.listen(read_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = await async_client.get("/mints/?fields=id,info")
+        assert response.json() == [{"id": 1, "info": '{"version": "Nutshell/0.16.0"}'}]
+    finally:
+        event.remove(
+            read_engine.sync_engine, "before_cursor_execute", before_cursor_execute
+        )
+    # only the requested columns are read
+    projected = [q for q in queries if "mints.info" in q]
+    assert len(projected) == 1
+    assert "mints.balance" not in projected[0]
+
+    response = await async_client.get("/mints/?exclude=balance,sum_donations")
+    assert "balance" not in response.json()[0]
+    assert "url" in response.json()[0]
+
+    response = await async_client.get("/mints/?fields=nonsense")
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_read_mint_projection(async_client):
+    mint_id = await add_mint_with_info()
+    response = await async_client.get(f"/mints/{mint_id}")
+    assert response.status_code == 200
+    assert response.json()["info"] == '{"version": "Nutshell/0.16.0"}'
+    assert response.json()["name"] == "Info Mint"
+
+    response = await async_client.get(f"/mints/{mint_id}?exclude=info")
+    assert "info" not in response.json()
+
+    response = await async_client.get(
+        "/mints/url", params={"url": "https://info.example.com", "fields": "name,url"}
+    )
+    assert response.json() == {"url": "https://info.example.com", "name": "Info Mint"}
+
+
+@pytest.mark.asyncio
+async def test_read_mints_serves_writes_at_once(async_client):
+    """A cached list is not served once a write changed the registry."""
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        mint = Mint(
+            url="https://failing.example.com",
+            name="Failing Mint",
+            balance=100,
+            sum_donations=100,
+            updated_at=datetime.utcnow(),
+            next_update=datetime.utcnow(),
+            state=MintState.ERROR.value,
+            n_errors=1,
+            n_mints=0,
+            n_melts=0,
+        )
+        session.add(mint)
+        await session.commit()
+    await auditor.mints.load()
+
+    response = await async_client.get("/mints/")
+    assert response.json()[0]["n_errors"] == 1
+
+    # the state stays ERROR, so no event reaches the cache
+    await auditor.bump_mint_errors(mint.id)
+    response = await async_client.get("/mints/")
+    assert response.json()[0]["n_errors"] == 2
@@ -0,0 +1,76 @@
+# tests/test_query_plans.py
+
+import re
+
+import pytest
+from sqlalchemy import event
+
+from src.database import read_engine
+
+FULL_SCAN = re.compile(r"^SCAN swaps$")
+
+
+@pytest.fixture
+def captured_queries():
+    """Record the SELECT statements on `swaps` issued by the API."""
+    queries = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        if statement.lstrip().upper().startswith("SELECT") and "swaps" in statement:
+            queries.append((statement, parameters))
+
+    event.listen(read_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    yield queries
+    event.remove(read_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+async def query_plans(queries) -> list[list[str]]:
+    plans = []
+    async with read_engine.connect() as conn:
+        for statement, parameters in queries:
+            result = await conn.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}", parameters
+            )
+            plans.append([row[-1] for row in result.fetchall()])
+    return plans
+
+
+def assert_no_full_scan(queries, plans):
+    for (statement, _), plan in zip(queries, plans):
+        assert not any(FULL_SCAN.match(step) for step in plan), (statement, plan)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/swaps/?limit=10",
+        "/swaps/?skip=100&limit=10",
+        "/swaps/mint/1?received=false",
+        "/swaps/mint/1?received=true",
+        "/swaps/?before=MjAyNi0wMS0wMVQwMDowMDowMHwxMA",
+        "/swaps/?after=MjAyNi0wMS0wMVQwMDowMDowMHwxMA",
+        "/swaps/mint/1?received=true&before=MjAyNi0wMS0wMVQwMDowMDowMHwxMA",
+    ],
+)
+async def test_swap_listings_use_indexes(async_client, captured_queries, path):
+    response = await async_client.get(path)
+    assert response.status_code == 200
+    assert captured_queries
+    plans = await query_plans(captured_queries)
+    assert_no_full_scan(captured_queries, plans)
+    # ordering by created_at must come from the index, not a temp b-tree
+    for plan in plans:
+        assert not any("USE TEMP B-TREE" in step for step in plan), plan
+
+
+@pytest.mark.asyncio
+async def test_stats_time_ranges_use_index(async_client, captured_queries):
+    response = await async_client.get("/stats/")
+    assert response.status_code == 200
+    ranged = [q for q in captured_queries if "swaps.created_at >=" in q[0]]
+    assert ranged
+    plans = await query_plans(ranged)
+    assert_no_full_scan(ranged, plans)
+    for plan in plans:
+        assert any("ix_swaps_created_at" in step for step in plan), plan
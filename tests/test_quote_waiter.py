@@ -0,0 +1,160 @@
+# tests/test_quote_waiter.py
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+import websockets
+from cashu.core.base import MintQuoteState, Unit
+from cashu.core.mint_info import MintInfo
+
+from src import quote_waiter
+from src.quote_waiter import wait_for_mint_quote, websocket_url
+
+
+class FakeWallet:
+    """Wallet whose mint quote goes through the given states, one per check."""
+
+    def __init__(self, states, url="http://127.0.0.1:1", mint_info=None):
+        self.states = list(states)
+        self.checks = 0
+        self.url = url
+        self.unit = Unit.sat
+        self.mint_info = mint_info
+
+    async def get_mint_quote(self, quote_id):
+        self.checks += 1
+        state = self.states.pop(0) if len(self.states) > 1 else self.states[0]
+        if isinstance(state, Exception):
+            raise state
+        return SimpleNamespace(quote=quote_id, state=state)
+
+
+def websocket_mint_info() -> MintInfo:
+    return MintInfo.model_construct(
+        nuts={
+            17: {
+                "supported": [
+                    {"method": "bolt11", "unit": "sat", "commands": ["bolt11_mint_quote"]}
+                ]
+            }
+        },
+    )
+
+
+@pytest.fixture
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(quote_waiter, "QUOTE_POLL_INITIAL", 0.01)
+    monkeypatch.setattr(quote_waiter, "QUOTE_POLL_MAX", 0.02)
+
+
+def test_websocket_url():
+    assert websocket_url("https://mint.example.com") == "wss://mint.example.com/v1/ws"
+    assert websocket_url("http://localhost:3338/") == "ws://localhost:3338/v1/ws"
+    assert websocket_url("https://example.com/cashu") == "wss://example.com/cashu/v1/ws"
+
+
+@pytest.mark.asyncio
+async def test_wait_polls_until_paid(fast_polling):
+    wallet = FakeWallet(
+        [
+            MintQuoteState.unpaid,
+            Exception("connection reset"),
+            MintQuoteState.pending,
+            MintQuoteState.paid,
+        ]
+    )
+    state = await wait_for_mint_quote(wallet, "quote", deadline=5)
+    assert state == MintQuoteState.paid.value
+    assert wallet.checks == 4
+
+
+@pytest.mark.asyncio
+async def test_wait_returns_immediately_when_paid(fast_polling):
+    wallet = FakeWallet([MintQuoteState.issued])
+    state = await wait_for_mint_quote(wallet, "quote", deadline=5)
+    assert state == MintQuoteState.issued.value
+    assert wallet.checks == 1
+
+
+@pytest.mark.asyncio
+async def test_wait_gives_up_at_deadline(fast_polling):
+    wallet = FakeWallet([MintQuoteState.unpaid])
+    with pytest.raises(asyncio.TimeoutError, match="not paid within"):
+        await wait_for_mint_quote(wallet, "quote", deadline=0.1)
+    checks = wallet.checks
+    await asyncio.sleep(0.05)
+    # the poller stopped with the deadline
+    assert wallet.checks == checks
+
+
+@pytest.mark.asyncio
+async def test_wait_uses_websocket_notification(monkeypatch):
+    # polling alone would not see the quote paid within the deadline
+    monkeypatch.setattr(quote_waiter, "QUOTE_POLL_MAX", 60)
+    requests = []
+
+    async def mint(websocket):
+        request = json.loads(await websocket.recv())
+        requests.append(request)
+        sub_id = request["params"]["subId"]
+        await websocket.send(json.dumps({"jsonrpc": "2.0", "result": {"status": "OK"}, "id": 0}))
+        for state in ("UNPAID", "PAID"):
+            await websocket.send(
+                json.dumps(
+                    {
+                        "jsonrpc": "2.0",
+                        "method": "subscribe",
+                        "params": {
+                            "subId": sub_id,
+                            "payload": {"quote": "quote", "state": state},
+                        },
+                    }
+                )
+            )
+        await websocket.wait_closed()
+
+    async with websockets.serve(mint, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        wallet = FakeWallet(
+            [MintQuoteState.unpaid],
+            url=f"http://127.0.0.1:{port}",
+            mint_info=websocket_mint_info(),
+        )
+        state = await wait_for_mint_quote(wallet, "quote", deadline=5)
+
+    assert state == MintQuoteState.paid.value
+    assert requests[0]["method"] == "subscribe"
+    assert requests[0]["params"]["kind"] == "bolt11_mint_quote"
+    assert requests[0]["params"]["filters"] == ["quote"]
+    assert wallet.checks == 1
+
+
+@pytest.mark.asyncio
+async def test_wait_falls_back_to_polling_without_websocket(fast_polling):
+    # the mint advertises subscriptions but nothing listens on its port
+    wallet = FakeWallet(
+        [MintQuoteState.unpaid, MintQuoteState.paid],
+        url="http://127.0.0.1:1",
+        mint_info=websocket_mint_info(),
+    )
+    state = await wait_for_mint_quote(wallet, "quote", deadline=5)
+    assert state == MintQuoteState.paid.value
+
+
+@pytest.mark.asyncio
+async def test_wait_only_polls_through_a_proxy(fast_polling, monkeypatch):
+    monkeypatch.setattr(quote_waiter.settings, "socks_proxy", "127.0.0.1:9050")
+
+    def connect(*args, **kwargs):
+        raise AssertionError("the websocket must not bypass the proxy")
+
+    monkeypatch.setattr(quote_waiter.websockets, "connect", connect)
+    wallet = FakeWallet(
+        [MintQuoteState.unpaid, MintQuoteState.paid],
+        mint_info=websocket_mint_info(),
+    )
+    assert not quote_waiter.supports_websocket(wallet)
+    state = await wait_for_mint_quote(wallet, "quote", deadline=5)
+    assert state == MintQuoteState.paid.value
@@ -0,0 +1,92 @@
+# tests/test_response_cache.py
+
+import asyncio
+import json
+
+import pytest
+
+from src.main import auditor, response_cache
+from src.event_bus import DonationReceived
+from src.response_cache import ResponseCache
+
+
+def counter():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"calls": len(calls)}
+
+    return compute, calls
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_and_invalidate():
+    cache = ResponseCache(ttl=60, stale_ttl=0)
+    compute, calls = counter()
+
+    assert json.loads((await cache.get("key", compute, dict)).body) == {"calls": 1}
+    assert json.loads((await cache.get("key", compute, dict)).body) == {"calls": 1}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.invalidate()
+    assert json.loads((await cache.get("key", compute, dict)).body) == {"calls": 2}
+    assert cache.misses == 2
+
+
+@pytest.mark.asyncio
+async def test_entry_is_recomputed_for_another_version():
+    cache = ResponseCache(ttl=60, stale_ttl=60)
+    compute, calls = counter()
+
+    assert json.loads((await cache.get("key", compute, dict, 1)).body) == {"calls": 1}
+    assert json.loads((await cache.get("key", compute, dict, 2)).body) == {"calls": 2}
+    assert json.loads((await cache.get("key", compute, dict, 2)).body) == {"calls": 2}
+    assert (cache.hits, cache.stale_hits, cache.misses) == (1, 0, 2)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_computation():
+    cache = ResponseCache()
+    compute, calls = counter()
+
+    entries = await asyncio.gather(*[cache.get("key", compute, dict) for _ in range(10)])
+    bodies = [entry.body for entry in entries]
+    assert len(calls) == 1
+    assert len(set(bodies)) == 1
+    assert (cache.misses, cache.coalesced) == (1, 9)
+
+
+@pytest.mark.asyncio
+async def test_stale_while_revalidate():
+    cache = ResponseCache(ttl=0, stale_ttl=60)
+    compute, calls = counter()
+
+    (await cache.get("key", compute, dict)).body
+    # the stale body is returned at once, a refresh runs in the background
+    assert json.loads((await cache.get("key", compute, dict)).body) == {"calls": 1}
+    assert cache.stale_hits == 1
+    await asyncio.gather(*cache.inflight.values())
+    assert len(calls) == 2
+    assert json.loads(cache.entries["key"].body) == {"calls": 2}
+
+
+@pytest.mark.asyncio
+async def test_stats_endpoint_is_cached_and_invalidated(async_client):
+    response = await async_client.get("/stats/")
+    assert response.status_code == 200
+    response = await async_client.get("/stats/")
+    assert response.status_code == 200
+    assert response_cache.hits == 1
+
+    auditor.events.publish(
+        DonationReceived(mint_id=1, url="https://mint1.example.com", amount=5)
+    )
+    await auditor.events.join()
+    await async_client.get("/stats/")
+
+    response = await async_client.get("/stats/cache")
+    assert response.status_code == 200
+    assert response.json()["hits"] == 1
+    assert response.json()["misses"] == 2
@@ -153,3 +153,258 @@ async def test_read_stats_old_swaps(async_client):
     assert data["total_swaps_24h"] == 0
     assert data["total_amount_swapped"] == 50
     assert data["total_amount_swapped_24h"] == 0
+
+
+async def create_two_mints():
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        mints = [
+            Mint(
+                url=f"https://mint{i}.example.com",
+                name=f"Mint {i}",
+                balance=100,
+                sum_donations=100,
+                updated_at=datetime.utcnow(),
+                next_update=datetime.utcnow(),
+                state=MintState.OK.value,
+                n_errors=0,
+                n_mints=0,
+                n_melts=0,
+            )
+            for i in (1, 2)
+        ]
+        session.add_all(mints)
+        await session.commit()
+        return mints
+
+
+async def add_swaps(mint1, mint2, swaps):
+    async with AsyncSession(engine) as session:
+        for created_at, amount, time_taken, state in swaps:
+            session.add(
+                SwapEvent(
+                    from_id=mint1.id,
+                    to_id=mint2.id,
+                    from_url=mint1.url,
+                    to_url=mint2.url,
+                    amount=amount,
+                    fee=1,
+                    created_at=created_at,
+                    time_taken=time_taken,
+                    state=state.value,
+                )
+            )
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_stats_24h_window_is_exact_at_hour_edge(async_client):
+    mint1, mint2 = await create_two_mints()
+    now = datetime.utcnow()
+    await add_swaps(
+        mint1,
+        mint2,
+        [
+            (now - timedelta(hours=24, minutes=5), 10, 100, MintState.OK),
+            (now - timedelta(hours=23, minutes=55), 20, 200, MintState.OK),
+            (now - timedelta(minutes=1), 40, 0, MintState.ERROR),
+        ],
+    )
+
+    response = await async_client.get("/stats/")
+    data = response.json()
+    assert data["total_swaps"] == 3
+    assert data["total_swaps_24h"] == 2
+    assert data["total_amount_swapped"] == 70
+    assert data["total_amount_swapped_24h"] == 60
+    assert data["average_swap_time"] == 100.0
+    assert data["average_swap_time_24h"] == 100.0
+
+
+@pytest.mark.asyncio
+async def test_mint_stats_windows(async_client):
+    mint1, mint2 = await create_two_mints()
+    now = datetime.utcnow()
+    await add_swaps(
+        mint1,
+        mint2,
+        [
+            (now - timedelta(minutes=10), 10, 100, MintState.OK),
+            (now - timedelta(hours=5), 20, 300, MintState.OK),
+            (now - timedelta(days=3), 30, 0, MintState.ERROR),
+            (now - timedelta(days=40), 40, 500, MintState.OK),
+        ],
+    )
+
+    response = await async_client.get(f"/stats/mint/{mint1.id}")
+    assert response.status_code == 200
+    windows = response.json()["windows"]
+    assert windows["1h"]["count"] == 1
+    assert windows["24h"]["count"] == 2
+    assert windows["24h"]["min_time"] == 100
+    assert windows["24h"]["max_time"] == 300
+    assert windows["7d"]["count"] == 3
+    assert windows["7d"]["n_error"] == 1
+    assert windows["30d"]["amount"] == 60
+
+    # mint2 only received swaps
+    response = await async_client.get(f"/stats/mint/{mint2.id}")
+    assert response.json()["windows"]["30d"]["count"] == 0
+
+    response = await async_client.get("/stats/mint/999")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_backfill_matches_trigger(async_client):
+    from sqlalchemy import select
+
+    from src import stats
+    from src.models import SwapStatsHourly
+
+    mint1, mint2 = await create_two_mints()
+    now = datetime.utcnow()
+    await add_swaps(
+        mint1,
+        mint2,
+        [(now - timedelta(hours=h), 10 + h, 50 * h, MintState.OK) for h in range(5)],
+    )
+
+    async def rollup():
+        async with AsyncSession(engine) as session:
+            result = await session.execute(
+                select(SwapStatsHourly).order_by(SwapStatsHourly.bucket)
+            )
+            return [
+                (r.bucket, r.mint_id, r.count, r.amount, r.time_taken_sum)
+                for r in result.scalars().all()
+            ]
+
+    maintained = await rollup()
+    assert len(maintained) == 5
+    async with AsyncSession(engine) as session:
+        await stats.backfill(session)
+    assert await rollup() == maintained
+
+
+@pytest.mark.asyncio
+async def test_swap_and_mint_timings(async_client):
+    from sqlalchemy import select
+
+    from src.models import SwapTimings
+
+    mint1, mint2 = await create_two_mints()
+    now = datetime.utcnow()
+    await add_swaps(
+        mint1,
+        mint2,
+        [
+            (now - timedelta(minutes=10), 10, 100, MintState.OK),
+            (now - timedelta(days=3), 20, 300, MintState.ERROR),
+        ],
+    )
+    async with AsyncSession(engine) as session:
+        result = await session.execute(select(SwapEvent.id).order_by(SwapEvent.created_at))
+        old_id, new_id = result.scalars().all()
+        session.add_all(
+            [
+                SwapTimings(swap_id=old_id, load_from_mint=50, melt_quote=3000),
+                SwapTimings(
+                    swap_id=new_id,
+                    load_from_mint=10,
+                    melt_quote=200,
+                    melt=100,
+                    request_mint=40,
+                    quote_wait=250,
+                    mint=60,
+                ),
+            ]
+        )
+        await session.commit()
+
+    response = await async_client.get(f"/swaps/{new_id}/timings")
+    assert response.status_code == 200
+    timings = response.json()
+    assert timings["swap_id"] == new_id
+    assert timings["melt"] == 100
+    assert timings["load_to_mint"] is None
+    response = await async_client.get("/swaps/999/timings")
+    assert response.status_code == 404
+
+    # sending phases are attributed to the sender, receiving ones to the receiver
+    response = await async_client.get(f"/stats/mint/{mint1.id}/timings")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["sent"]["melt_quote"] == {
+        "count": 2,
+        "average_time": 1600,
+        "min_time": 200,
+        "max_time": 3000,
+    }
+    assert data["sent"]["melt"]["count"] == 1
+    assert data["received"]["mint"]["count"] == 0
+    assert data["received"]["mint"]["average_time"] == 0
+
+    response = await async_client.get(
+        f"/stats/mint/{mint1.id}/timings",
+        params={"since": (now - timedelta(hours=1)).isoformat()},
+    )
+    assert response.json()["sent"]["melt_quote"]["max_time"] == 200
+
+    response = await async_client.get(f"/stats/mint/{mint2.id}/timings")
+    data = response.json()
+    assert data["received"]["quote_wait"]["average_time"] == 250
+    assert data["sent"]["melt"]["count"] == 0
+
+    response = await async_client.get("/stats/mint/999/timings")
+    assert response.status_code == 404
+
+
+def test_non_sqlite_database_is_rejected():
+    import subprocess
+    import sys
+
+    result = subprocess.run(
+        [sys.executable, "-c", "import src.database"],
+        env={
+            "PATH": "",
+            "AUDITOR_DATABASE_URL": "postgresql+asyncpg://auditor@localhost/auditor",
+        },
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode != 0
+    assert "only SQLite databases are supported" in result.stderr
+
+
+def test_migrations_install_the_rollup_triggers(tmp_path):
+    import sqlite3
+    import subprocess
+    import sys
+
+    db_file = tmp_path / "migrated.db"
+    upgrade = (
+        "import sys; sys.path.append('src');"
+        "from alembic.config import Config; from alembic import command;"
+        "from src.database import MIGRATIONS_URL;"
+        "cfg = Config('src/alembic.ini');"
+        "cfg.set_main_option('script_location', 'src/migrations');"
+        "cfg.set_main_option('sqlalchemy.url', MIGRATIONS_URL);"
+        "command.upgrade(cfg, 'head')"
+    )
+    subprocess.run(
+        [sys.executable, "-c", upgrade],
+        env={"PATH": "", "AUDITOR_DATABASE_PATH": str(db_file)},
+        check=True,
+        capture_output=True,
+    )
+
+    with sqlite3.connect(db_file) as db:
+        db.execute("INSERT INTO mints (id, url) VALUES (1, 'a'), (2, 'b')")
+        db.execute(
+            "INSERT INTO swaps (from_id, to_id, amount, fee, time_taken, state, created_at)"
+            " VALUES (1, 2, 10, 1, 100, 'OK', CURRENT_TIMESTAMP)"
+        )
+        assert db.execute("SELECT count, amount FROM swap_stats_hourly").fetchall() == [
+            (1, 10)
+        ]
+        assert db.execute("SELECT count FROM swap_edges").fetchall() == [(1,)]
@@ -1,7 +1,7 @@
 # tests/test_swaps_api.py
 
 import pytest
-from datetime import datetime
+from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.models import Mint, SwapEvent
@@ -264,3 +264,176 @@ async def test_read_swaps_mint_error_state(async_client):
     assert len(data) == 1
     assert data[0]["state"] == MintState.ERROR.value
     assert data[0]["error"] == "Test error message"
+
+
+@pytest.mark.asyncio
+async def test_read_swaps_cursor_pagination(async_client):
+    created_at = datetime.utcnow()
+    async with AsyncSession(engine) as session:
+        mint1 = Mint(
+            url="https://mint1.example.com",
+            name="Mint 1",
+            balance=100,
+            sum_donations=100,
+            updated_at=datetime.utcnow(),
+            next_update=datetime.utcnow(),
+            state=MintState.UNKNOWN.value,
+            n_errors=0,
+            n_mints=0,
+            n_melts=0,
+        )
+        session.add(mint1)
+        await session.commit()
+        await session.refresh(mint1)
+        mint1_id = mint1.id
+
+        # swaps sharing a timestamp must neither be skipped nor repeated
+        for i in range(5):
+            session.add(
+                SwapEvent(
+                    from_id=mint1_id,
+                    to_id=mint1_id,
+                    from_url="https://mint1.example.com",
+                    to_url="https://mint1.example.com",
+                    amount=10 + i,
+                    fee=1,
+                    created_at=created_at if i < 3 else created_at + timedelta(seconds=i),
+                    time_taken=100,
+                    state=MintState.OK.value,
+                )
+            )
+        await session.commit()
+
+    response = await async_client.get("/swaps/?limit=2")
+    assert response.status_code == 200
+    seen = [swap["id"] for swap in response.json()]
+    newest_cursor = response.headers["X-Prev-Cursor"]
+    while True:
+        cursor = response.headers["X-Next-Cursor"]
+        response = await async_client.get("/swaps/", params={"limit": 2, "before": cursor})
+        assert response.status_code == 200
+        if not response.json():
+            break
+        seen += [swap["id"] for swap in response.json()]
+    assert len(seen) == 5
+    assert len(set(seen)) == 5
+    assert [swap["amount"] for swap in (await async_client.get("/swaps/")).json()] == [
+        14,
+        13,
+        12,
+        11,
+        10,
+    ]
+
+    # nothing is newer than the first page
+    response = await async_client.get("/swaps/", params={"after": newest_cursor})
+    assert response.status_code == 200
+    assert response.json() == []
+
+    # the swaps right after the oldest one, still returned newest first
+    response = await async_client.get("/swaps/", params={"skip": 4, "limit": 1})
+    assert response.json()[0]["amount"] == 10
+    oldest_cursor = response.headers["X-Next-Cursor"]
+    response = await async_client.get(
+        "/swaps/", params={"limit": 2, "after": oldest_cursor}
+    )
+    assert [swap["amount"] for swap in response.json()] == [12, 11]
+
+    response = await async_client.get(
+        f"/swaps/mint/{mint1_id}", params={"limit": 2, "after": oldest_cursor}
+    )
+    assert [swap["amount"] for swap in response.json()] == [12, 11]
+
+
+@pytest.mark.asyncio
+async def test_cursor_pagination_of_default_timestamps(async_client):
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        mint = Mint(url="https://mint1.example.com", name="Mint 1", balance=0)
+        session.add(mint)
+        await session.commit()
+        # created_at comes from the column default, like in production
+        session.add_all(
+            [
+                SwapEvent(
+                    from_id=mint.id,
+                    to_id=mint.id,
+                    from_url=mint.url,
+                    to_url=mint.url,
+                    amount=10 + i,
+                    fee=0,
+                    time_taken=100,
+                    state=MintState.OK.value,
+                )
+                for i in range(4)
+            ]
+        )
+        await session.commit()
+
+    response = await async_client.get("/swaps/", params={"limit": 1})
+    newest = response.json()[0]["id"]
+    seen = [newest]
+    for _ in range(5):
+        cursor = response.headers["X-Next-Cursor"]
+        response = await async_client.get("/swaps/", params={"limit": 1, "before": cursor})
+        if not response.json():
+            break
+        seen += [swap["id"] for swap in response.json()]
+    assert seen == [4, 3, 2, 1]
+
+    seen = [1]
+    response = await async_client.get("/swaps/", params={"skip": 3, "limit": 1})
+    for _ in range(5):
+        cursor = response.headers["X-Prev-Cursor"]
+        response = await async_client.get("/swaps/", params={"limit": 1, "after": cursor})
+        if not response.json():
+            break
+        seen += [swap["id"] for swap in response.json()]
+    assert seen == [1, 2, 3, 4]
+
+
+def test_migration_normalizes_second_precision_timestamps(tmp_path):
+    import sqlite3
+    import subprocess
+    import sys
+
+    db_file = tmp_path / "migrated.db"
+
+    def upgrade(revision: str):
+        subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys; sys.path.append('src');"
+                "from alembic.config import Config; from alembic import command;"
+                "from src.database import MIGRATIONS_URL;"
+                "cfg = Config('src/alembic.ini');"
+                "cfg.set_main_option('script_location', 'src/migrations');"
+                "cfg.set_main_option('sqlalchemy.url', MIGRATIONS_URL);"
+                f"command.upgrade(cfg, '{revision}')",
+            ],
+            env={"PATH": "", "AUDITOR_DATABASE_PATH": str(db_file)},
+            check=True,
+            capture_output=True,
+        )
+
+    upgrade("add_swap_timings")
+    with sqlite3.connect(db_file) as db:
+        db.execute("INSERT INTO mints (id, url) VALUES (1, 'a')")
+        # swaps written by the former CURRENT_TIMESTAMP default
+        db.execute(
+            "INSERT INTO swaps (from_id, to_id, state, created_at)"
+            " VALUES (1, 1, 'OK', '2026-10-17 12:00:00'),"
+            " (1, 1, 'OK', '2026-10-17 12:00:01.250000')"
+        )
+    upgrade("head")
+    with sqlite3.connect(db_file) as db:
+        rows = db.execute("SELECT created_at FROM swaps ORDER BY id").fetchall()
+    assert rows == [("2026-10-17 12:00:00.000000",), ("2026-10-17 12:00:01.250000",)]
+
+
+@pytest.mark.asyncio
+async def test_read_swaps_invalid_cursor(async_client):
+    response = await async_client.get("/swaps/", params={"before": "not-a-cursor"})
+    assert response.status_code == 400
+    response = await async_client.get("/swaps/mint/1", params={"after": "%%%"})
+    assert response.status_code == 400
@@ -0,0 +1,132 @@
+# tests/test_wallet_pool.py
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from cashu.wallet.wallet import Wallet
+from src.wallet_pool import WalletPool, _MigratedWallet
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """Replace `Wallet.with_db` and record the wallet classes that were opened."""
+    calls = []
+
+    async def fake_with_db(cls, url, db):
+        calls.append((cls, url))
+        return SimpleNamespace(
+            url=url,
+            load_proofs=AsyncMock(),
+            load_mint=AsyncMock(),
+            db=SimpleNamespace(engine=SimpleNamespace(dispose=AsyncMock())),
+        )
+
+    monkeypatch.setattr(Wallet, "with_db", classmethod(fake_with_db))
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_get_reuses_wallet_and_migrates_once(opened):
+    pool = WalletPool()
+    wallet_a = await pool.get("https://mint-a.example.com")
+    assert await pool.get("https://mint-a.example.com/") is wallet_a
+    await pool.get("https://mint-b.example.com")
+
+    assert [cls for cls, _ in opened] == [Wallet, _MigratedWallet]
+    wallet_a.load_proofs.assert_awaited_once_with(reload=True)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_opens_migrate_once(opened, monkeypatch):
+    fake_with_db = Wallet.with_db.__func__
+
+    async def slow_with_db(cls, url, db):
+        # yield while "migrating" so that the other opens run concurrently
+        await asyncio.sleep(0.01)
+        return await fake_with_db(cls, url, db)
+
+    monkeypatch.setattr(Wallet, "with_db", classmethod(slow_with_db))
+    pool = WalletPool()
+    await asyncio.gather(
+        *[pool.get(f"https://mint-{i}.example.com") for i in range(16)]
+    )
+
+    classes = [cls for cls, _ in opened]
+    assert classes.count(Wallet) == 1
+    assert classes.count(_MigratedWallet) == 15
+
+
+@pytest.mark.asyncio
+async def test_load_mint_respects_ttl(opened):
+    pool = WalletPool(mint_reload_ttl=60)
+    async with pool.acquire("https://mint.example.com", load_mint=True) as wallet:
+        pass
+    async with pool.acquire("https://mint.example.com", load_mint=True) as wallet:
+        pass
+    assert wallet.load_mint.await_count == 1
+
+    await pool.load_mint(wallet, force=True)
+    assert wallet.load_mint.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction(opened):
+    pool = WalletPool(max_size=2)
+    wallet_a = await pool.get("https://mint-a.example.com")
+    await pool.get("https://mint-b.example.com")
+    await pool.get("https://mint-a.example.com")
+    await pool.get("https://mint-c.example.com")
+
+    assert list(pool.entries.keys()) == [
+        "https://mint-a.example.com",
+        "https://mint-c.example.com",
+    ]
+    assert wallet_a.db.engine.dispose.await_count == 0
+
+
+@pytest.mark.asyncio
+async def test_idle_eviction(opened):
+    pool = WalletPool(idle_ttl=0)
+    wallet = await pool.get("https://mint.example.com")
+    await asyncio.sleep(0.01)
+    await pool.evict()
+    assert pool.entries == {}
+    wallet.db.engine.dispose.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_acquire_is_exclusive(opened):
+    pool = WalletPool()
+    order = []
+
+    async def use(name):
+        async with pool.acquire("https://mint.example.com"):
+            order.append(f"{name}-start")
+            await asyncio.sleep(0.01)
+            order.append(f"{name}-end")
+
+    await asyncio.gather(use("a"), use("b"))
+    assert order == ["a-start", "a-end", "b-start", "b-end"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_gets_evict_idle_wallets_once(opened):
+    pool = WalletPool(idle_ttl=0.1)
+    idle = [await pool.get(f"https://m{i}") for i in range(3)]
+    for wallet in idle:
+
+        async def slow_dispose():
+            # yield so that the other get evicts the same wallets concurrently
+            await asyncio.sleep(0.01)
+
+        wallet.db.engine.dispose = AsyncMock(side_effect=slow_dispose)
+    await asyncio.sleep(0.11)
+
+    await asyncio.gather(pool.get("https://new-a"), pool.get("https://new-b"))
+
+    assert set(pool.entries) == {"https://new-a", "https://new-b"}
+    for wallet in idle:
+        wallet.db.engine.dispose.assert_awaited_once()